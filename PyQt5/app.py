@@ -23,30 +23,51 @@ def load_user_name_from_token():
         return None
 
 
+def _exit_now():
+    # Leave before the work the dashboard defers past its first paint
+    # (starting the collector) gets to run
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+
 def main():
-    # If started as a subprocess to run monitoring, handle that mode:
-    if "--child-get-info" in sys.argv:
-        # Run the monitoring loop directly inside this process (no extra console)
-        from utils.get_info import main as _get_info_main
-        _get_info_main()
-        sys.exit(0)
+    # Collector mode (frozen builds have no separate collector.py; older
+    # launchers pass --child-get-info): the single-instance daemon, no GUI
+    if "--collector" in sys.argv or "--child-get-info" in sys.argv:
+        from utils.collector_daemon import run as _run_collector
+        sys.exit(_run_collector())
+
+    # --startup-trace: import times and time to first window (stderr and
+    # STARTUP_TRACE_FILE); --startup-trace-exit also quits after first paint
+    trace = None
+    if "--startup-trace" in sys.argv or "--startup-trace-exit" in sys.argv:
+        from utils.startup_trace import trace
+        trace.start()
 
     # Normal GUI startup: import GUI-related modules after child check
     from PyQt5.QtWidgets import QApplication
-    from pages.auth import LoginWindow
-    from pages.dashboard import DashboardWindow
 
     app = QApplication(sys.argv)
+    if trace:
+        trace.mark("qapplication")
 
-    # Check token file to decide whether user is already logged in
+    # Check token file to decide whether user is already logged in, and
+    # only import the window that is shown (the login page pulls in the
+    # Google OAuth stack)
     user_name = load_user_name_from_token()
     if user_name:
         # Show dashboard directly
+        from pages.dashboard import DashboardWindow
         window = DashboardWindow(user_name=user_name)
     else:
         # Show login window
+        from pages.auth import LoginWindow
         window = LoginWindow()
 
+    if trace:
+        trace.mark("window_created")
+        trace.watch_first_paint(window, _exit_now if "--startup-trace-exit" in sys.argv else None)
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,4 @@
+""" Benchmarks for the agent. Run them as modules from the PyQt5 directory,
+    e.g. `python -m benchmarks.bench_collector`, so `utils` and `pages`
+    import the same way they do for app.py.
+"""
@@ -0,0 +1,105 @@
+""" Analysis client benchmark against a local cold-starting server.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_analysis_client --out client.json
+
+"legacy" is the previous get_cloud_analysis() transport: a fresh
+requests.post per call that waits out the cold start itself. "client" is
+utils.analysis_client with a warm-up ping sent `--lead` seconds before
+the upload, as the dashboard does when monitoring starts. The server is
+plain HTTP on loopback, so tls_ms is 0 here; against Render the saved
+handshake is larger.
+"""
+import argparse
+import sys
+import time
+
+import requests
+
+from benchmarks.bench_collector import make_history
+from benchmarks.fake_analysis_server import FakeAnalysisServer
+from benchmarks.harness import write_results, compare
+from utils.analysis_client import AnalysisClient
+from utils.stream_encode import iter_gzip_json
+
+
+def _legacy_post(url, history):
+    t0 = time.perf_counter()
+    response = requests.post(
+        url + "/analyze",
+        data=iter_gzip_json(history),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        timeout=200
+    )
+    response.raise_for_status()
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _summary(values):
+    values = sorted(values)
+    return {
+        "mean_ms": round(sum(values) / len(values), 2),
+        "p50_ms": values[len(values) // 2],
+        "max_ms": values[-1],
+    }
+
+
+def run(cold_start, lead, calls):
+    history = make_history(120, 50, scenario="small")
+    server = FakeAnalysisServer(cold_start_sec=cold_start).start()
+    results = {}
+    try:
+        # 1. Upload straight into a sleeping server
+        server.sleep_now()
+        results["legacy_cold"] = {"total_ms": _legacy_post(server.url, history)}
+
+        # 2. Same upload with the warm-up sent `lead` seconds earlier
+        server.sleep_now()
+        client = AnalysisClient(server.url)
+        client.warm_up()
+        time.sleep(lead)
+        client.analyze(history)
+        results["client_prewarmed"] = dict(client.timings[-1])
+
+        # 3. Repeated calls on an awake server: new connection vs pool
+        before = server.counts["connections"]
+        legacy = [_legacy_post(server.url, history) for _ in range(calls)]
+        results["legacy_repeat"] = dict(_summary(legacy), connections=server.counts["connections"] - before)
+
+        before = server.counts["connections"]
+        for _ in range(calls):
+            client.analyze(history)
+        pooled = list(client.timings)[-calls:]
+        results["client_repeat"] = dict(
+            _summary([t["total_ms"] for t in pooled]),
+            connect_ms=round(sum(t["connect_ms"] for t in pooled), 2),
+            server_ms=_summary([t["server_ms"] for t in pooled])["mean_ms"],
+            connections=server.counts["connections"] - before,
+        )
+        client.close()
+    finally:
+        server.stop()
+    results["server"] = dict(server.counts)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analysis client benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--cold-start", type=float, default=3.0)
+    parser.add_argument("--lead", type=float, default=4.0, help="seconds between warm-up and upload")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    results = run(args.cold_start, args.lead, args.calls)
+    write_results(args.out, results, {"benchmark": "analysis_client", "cold_start_sec": args.cold_start})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+""" Collector overhead benchmark.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_collector --out base.json
+    python -m benchmarks.bench_collector --out new.json
+    python -m benchmarks.bench_collector --compare base.json new.json
+
+Every get_* collector, build_sample(), aggregate_samples(), the history
+write path and the on-device analysis run against benchmarks.fake_psutil,
+so results depend only on the code under test and the simulated machine
+size.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+try:
+    import psutil as _real_psutil      # for this process's RSS only
+    _self_proc = _real_psutil.Process()
+except ImportError:
+    _self_proc = None
+
+from benchmarks import fake_psutil
+from benchmarks.harness import measure, rss_bytes, write_results, compare
+
+sys.modules["psutil"] = fake_psutil
+
+from utils import get_info                           # noqa: E402  (after the fake is installed)
+from utils.journal import HistoryJournal             # noqa: E402
+from utils.local_analysis import analyze_local       # noqa: E402
+
+SCENARIOS = {
+    "small":  dict(processes=10, sensors=2, nics=1),
+    "medium": dict(processes=1000, sensors=8, nics=4),
+    "large":  dict(processes=10000, sensors=32, nics=16),
+}
+
+COLLECTORS = [
+    "get_cpu_usage",
+    "get_cpu_freq",
+    "get_memory_info",
+    "get_disk_info",
+    "get_network_info",
+    "get_cpu_temps",
+    "get_processes_info",
+]
+
+
+def _samples(n):
+    scheduler = get_info.build_scheduler()
+    out = []
+    for _ in range(n):
+        fake_psutil.advance()
+        for c in scheduler.collectors.values():
+            c.next_due = 0
+        scheduler.run_due()
+        out.append(get_info.build_sample(scheduler.latest()))
+    return out
+
+
+def make_history(n_samples, n_aggregates, scenario="medium"):
+    """ A v3 history payload with realistic sample/aggregate records. """
+    fake_psutil.configure(**SCENARIOS[scenario])
+    get_info._process_sampler = None
+    window = get_info.AGGREGATE_EVERY_N_SAMPLES
+    base = _samples(max(n_samples, window))
+    aggregate = get_info.aggregate_samples(base[:window])
+    return {
+        "schema_version": "3.0",
+        "machine": {"hostname": "bench", "os": "Linux", "arch": "x86_64", "boot_time": fake_psutil.boot_time()},
+        "data": {
+            "recent_samples": [base[i % len(base)] for i in range(n_samples)],
+            "aggregates": [aggregate] * n_aggregates,
+        },
+    }
+
+
+def run_scenario(name, repeat):
+    fake_psutil.configure(**SCENARIOS[name])
+    get_info._process_sampler = None
+    results = {}
+
+    for fn_name in COLLECTORS:
+        fn = getattr(get_info, fn_name)
+        setup = fake_psutil.advance if fn_name == "get_processes_info" else None
+        results[fn_name] = measure(fn, repeat=repeat, setup=setup)
+
+    samples = _samples(get_info.AGGREGATE_EVERY_N_SAMPLES)
+    results["aggregate_samples"] = measure(lambda: get_info.aggregate_samples(samples), repeat=repeat)
+
+    scheduler = get_info.build_scheduler()
+    scheduler.run_due()
+    results["build_sample"] = measure(lambda: get_info.build_sample(scheduler.latest()), repeat=repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = HistoryJournal(os.path.join(tmp, "journal"), {"hostname": "bench"})
+        recorder = get_info.Recorder(journal)
+        it = iter(samples * (repeat * 4 // len(samples) + 2))
+        results["payload_write"] = measure(lambda: recorder.record(next(it)), repeat=repeat)
+        journal.close()
+
+        # The pre-journal path: rewrite the whole payload with indent=2
+        history = _samples(get_info.MAX_RAW_SAMPLES)
+        payload = {
+            "schema_version": "3.0",
+            "machine": {"hostname": "bench"},
+            "data": {"recent_samples": history, "aggregates": [get_info.aggregate_samples(samples)] * 50},
+        }
+        path = os.path.join(tmp, "history.json")
+
+        def legacy_write():
+            with open(path, "w") as f:
+                json.dump(payload, f, indent=2)
+        results["legacy_full_rewrite"] = measure(legacy_write, repeat=max(3, repeat // 4))
+        results["legacy_full_rewrite"]["bytes"] = os.path.getsize(path)
+
+        # On-device analysis over the same retained window
+        results["analyze_local"] = measure(lambda: analyze_local(payload), repeat=repeat)
+
+    results["rss_bytes"] = rss_bytes(_self_proc)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collector overhead benchmark")
+    parser.add_argument("--out", default="-", help="results JSON path ('-' for stdout)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+
+    results = {}
+    for name in args.scenarios.split(","):
+        print(f"running {name} ...", file=sys.stderr)
+        results[name] = run_scenario(name, args.repeat)
+    write_results(args.out, results, {"benchmark": "collector", "scenarios": SCENARIOS})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+""" Time range explorer benchmark: pan / zoom re-render against a frame budget.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_explorer --out explorer.json
+
+A week of CPU history is loaded at every level: 10 s raw samples (60k,
+with a 6 hour gap where the machine was off), 5 minute aggregates and the
+hourly and daily tiers. TimeRangeGraph is rendered offscreen at the size
+GraphsWindow gives it. Reported:
+  lookup            the points of a one hour window: two binary searches
+  scan              the same window by filtering a list of timestamps
+                    (what a lookup over the records would cost)
+  <span>/pan        shift the view by 10% (alternating direction), paint
+  <span>/zoom       one wheel notch in or out around the centre, paint
+for spans of 15 minutes, 6 hours, 1 day and the whole week, plus the level
+each span is drawn from and whether p95 stays within one 60 Hz frame.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage
+
+from benchmarks.harness import measure, write_results, compare
+from utils.time_index import TimeIndex, RAW_INTERVAL_SEC
+
+WEEK_SEC = 7 * 86400
+WIDTH, HEIGHT = 1140, 300
+FRAME_BUDGET_MS = 1000 / 60
+SPANS = (("15m", 900), ("6h", 6 * 3600), ("1d", 86400), ("week", WEEK_SEC))
+
+
+def _level(name, interval, ts, avg, peak):
+    columns = {"avg": avg} if peak is None else {"avg": avg, "max": peak}
+    return TimeIndex(name, interval, ts, columns)
+
+
+def make_levels(seconds=WEEK_SEC, seed=0):
+    """ Raw samples plus 5m / 1h / 1d levels built from them. """
+    rng = np.random.default_rng(seed)
+    n = seconds // RAW_INTERVAL_SEC
+    n -= n % (30 * 12 * 24)
+    end = 1.79e9 - 1.79e9 % 86400
+    ts = end - n * RAW_INTERVAL_SEC + np.arange(n) * RAW_INTERVAL_SEC
+    cpu = np.clip(25 + 10 * np.sin(ts / 86400 * 2 * np.pi) + rng.normal(0, 8, n), 0, 100)
+    off = (ts > end - 3 * 86400) & (ts < end - 3 * 86400 + 6 * 3600)
+
+    levels = [_level("raw", RAW_INTERVAL_SEC, ts[~off], cpu[~off], None)]
+    for name, group, interval in (("5m", 30, 300), ("1h", 30 * 12, 3600), ("1d", 30 * 12 * 24, 86400)):
+        mid = ts.reshape(-1, group).mean(axis=1)
+        avg = cpu.reshape(-1, group).mean(axis=1)
+        peak = cpu.reshape(-1, group).max(axis=1)
+        keep = ~off.reshape(-1, group).all(axis=1)
+        levels.append(_level(name, interval, mid[keep], avg[keep], peak[keep]))
+    return levels
+
+
+def run(repeat):
+    from pages.graphs import TimeRangeGraph
+
+    levels = make_levels()
+    raw = levels[0]
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    graph = TimeRangeGraph("Bench")
+    graph.resize(WIDTH, HEIGHT)
+    graph.set_levels(levels)
+    lo, hi = graph.extent
+
+    t0, t1 = hi - 86400 - 3600, hi - 86400
+    raw_list = raw.ts.tolist()
+    results = {
+        "points": {level.name: len(level) for level in levels},
+        "lookup": measure(lambda: raw.bounds(t0, t1), repeat=repeat),
+        "scan": measure(lambda: [i for i, t in enumerate(raw_list) if t0 <= t <= t1], repeat=repeat),
+    }
+
+    for label, span in SPANS:
+        centre = hi - 3 * 86400 if span < WEEK_SEC else (lo + hi) / 2
+        home = (centre - span / 2, centre + span / 2)
+        step = {"sign": 1}
+
+        def pan():
+            a, b = graph.view
+            shift = step["sign"] * 0.1 * (b - a)
+            step["sign"] = -step["sign"]
+            graph.set_view(a + shift, b + shift)
+            graph.render(image)
+
+        def zoom():
+            a, b = graph.view
+            ratio = 0.8 if step["sign"] > 0 else 1 / 0.8
+            step["sign"] = -step["sign"]
+            mid = (a + b) / 2
+            graph.set_view(mid - (mid - a) * ratio, mid + (b - mid) * ratio)
+            graph.render(image)
+
+        graph.set_view(*home)
+        graph.render(image)
+        case = {"level": graph.level.name if graph.level else None}
+        graph.set_view(*home)
+        case["pan"] = measure(pan, repeat=repeat)
+        graph.set_view(*home)
+        case["zoom"] = measure(zoom, repeat=repeat)
+        case["within_budget"] = max(case["pan"]["p95_ms"], case["zoom"]["p95_ms"]) <= FRAME_BUDGET_MS
+        results[label] = case
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time range explorer benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    app = QApplication.instance() or QApplication([])
+    write_results(args.out, run(args.repeat), {
+        "benchmark": "explorer", "size": [WIDTH, HEIGHT], "frame_budget_ms": round(FRAME_BUDGET_MS, 2)
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
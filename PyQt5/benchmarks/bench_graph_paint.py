@@ -0,0 +1,166 @@
+""" LineGraph paint benchmark: per-segment drawLine vs cached chrome + polylines.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_graph_paint --out graph_paint.json
+
+Two series (a smooth CPU-like one and a noisy network-like one) of 50
+(the live window) up to 1M points each are rendered offscreen into a
+QImage at the size GraphsWindow uses. Reported per size:
+  legacy          the previous paintEvent: chrome redrawn every paint,
+                  one drawLine per segment, every point (up to 20k)
+  repaint         paint with nothing changed (chrome and the M4
+                  reduction from the cache)
+  update_repaint  update_data() with every series replaced, then paint
+  append_repaint  append_points() with one new sample per series, then
+                  paint (the steady refresh case: reduced again)
+  reduce          utils.downsample.m4 over one series, on its own
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QImage
+from PyQt5.QtCore import Qt
+
+from benchmarks.harness import measure, write_results, compare
+
+SIZES = (50, 1000, 5000, 20000, 100000, 1000000)
+LEGACY_MAX = 20000
+WIDTH, HEIGHT = 560, 300
+
+
+class LegacyLineGraph(QWidget):
+    """ LineGraph.paintEvent as it was before the rendering engine. """
+
+    def __init__(self, title, datasets, y_label="", y_max=None):
+        super().__init__()
+        self.title = title
+        self.datasets = datasets
+        self.y_label = y_label
+        self.fixed_y_max = y_max
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        width = self.width()
+        height = self.height()
+        margin_left = 60
+        margin_right = 20
+        margin_top = 50
+        margin_bottom = 30
+        painter.setPen(QColor("#ffffff"))
+        painter.setFont(QFont("Segoe UI", 12, QFont.Bold))
+        painter.drawText(margin_left, 30, self.title)
+
+        all_values = []
+        for ds in self.datasets:
+            all_values.extend(ds['data'])
+        if not all_values:
+            painter.drawText(self.rect(), Qt.AlignCenter, "No Data")
+            return
+        max_val = max(all_values) if not self.fixed_y_max else self.fixed_y_max
+        if max_val == 0: max_val = 1
+
+        painter.setPen(QPen(QColor("#555555"), 2))
+        painter.drawLine(margin_left, margin_top, margin_left, height - margin_bottom)
+        painter.drawLine(margin_left, height - margin_bottom, width - margin_right, height - margin_bottom)
+
+        painter.setFont(QFont("Segoe UI", 8))
+        steps = 5
+        for i in range(steps + 1):
+            y_ratio = i / steps
+            y = (height - margin_bottom) - (y_ratio * (height - margin_top - margin_bottom))
+            val = y_ratio * max_val
+            painter.setPen(QColor("#444444"))
+            painter.drawLine(margin_left, int(y), width - margin_right, int(y))
+            painter.setPen(QColor("#aaaaaa"))
+            painter.drawText(5, int(y) + 5, f"{val:.1f}{self.y_label}")
+
+        graph_width = width - margin_left - margin_right
+        graph_height = height - margin_top - margin_bottom
+        for ds in self.datasets:
+            data = ds['data']
+            if len(data) < 2: continue
+            step_x = graph_width / (len(data) - 1)
+            painter.setPen(QPen(QColor(ds['color']), 2))
+            points = []
+            for i, val in enumerate(data):
+                x = margin_left + i * step_x
+                y = (height - margin_bottom) - (max(0, val) / max_val * graph_height)
+                points.append((x, y))
+            for i in range(len(points) - 1):
+                painter.drawLine(int(points[i][0]), int(points[i][1]), int(points[i+1][0]), int(points[i+1][1]))
+
+
+def make_datasets(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cpu = np.clip(30 + np.cumsum(rng.normal(0, 2, n)), 0, 100)
+    net = np.abs(rng.normal(200, 80, n))
+    return [
+        {'label': 'Usage', 'data': cpu.tolist(), 'color': '#1a73e8'},
+        {'label': 'Recv', 'data': net.tolist(), 'color': '#188038'},
+    ]
+
+
+def run_size(n, repeat):
+    from pages.graphs import LineGraph
+    from utils.downsample import m4
+
+    datasets = make_datasets(n)
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+
+    legacy = LegacyLineGraph("Bench", datasets)
+    legacy.resize(WIDTH, HEIGHT)
+    graph = LineGraph("Bench", datasets, max_points=None)
+    graph.resize(WIDTH, HEIGHT)
+    # A fixed scale keeps the chrome cached, as on the CPU graphs
+    graph.fixed_y_max = legacy.fixed_y_max = 400
+
+    def append_repaint():
+        graph.append_points([[50.0], [120.0]])
+        graph.render(image)
+
+    def update_repaint():
+        graph.update_data(datasets)
+        graph.render(image)
+
+    x = np.arange(n, dtype=np.float64)
+    y = np.asarray(datasets[1]['data'])
+    buckets = WIDTH - graph.MARGIN_LEFT - graph.MARGIN_RIGHT
+
+    results = {}
+    if n <= LEGACY_MAX:
+        results["legacy"] = measure(lambda: legacy.render(image), repeat=repeat)
+    results.update({
+        "repaint": measure(lambda: graph.render(image), repeat=repeat),
+        "update_repaint": measure(update_repaint, repeat=repeat),
+        "append_repaint": measure(append_repaint, repeat=repeat),
+        "reduce": measure(lambda: m4(x, y, buckets), repeat=repeat),
+    })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LineGraph paint benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    app = QApplication.instance() or QApplication([])
+    results = {f"points_{n}": run_size(n, args.repeat) for n in SIZES}
+    write_results(args.out, results, {"benchmark": "graph_paint", "size": [WIDTH, HEIGHT]})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
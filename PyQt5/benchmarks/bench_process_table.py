@@ -0,0 +1,148 @@
+""" Process table benchmark: QTableWidget rebuild vs the diffing model.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_process_table --out process_table.json
+
+A process list of 40 rows (what the sampler keeps: top 20 by CPU and by
+memory), 1k and 5k rows is refreshed the way the collector changes it:
+every tick a third of the processes move their CPU or memory figure and
+1% exit and are replaced by new PIDs. The table is shown offscreen at the
+size GraphsWindow gives it, sorted by CPU. Reported per size:
+  legacy      the previous update_table: setRowCount and a new
+              QTableWidgetItem per cell, then paint
+  refresh     ProcessTable.update_table with the tick's changes, then
+              paint (diffed by PID, sorted by the model)
+  unchanged   update_table with the same list again, then paint
+  filtered    the same tick with a name filter typed in
+plus whether p95 of a refresh stays within one 60 Hz frame.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QHeaderView
+
+from benchmarks.harness import measure, write_results, compare
+
+SIZES = (40, 1000, 5000)
+WIDTH, HEIGHT = 1140, 320
+FRAME_BUDGET_MS = 1000 / 60
+NAMES = ("chrome", "python", "code", "systemd", "postgres", "java", "node", "bash")
+
+
+class LegacyProcessTable(QTableWidget):
+    """ ProcessTable as it was before the model / view table. """
+
+    def __init__(self, processes):
+        super().__init__()
+        self.setColumnCount(4)
+        self.setHorizontalHeaderLabels(["PID", "Name", "CPU %", "Mem %"])
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.update_table(processes)
+
+    def update_table(self, processes):
+        self.setRowCount(len(processes))
+        for r, proc in enumerate(processes):
+            self.setItem(r, 0, QTableWidgetItem(str(proc.get('pid', ''))))
+            self.setItem(r, 1, QTableWidgetItem(str(proc.get('name', ''))))
+            self.setItem(r, 2, QTableWidgetItem(f"{proc.get('cpu_percent_norm', 0):.1f}"))
+            self.setItem(r, 3, QTableWidgetItem(f"{proc.get('memory_percent', 0):.1f}"))
+
+
+class Ticks:
+    """ Successive process lists, each a plausible tick after the last. """
+
+    def __init__(self, n, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.pids = np.arange(1000, 1000 + n)
+        self.cpu = self.rng.exponential(2.0, n)
+        self.mem = self.rng.exponential(1.0, n)
+        self.next_pid = 1000 + n
+
+    def __call__(self):
+        rng, n = self.rng, len(self.pids)
+        moved = rng.random(n) < 1 / 3
+        self.cpu[moved] = rng.exponential(2.0, moved.sum())
+        self.mem[moved] = np.abs(self.mem[moved] + rng.normal(0, 0.2, moved.sum()))
+        exited = rng.random(n) < 0.01
+        self.pids[exited] = np.arange(self.next_pid, self.next_pid + exited.sum())
+        self.next_pid += int(exited.sum())
+        return self.current()
+
+    def current(self):
+        return [
+            {"pid": int(pid), "name": NAMES[pid % len(NAMES)],
+             "cpu_percent_raw": round(cpu * 8, 2), "cpu_percent_norm": round(cpu, 2),
+             "memory_percent": round(mem, 2)}
+            for pid, cpu, mem in zip(self.pids.tolist(), self.cpu.tolist(), self.mem.tolist())
+        ]
+
+
+def run_size(n, repeat):
+    from pages.graphs import ProcessTable
+
+    ticks = Ticks(n)
+    legacy = LegacyProcessTable([])
+    table = ProcessTable([])
+    for widget in (legacy, table):
+        widget.resize(WIDTH, HEIGHT)
+        widget.show()
+    app = QApplication.instance()
+
+    def paint(widget):
+        widget.viewport().repaint()
+        app.processEvents()
+
+    # The next process list is built untimed, before each call
+    tick = {}
+
+    def next_tick():
+        tick["processes"] = ticks()
+
+    def legacy_refresh():
+        legacy.update_table(tick["processes"])
+        paint(legacy)
+
+    def refresh():
+        table.update_table(tick["processes"])
+        paint(table)
+
+    results = {"legacy": measure(legacy_refresh, repeat=repeat, setup=next_tick)}
+    next_tick()
+    table.update_table(tick["processes"])
+    results["refresh"] = measure(refresh, repeat=repeat, setup=next_tick)
+    results["unchanged"] = measure(refresh, repeat=repeat)
+    table.set_filter("py")
+    results["filtered"] = measure(refresh, repeat=repeat, setup=next_tick)
+    table.set_filter("")
+    results["within_budget"] = results["refresh"]["p95_ms"] <= FRAME_BUDGET_MS
+    legacy.close()
+    table.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process table benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    app = QApplication.instance() or QApplication([])
+    results = {f"rows_{n}": run_size(n, args.repeat) for n in SIZES}
+    write_results(args.out, results, {
+        "benchmark": "process_table", "size": [WIDTH, HEIGHT], "frame_budget_ms": round(FRAME_BUDGET_MS, 2)
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
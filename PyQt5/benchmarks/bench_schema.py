@@ -0,0 +1,125 @@
+""" History schema v3 (row objects) vs v4 (columnar) benchmark.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_schema --out schema.json
+
+For histories 1x and 10x the retained window it reports, per schema:
+  payload   raw and gzip size of the JSON document, json.loads time,
+            loads + expand to the v3 view, loads + one metric column
+            (what the graphs need)
+  journal   size of a compacted segment, a cold JournalReader.refresh()
+            over it, and a cold HistoryReader read of everything the graphs
+            window draws (CPU and network series, explorer levels, the
+            newest sample's processes): what GraphsWindow.load_data pays
+            on first read
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.bench_collector import make_history
+from benchmarks.harness import measure, write_results, compare
+from utils.columnar import to_v3, to_v4, column
+from utils.history_reader import HistoryReader
+from utils.journal import JournalReader, _segment_name
+
+SIZES = (1, 10)
+
+
+def _payload_results(history, repeat):
+    v3_text = json.dumps(history, separators=(",", ":"))
+    v4 = to_v4(history)
+    v4_text = json.dumps(v4, separators=(",", ":"))
+    assert to_v3(json.loads(v4_text))["data"] == history["data"]
+
+    def v3_column():
+        doc = json.loads(v3_text)
+        return [s["cpu"]["usage"] for s in doc["data"]["recent_samples"]]
+
+    def v4_column():
+        doc = json.loads(v4_text)
+        return column(doc["data"]["recent_samples"], doc["strings"], "cpu", "usage")
+
+    results = {}
+    for name, text, expand, col in (
+        ("v3", v3_text, lambda: json.loads(v3_text), v3_column),
+        ("v4", v4_text, lambda: to_v3(json.loads(v4_text)), v4_column),
+    ):
+        results[name] = {
+            "bytes": len(text),
+            "gzip_bytes": len(gzip.compress(text.encode("utf-8"))),
+            "loads": measure(lambda: json.loads(text), repeat=repeat),
+            "loads_expand": measure(expand, repeat=repeat),
+            "loads_column": measure(col, repeat=repeat),
+        }
+    results["v4"]["encode"] = measure(lambda: to_v4(history), repeat=repeat)
+    return results
+
+
+def _graph_read(directory):
+    reader = HistoryReader(directory)
+    reader.refresh()
+    return (reader.cpu_series(), reader.network_counters(), reader.time_levels(),
+            reader.top_processes(None), reader.latest_memory())
+
+
+def _journal_results(history, repeat):
+    """ A compacted segment written both ways, then read cold. """
+    data = history["data"]
+    header = {"t": "h", "v": {"schema_version": "3.0", "machine": history["machine"]}}
+    v3_lines = [header]
+    v3_lines += [{"t": "s", "v": s} for s in data["recent_samples"]]
+    v3_lines += [{"t": "a", "v": a} for a in data["aggregates"]]
+    v4 = to_v4(history)
+    v4_lines = [dict(header, v={"schema_version": "4.0", "machine": history["machine"]}),
+                {"t": "c", "v": {"strings": v4["strings"], "data": v4["data"]}}]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, lines in (("v3", v3_lines), ("v4", v4_lines)):
+            directory = os.path.join(tmp, name)
+            os.makedirs(directory)
+            path = os.path.join(directory, _segment_name(1))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(json.dumps(r, separators=(",", ":")) for r in lines) + "\n")
+            results[name] = {
+                "bytes": os.path.getsize(path),
+                "refresh": measure(lambda: JournalReader(directory).refresh(), repeat=repeat),
+                "graph_read": measure(lambda: _graph_read(directory), repeat=repeat),
+            }
+        v3_read, v4_read = (_graph_read(os.path.join(tmp, name)) for name in ("v3", "v4"))
+        assert v3_read[:2] == v4_read[:2] and v3_read[3:] == v4_read[3:]
+    return results
+
+
+def run(repeat):
+    results = {}
+    for scale in SIZES:
+        history = make_history(120 * scale, 50 * scale, scenario="medium")
+        results[f"{scale}x"] = {
+            "payload": _payload_results(history, repeat),
+            "journal": _journal_results(history, repeat),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="History schema v3 vs v4 benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    write_results(args.out, run(args.repeat), {"benchmark": "schema"})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
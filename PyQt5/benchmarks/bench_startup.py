@@ -0,0 +1,96 @@
+""" Cold start benchmark: app.py launch to first painted window.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_startup --out startup.json
+
+Each run starts `app.py --startup-trace-exit` in a fresh process with a
+temporary HOME and the offscreen Qt platform. The app exits as soon as its
+first window is painted, after writing its startup trace
+(utils/startup_trace.py). "login" starts without a saved token,
+"dashboard" with one. Reported per case:
+  first_paint   from the start of main() to the first paint (app trace)
+  launch        wall time from spawning the process until it exits,
+                interpreter start-up included
+plus the import time and module count of the last run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import write_results, compare
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TRACE = os.path.join(".ai_device_monitor", "data", "startup_trace.json")
+
+
+def _summary(times):
+    times = sorted(times)
+    return {
+        "calls": len(times),
+        "mean_ms": round(statistics.fmean(times), 2),
+        "p50_ms": round(times[len(times) // 2], 2),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 2),
+        "max_ms": round(times[-1], 2),
+    }
+
+
+def _launch(home):
+    env = dict(os.environ, HOME=home, USERPROFILE=home, QT_QPA_PLATFORM="offscreen")
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, APP, "--startup-trace-exit"],
+        cwd=os.path.dirname(APP), env=env, timeout=120,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+    )
+    launch_ms = (time.perf_counter() - t0) * 1000
+    with open(os.path.join(home, TRACE)) as f:
+        return json.load(f), launch_ms
+
+
+def run_case(logged_in, repeat):
+    first_paint, launch, last = [], [], None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as home:
+            if logged_in:
+                data = os.path.join(home, ".ai_device_monitor", "data")
+                os.makedirs(data)
+                with open(os.path.join(data, "token.json"), "w") as f:
+                    json.dump({"profile": {"name": "Bench", "email": "bench@example.com"}}, f)
+            last, launch_ms = _launch(home)
+        first_paint.append(last["first_paint_ms"])
+        launch.append(launch_ms)
+    return {
+        "first_paint": _summary(first_paint),
+        "launch": _summary(launch),
+        "import_ms": last["import_ms"],
+        "modules_imported": last["modules_imported"],
+        "top_imports": last["top_imports"][:5],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="App cold start benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    results = {
+        "login": run_case(False, args.repeat),
+        "dashboard": run_case(True, args.repeat),
+    }
+    write_results(args.out, results, {"benchmark": "startup"})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
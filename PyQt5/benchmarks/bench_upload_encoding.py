@@ -0,0 +1,111 @@
+""" Analysis upload encoding benchmark: one-shot vs streaming.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_upload_encoding --out encode.json
+
+"legacy" is the previous get_cloud_analysis() body construction
+(json.dumps -> encode -> gzip.compress); "stream_lN" is
+utils.stream_encode.iter_gzip_json at gzip level N. Peak RSS is measured
+in a fresh child process per case, since the high-water mark never drops.
+"""
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_collector import make_history
+from benchmarks.harness import measure, rss_bytes, write_results, compare
+from utils.stream_encode import iter_gzip_json
+
+# history multiplier -> (samples, aggregates); 1x is today's retained window
+SIZES = {"1x": (120, 50), "10x": (1200, 500), "50x": (6000, 2500)}
+LEVELS = (1, 6, 9)
+
+
+def legacy(history):
+    return len(gzip.compress(json.dumps(history).encode("utf-8")))
+
+
+def streaming(history, level):
+    return sum(len(chunk) for chunk in iter_gzip_json(history, level=level))
+
+
+def _case_fn(case, history):
+    if case == "legacy":
+        return lambda: legacy(history)
+    level = int(case.split("_l")[1])
+    return lambda: streaming(history, level)
+
+
+def _scaled(history, n_samples, n_aggs):
+    data = history["data"]
+    return dict(history, data={
+        "recent_samples": data["recent_samples"][:n_samples],
+        "aggregates": data["aggregates"][:n_aggs],
+    })
+
+
+def child(case, path):
+    """ Load the history, then report how far one encode raises peak RSS. """
+    with open(path) as f:
+        history = json.load(f)
+    before = rss_bytes()
+    _case_fn(case, history)()
+    after = rss_bytes()
+    print(json.dumps({"peak_rss_bytes": (after - before) if before is not None else None}))
+
+
+def run(repeat):
+    results = {}
+    cases = ["legacy"] + [f"stream_l{lvl}" for lvl in LEVELS]
+    largest = make_history(*max(SIZES.values()))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size, (n_samples, n_aggs) in SIZES.items():
+            print(f"running {size} ...", file=sys.stderr)
+            history = _scaled(largest, n_samples, n_aggs)
+            path = os.path.join(tmp, f"{size}.json")
+            with open(path, "w") as f:
+                json.dump(history, f)
+            raw_bytes = os.path.getsize(path)
+            results[size] = {"raw_bytes": raw_bytes}
+            for case in cases:
+                fn = _case_fn(case, history)
+                r = measure(fn, repeat=repeat, warmup=1)
+                r["bytes"] = fn()
+                r["throughput_mb_s"] = round(raw_bytes / (r["mean_ms"] / 1000) / 1e6, 2) if r["mean_ms"] else None
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_upload_encoding", "--child", case, path],
+                    capture_output=True, text=True
+                )
+                try:
+                    r.update(json.loads(out.stdout.strip().splitlines()[-1]))
+                except (ValueError, IndexError):
+                    r["peak_rss_bytes"] = None
+                results[size][case] = r
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload encoding benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "HISTORY_JSON"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(*args.child)
+        return 0
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    write_results(args.out, run(args.repeat), {"benchmark": "upload_encoding", "sizes": SIZES})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
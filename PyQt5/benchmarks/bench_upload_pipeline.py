@@ -0,0 +1,113 @@
+""" Serial vs pipelined upload against local stand-ins.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_upload_pipeline --out pipeline.json
+
+"serial" is the previous path: analysis over requests, then one supabase
+insert. "pipelined" is utils.upload_pipeline, where the insert and the
+analysis overlap and the summary is PATCHed on afterwards. The "x3" cases
+queue three reports at once. The analysis stand-in takes --analysis-ms per
+call. Every PostgREST write takes --db-ms plus --db-ms-per-mb of body,
+as on a slow uplink, so the full-row insert costs more than the PATCH.
+"""
+import argparse
+import sys
+import time
+
+from supabase import create_client
+from postgrest.types import ReturnMethod
+
+from benchmarks.bench_collector import make_history
+from benchmarks.fake_analysis_server import FakeAnalysisServer
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.harness import write_results, compare
+from utils.analysis_client import AnalysisClient
+from utils.upload_pipeline import UploadPipeline, REPORTS_TABLE
+
+KEY = "bench-key"
+
+
+def _prepare(history):
+    report = {
+        "user_email": "bench@example.com",
+        "raw_data": history,
+        "summary": None,
+        "device_name": "bench",
+        "os": "Linux",
+        "source": "desktop_app",
+        "status": "pending"
+    }
+    return lambda: (history, dict(report))
+
+
+def serial(analysis, db, history, reports):
+    client = AnalysisClient(analysis.url)
+    supabase = create_client(db.url, KEY)
+    prepare = _prepare(history)
+    t0 = time.perf_counter()
+    for _ in range(reports):
+        analysis_input, report = prepare()
+        report["summary"] = client.analyze(analysis_input)
+        supabase.table(REPORTS_TABLE).insert(report, returning=ReturnMethod.minimal).execute()
+    elapsed = time.perf_counter() - t0
+    client.close()
+    return round(elapsed * 1000, 2)
+
+
+def pipelined(analysis, db, history, reports):
+    client = AnalysisClient(analysis.url)
+    pipeline = UploadPipeline(db.url, KEY, analysis_client=client).start()
+    prepare = _prepare(history)
+    t0 = time.perf_counter()
+    futures = [pipeline.submit(prepare)[1] for _ in range(reports)]
+    results = [f.result(timeout=120) for f in futures]
+    elapsed = time.perf_counter() - t0
+    pipeline.stop()
+    client.close()
+    stored = {r["id"]: r for r in db.rows(REPORTS_TABLE)}
+    # Every row got its summary patched on
+    assert all(stored[r["id"]]["summary"] for r in results)
+    return round(elapsed * 1000, 2)
+
+
+def run(analysis_ms, db_ms, db_ms_per_mb, repeat):
+    history = make_history(120, 50, scenario="small")
+    analysis = FakeAnalysisServer(cold_start_sec=0, service_ms=analysis_ms).start()
+    db = FakePostgrest(latency_ms=db_ms, ms_per_mb=db_ms_per_mb).start()
+    results = {}
+    try:
+        for name, fn, reports in (
+            ("serial", serial, 1), ("pipelined", pipelined, 1),
+            ("serial_x3", serial, 3), ("pipelined_x3", pipelined, 3),
+        ):
+            times = sorted(fn(analysis, db, history, reports) for _ in range(repeat))
+            results[name] = {"total_ms": times[len(times) // 2], "max_ms": times[-1]}
+    finally:
+        analysis.stop()
+        db.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload pipeline benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--analysis-ms", type=float, default=1500)
+    parser.add_argument("--db-ms", type=float, default=150)
+    parser.add_argument("--db-ms-per-mb", type=float, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    results = run(args.analysis_ms, args.db_ms, args.db_ms_per_mb, args.repeat)
+    write_results(args.out, results, {"benchmark": "upload_pipeline",
+                                      "analysis_ms": args.analysis_ms, "db_ms": args.db_ms,
+                                      "db_ms_per_mb": args.db_ms_per_mb})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+""" Upload spool benchmark / scenario check against a local PostgREST.
+
+Run from the PyQt5 directory:
+
+    python -m benchmarks.bench_upload_spool --out spool.json
+
+Reports are queued in a temporary spool and delivered with supabase-py
+to benchmarks.fake_postgrest (with --latency-ms per write). Scenarios:
+  single    one INSERT per report (the previous behaviour)
+  batched   multi-row INSERTs of up to BATCH_MAX_REPORTS
+  outage    the first writes fail or drop; time until the spool drains
+  reject    one report violates a constraint; the rest still land
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+from supabase import create_client
+from postgrest.types import ReturnMethod
+
+from benchmarks.bench_collector import make_history
+from benchmarks.fake_postgrest import FakePostgrest
+from benchmarks.harness import write_results, compare
+from utils.upload_spool import UploadSpool, SpoolFlusher, BATCH_MAX_REPORTS
+
+TABLE = "user_system_reports"
+
+
+def _report(history, i):
+    return {
+        "user_email": "bench@example.com",
+        "raw_data": history,
+        "summary": {"status": "ok"},
+        "device_name": f"bench-{i}",
+        "os": "Linux",
+        "source": "desktop_app",
+        "status": "pending"
+    }
+
+
+def _scenario(server, history, reports, batch, prepare=None, base_delay=0.05):
+    client = create_client(server.url, "bench-key")
+
+    def insert(rows):
+        client.table(TABLE).insert(rows, returning=ReturnMethod.minimal).execute()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = UploadSpool(tmp)
+        for i in range(reports):
+            spool.enqueue(_report(history, i))
+        flusher = SpoolFlusher(spool, insert, batch_reports=batch, base_delay=base_delay, max_delay=1.0)
+        before = dict(server.counts)
+        if prepare:
+            prepare()
+        t0 = time.perf_counter()
+        flusher.start()
+        while spool.pending() and time.perf_counter() - t0 < 60:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+        flusher.stop()
+        stats = flusher.stats()
+    return {
+        "total_ms": round(elapsed * 1000, 2),
+        "requests": server.counts["requests"] - before["requests"],
+        "rows_stored": server.counts["rows"] - before["rows"],
+        "failed_writes": server.counts["failed"] + server.counts["dropped"] - before["failed"] - before["dropped"],
+        "pending": stats["pending"],
+        "rejected": stats["rejected"],
+    }
+
+
+def run(reports, latency_ms):
+    history = make_history(120, 50, scenario="small")
+    server = FakePostgrest(latency_ms=latency_ms).start()
+    try:
+        results = {
+            "single": _scenario(server, history, reports, batch=1),
+            "batched": _scenario(server, history, reports, batch=BATCH_MAX_REPORTS),
+            "outage": _scenario(
+                server, history, reports, batch=BATCH_MAX_REPORTS,
+                prepare=lambda: (server.fail_next(2), server.drop_next(2))
+            ),
+        }
+        server.reject_rows(lambda row: row.get("device_name") == "bench-3")
+        results["reject"] = _scenario(server, history, reports, batch=BATCH_MAX_REPORTS)
+        server.reject_rows(None)
+    finally:
+        server.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload spool benchmark")
+    parser.add_argument("--out", default="-")
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    results = run(args.reports, args.latency_ms)
+    write_results(args.out, results, {"benchmark": "upload_spool", "latency_ms": args.latency_ms})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
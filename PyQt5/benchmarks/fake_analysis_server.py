@@ -0,0 +1,155 @@
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.local_analysis import analyze_local
+
+# =======================
+# Local stand-in for the cloud analysis service
+# =======================
+# Behaves like the Render instance as far as the client can tell:
+#   - sleeps after `idle_sleep_sec` without requests, and the first request
+#     after that (and every request arriving while it boots) waits
+#     `cold_start_sec`;
+#   - HTTP/1.1 keep-alive;
+#   - POST /analyze takes a gzip JSON body (Content-Length or chunked) and
+#     answers with the on-device engine's report;
+#   - any GET is a cheap ping.
+#
+#   server = FakeAnalysisServer(cold_start_sec=3).start()
+#   AnalysisClient(server.url) ...
+#   server.stop()
+#
+# or standalone: python -m benchmarks.fake_analysis_server --port 8765
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.owner._count("connections")
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, doc):
+        body = json.dumps(doc).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(parts)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        self.server.owner._serve()
+        self._reply(200, {"status": "ok"})
+
+    def do_POST(self):
+        owner = self.server.owner
+        body = self._read_body()
+        owner._serve()
+        if self.path != "/analyze":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            doc = json.loads(body)
+        except (OSError, ValueError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        time.sleep(owner.service_ms / 1000)
+        owner._count("analyses")
+        # Same report shape as the real service
+        self._reply(200, dict(analyze_local(doc), engine="cloud"))
+
+
+class FakeAnalysisServer:
+    def __init__(self, cold_start_sec=3.0, idle_sleep_sec=60.0, service_ms=50, port=0):
+        self.cold_start_sec = cold_start_sec
+        self.idle_sleep_sec = idle_sleep_sec
+        self.service_ms = service_ms
+        self.counts = {"connections": 0, "requests": 0, "cold_starts": 0, "analyses": 0}
+        self._lock = threading.Lock()
+        self._last_request = None
+        self._ready_at = 0.0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def sleep_now(self):
+        """ Force the next request to hit a cold start. """
+        with self._lock:
+            self._last_request = None
+            self._ready_at = 0.0
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _serve(self):
+        """ Block the calling request until the instance is awake. """
+        now = time.monotonic()
+        with self._lock:
+            self.counts["requests"] += 1
+            asleep = self._last_request is None or now - self._last_request > self.idle_sleep_sec
+            if asleep and now >= self._ready_at:
+                self._ready_at = now + self.cold_start_sec
+                self.counts["cold_starts"] += 1
+            self._last_request = now
+            wait = self._ready_at - now
+        if wait > 0:
+            time.sleep(wait)
+        with self._lock:
+            self._last_request = time.monotonic()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the analysis service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cold-start", type=float, default=30.0)
+    parser.add_argument("--idle-sleep", type=float, default=15 * 60.0)
+    args = parser.parse_args(argv)
+    server = FakeAnalysisServer(args.cold_start, args.idle_sleep, port=args.port).start()
+    print(f"Serving on {server.url} (cold start {args.cold_start}s); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
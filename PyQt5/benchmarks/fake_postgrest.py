@@ -0,0 +1,212 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+# =======================
+# Local PostgREST stand-in
+# =======================
+# Enough of Supabase's REST API (/rest/v1/<table>) for the uploader:
+# single- and multi-row POST, PATCH and GET with `col=eq.value` filters,
+# `select=a,b`, and Prefer: return=minimal|representation. Rows get an
+# auto `id`.
+#
+# Failure injection, to exercise the spool and the backoff:
+#   fail_next(n, status)   answer the next n writes with a non-JSON error
+#   drop_next(n)           close the next n connections without answering
+#   reject_rows(pred)      400 / SQLSTATE 23514 for rows matching pred
+#   latency_ms, ms_per_mb  added to every write: round trip + upload time
+#
+#   server = FakePostgrest().start()
+#   create_client(server.url, "test-key")   # supabase-py works unchanged
+#
+# or standalone: python -m benchmarks.fake_postgrest --port 54321
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, doc=None):
+        body = b"" if doc is None else json.dumps(doc).encode("utf-8")
+        self.send_response(code)
+        if doc is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        prefix = "/rest/v1/"
+        if not parts.path.startswith(prefix):
+            return None, {}
+        filters = {}
+        for col, value in parse_qsl(parts.query):
+            if col == "select" or value.startswith("eq."):
+                filters[col] = value[3:] if value.startswith("eq.") else value
+        return parts.path[len(prefix):], filters
+
+    @staticmethod
+    def _project(rows, filters):
+        cols = filters.pop("select", "*")
+        if cols == "*":
+            return rows
+        cols = cols.split(",")
+        return [{c: r.get(c) for c in cols} for r in rows]
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._body_bytes = len(raw)
+        return json.loads(raw or b"null")
+
+    def _delay(self):
+        """ Round trip plus transfer time of the request body. """
+        owner = self.server.owner
+        time.sleep((owner.latency_ms + owner.ms_per_mb * self._body_bytes / 1e6) / 1000)
+
+    def _injected(self):
+        """ Apply a pending injected failure; True if the request is done. """
+        owner = self.server.owner
+        with owner.lock:
+            if owner.drop > 0:
+                owner.drop -= 1
+                owner.counts["dropped"] += 1
+                self.close_connection = True
+                self.connection.close()
+                return True
+            if owner.fail > 0:
+                owner.fail -= 1
+                owner.counts["failed"] += 1
+                status = owner.fail_status
+            else:
+                return False
+        body = b"upstream unavailable"
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def _minimal(self):
+        return "return=minimal" in self.headers.get("Prefer", "")
+
+    def do_POST(self):
+        owner = self.server.owner
+        table, filters = self._route()
+        body = self._body()
+        if self._injected():
+            return
+        self._delay()
+        rows = body if isinstance(body, list) else [body]
+        with owner.lock:
+            owner.counts["requests"] += 1
+            if owner.rejects and any(owner.rejects(r) for r in rows):
+                owner.counts["rejected"] += 1
+                self._reply(400, {"code": "23514", "message": "new row violates check constraint",
+                                  "details": None, "hint": None})
+                return
+            stored = []
+            for row in rows:
+                owner.next_id += 1
+                stored.append(dict(row, id=owner.next_id))
+            owner.tables.setdefault(table, []).extend(stored)
+            owner.counts["inserts"] += 1
+            owner.counts["rows"] += len(stored)
+        self._reply(201, None if self._minimal() else self._project(stored, filters))
+
+    def do_PATCH(self):
+        owner = self.server.owner
+        table, filters = self._route()
+        select = {"select": filters.pop("select", "*")}
+        changes = self._body()
+        if self._injected():
+            return
+        self._delay()
+        with owner.lock:
+            owner.counts["requests"] += 1
+            owner.counts["patches"] += 1
+            matched = [r for r in owner.tables.get(table, [])
+                       if all(str(r.get(c)) == v for c, v in filters.items())]
+            for row in matched:
+                row.update(changes)
+            out = [dict(r) for r in matched]
+        self._reply(204 if self._minimal() else 200, None if self._minimal() else self._project(out, select))
+
+    def do_GET(self):
+        owner = self.server.owner
+        table, filters = self._route()
+        select = {"select": filters.pop("select", "*")}
+        with owner.lock:
+            out = [dict(r) for r in owner.tables.get(table, [])
+                   if all(str(r.get(c)) == v for c, v in filters.items())]
+        self._reply(200, self._project(out, select))
+
+
+class FakePostgrest:
+    def __init__(self, port=0, latency_ms=0, ms_per_mb=0):
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.next_id = 0
+        self.latency_ms = latency_ms
+        self.ms_per_mb = ms_per_mb
+        self.fail = 0
+        self.fail_status = 503
+        self.drop = 0
+        self.rejects = None
+        self.counts = {"requests": 0, "inserts": 0, "patches": 0, "rows": 0,
+                       "failed": 0, "dropped": 0, "rejected": 0}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def fail_next(self, n, status=503):
+        with self.lock:
+            self.fail, self.fail_status = n, status
+
+    def drop_next(self, n):
+        with self.lock:
+            self.drop = n
+
+    def reject_rows(self, predicate):
+        with self.lock:
+            self.rejects = predicate
+
+    def rows(self, table):
+        with self.lock:
+            return [dict(r) for r in self.tables.get(table, [])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in")
+    parser.add_argument("--port", type=int, default=54321)
+    args = parser.parse_args(argv)
+    server = FakePostgrest(port=args.port).start()
+    print(f"Serving on {server.url}/rest/v1/ ; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import contextlib
+import random
+from collections import namedtuple
+
+# =======================
+# Deterministic psutil stand-in
+# =======================
+# Implements the subset of psutil the collector uses. Values come from a
+# seeded RNG and a tick counter, so two runs with the same configuration
+# see exactly the same machine. Install it before importing the collector:
+#
+#   import sys
+#   from benchmarks import fake_psutil
+#   sys.modules["psutil"] = fake_psutil
+#   fake_psutil.configure(processes=1000, sensors=8, nics=4)
+
+__version__ = "fake"
+
+
+class Error(Exception):
+    pass
+
+
+class NoSuchProcess(Error):
+    def __init__(self, pid=None, name=None, msg=None):
+        super().__init__(msg or f"process no longer exists (pid={pid})")
+        self.pid = pid
+
+
+class ZombieProcess(NoSuchProcess):
+    pass
+
+
+class AccessDenied(Error):
+    def __init__(self, pid=None, name=None, msg=None):
+        super().__init__(msg or f"access denied (pid={pid})")
+        self.pid = pid
+
+
+svmem = namedtuple("svmem", "total available percent used free")
+sswap = namedtuple("sswap", "total used free percent sin sout")
+sdiskusage = namedtuple("sdiskusage", "total used free percent")
+snetio = namedtuple("snetio", "bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout")
+scpufreq = namedtuple("scpufreq", "current min max")
+shwtemp = namedtuple("shwtemp", "label current high critical")
+
+_GB = 1024 ** 3
+_NAMES = ["python", "chrome", "code", "systemd", "sshd", "postgres", "nginx", "java", "node", "bash"]
+
+
+class _Machine:
+    def __init__(self, processes=10, sensors=2, nics=1, cores=8, churn=0.01, seed=1234):
+        self.rng = random.Random(seed)
+        self.cores = cores
+        self.churn = churn
+        self.tick = 0
+        self.next_pid = 1000
+        self.procs = {}
+        for _ in range(processes):
+            self._spawn()
+        self.sensors = {
+            f"sensor{i}": [(f"core{j}", 40.0 + i + j) for j in range(4)]
+            for i in range(sensors)
+        }
+        self.nics = [[0, 0] for _ in range(nics)]
+
+    def _spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        self.procs[pid] = {
+            "name": _NAMES[pid % len(_NAMES)],
+            "cpu_base": self.rng.random() * 50,
+            "mem": self.rng.random() * 2,
+        }
+
+    def advance(self):
+        """ One 'tick': some processes exit, as many new ones start. """
+        self.tick += 1
+        n = int(len(self.procs) * self.churn)
+        for pid in self.rng.sample(sorted(self.procs), n):
+            del self.procs[pid]
+        for _ in range(n):
+            self._spawn()
+        for nic in self.nics:
+            nic[0] += self.rng.randint(1_000, 500_000)
+            nic[1] += self.rng.randint(1_000, 2_000_000)
+
+
+_machine = _Machine()
+
+
+def configure(**kwargs):
+    """ Replace the simulated machine (processes, sensors, nics, cores, churn, seed). """
+    global _machine
+    _machine = _Machine(**kwargs)
+    return _machine
+
+
+def advance():
+    _machine.advance()
+
+
+# ---- system-wide ----
+def cpu_count(logical=True):
+    return _machine.cores
+
+
+def cpu_percent(interval=None, percpu=False):
+    m = _machine
+    if percpu:
+        return [round((m.tick * 7 + i * 13) % 100 * 1.0, 1) for i in range(m.cores)]
+    return round((m.tick * 7) % 100 * 1.0, 1)
+
+
+def cpu_freq(percpu=False):
+    return scpufreq(2400.0 + _machine.tick % 800, 800.0, 4800.0)
+
+
+def virtual_memory():
+    pct = 40.0 + _machine.tick % 30
+    total = 32 * _GB
+    used = int(total * pct / 100)
+    return svmem(total, total - used, pct, used, total - used)
+
+
+def swap_memory():
+    return sswap(8 * _GB, _GB, 7 * _GB, 12.5, 0, 0)
+
+
+def disk_usage(path):
+    total = 512 * _GB
+    used = 300 * _GB + _machine.tick * 1024
+    return sdiskusage(total, used, total - used, round(used / total * 100, 1))
+
+
+def net_io_counters(pernic=False):
+    sent = sum(n[0] for n in _machine.nics)
+    recv = sum(n[1] for n in _machine.nics)
+    return snetio(sent, recv, 0, 0, 0, 0, 0, 0)
+
+
+def sensors_temperatures(fahrenheit=False):
+    t = _machine.tick % 10
+    return {
+        name: [shwtemp(label, base + t, 90.0, 100.0) for label, base in entries]
+        for name, entries in _machine.sensors.items()
+    }
+
+
+def boot_time():
+    return 1_700_000_000.0
+
+
+def pids():
+    return list(_machine.procs)
+
+
+# ---- processes ----
+class Process:
+    def __init__(self, pid=None):
+        if pid not in _machine.procs:
+            raise NoSuchProcess(pid)
+        self.pid = pid
+        self._info = _machine.procs[pid]
+
+    def _check(self):
+        if _machine.procs.get(self.pid) is not self._info:
+            raise NoSuchProcess(self.pid)
+
+    @contextlib.contextmanager
+    def oneshot(self):
+        yield
+
+    def name(self):
+        self._check()
+        return self._info["name"]
+
+    def cpu_percent(self, interval=None):
+        self._check()
+        return round((self._info["cpu_base"] + _machine.tick * 3) % 100, 1)
+
+    def memory_percent(self, memtype="rss"):
+        self._check()
+        return self._info["mem"]
+
+    def is_running(self):
+        return _machine.procs.get(self.pid) is self._info
+
+
+def process_iter(attrs=None, ad_value=None):
+    for pid in list(_machine.procs):
+        try:
+            p = Process(pid)
+        except NoSuchProcess:
+            continue
+        if attrs:
+            p.info = {
+                "pid": pid,
+                "name": p.name(),
+                "cpu_percent": p.cpu_percent(),
+                "memory_percent": p.memory_percent(),
+            }
+        yield p
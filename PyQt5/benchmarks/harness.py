@@ -0,0 +1,154 @@
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# =======================
+# Benchmark Harness
+# =======================
+# Shared by every benchmarks/bench_*.py script: timing + allocation
+# measurement, RSS, machine-readable results and run-to-run comparison.
+
+try:
+    import resource
+except ImportError:          # Windows
+    resource = None
+
+
+def rss_bytes(proc=None):
+    """ Current RSS if a psutil.Process is given, else peak RSS. """
+    if proc is not None:
+        return proc.memory_info().rss
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def measure(fn, repeat=20, warmup=2, setup=None):
+    """ Latency percentiles over `repeat` calls plus the allocations of one
+        call (tracemalloc is off while timing so it doesn't skew latency).
+        setup(), if given, runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter_ns()
+        fn()
+        times.append((time.perf_counter_ns() - t0) / 1e6)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot()
+    fn()
+    snap1 = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = snap1.compare_to(snap0, "filename")
+
+    times.sort()
+    return {
+        "calls": repeat,
+        "mean_ms": round(statistics.fmean(times), 4),
+        "p50_ms": round(times[len(times) // 2], 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "max_ms": round(times[-1], 4),
+        "alloc_peak_bytes": peak,
+        "alloc_blocks": sum(s.count_diff for s in stats if s.count_diff > 0),
+    }
+
+
+def metadata(extra=None):
+    meta = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    meta.update(extra or {})
+    return meta
+
+
+def write_results(path, results, meta=None):
+    doc = {"meta": metadata(meta), "results": results}
+    if path in (None, "-"):
+        print(json.dumps(doc, indent=2))
+        return doc
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(doc, f, indent=2)
+    os.replace(tmp, path)
+    print(f"Results written to {path}")
+    return doc
+
+
+# =======================
+# Regression comparison
+# =======================
+COMPARE_KEYS = ("mean_ms", "p95_ms", "total_ms", "alloc_peak_bytes", "rss_bytes", "bytes", "peak_rss_bytes")
+# Differences below these are timer / allocator noise, never regressions
+NOISE_FLOOR = {"mean_ms": 0.01, "p95_ms": 0.02}
+DEFAULT_NOISE_BYTES = 4096
+
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and key in COMPARE_KEYS:
+            yield name, value
+
+
+def compare(base_path, new_path, threshold=0.10):
+    """ Print per-metric deltas; returns the number of regressions
+        (lower is better for every compared metric).
+    """
+    with open(base_path) as f:
+        base = dict(_flatten(json.load(f)["results"]))
+    with open(new_path) as f:
+        new = dict(_flatten(json.load(f)["results"]))
+
+    regressions = 0
+    print(f"{'metric':70} {'base':>14} {'new':>14} {'delta':>8}")
+    for name in sorted(base.keys() & new.keys()):
+        b, n = base[name], new[name]
+        delta = (n - b) / b if b else 0.0
+        flag = ""
+        floor = NOISE_FLOOR.get(name.rsplit("/", 1)[-1], DEFAULT_NOISE_BYTES)
+        if abs(n - b) < floor:
+            pass
+        elif delta > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif delta < -threshold:
+            flag = "  improved"
+        print(f"{name:70} {b:>14.4f} {n:>14.4f} {delta:>+8.1%}{flag}")
+    for name in sorted(base.keys() - new.keys()):
+        print(f"{name:70} (missing in new run)")
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main_compare(argv):
+    """ python -m benchmarks.harness base.json new.json [threshold] """
+    if len(argv) < 2:
+        print("usage: python -m benchmarks.harness BASE.json NEW.json [threshold]")
+        return 2
+    threshold = float(argv[2]) if len(argv) > 2 else 0.10
+    return 1 if compare(argv[0], argv[1], threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_compare(sys.argv[1:]))
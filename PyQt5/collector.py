@@ -0,0 +1,14 @@
+import sys
+
+# Standalone collector entry point (no GUI imports):
+#   python collector.py [run|start|stop|status]
+# See utils/collector_daemon.py.
+
+
+def main():
+    from utils.collector_daemon import main as daemon_main
+    sys.exit(daemon_main(sys.argv[1:]))
+
+
+if __name__ == "__main__":
+    main()
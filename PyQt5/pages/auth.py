@@ -13,9 +13,6 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QColor, QIcon
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-import webbrowser
-
 from utils.constants import TOKEN_FILE 
 
 SCOPES = [
@@ -94,6 +91,11 @@ class LoginWindow(QWidget):
             return
 
         try:
+            # The OAuth stack (google-auth, requests, ...) takes a while to
+            # import, so it is only loaded once the user actually logs in
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            import webbrowser
+
             # Create flow without local server
             from utils.constants import CLIENT_SECRETS_PATH
             flow = InstalledAppFlow.from_client_secrets_file(
@@ -1,6 +1,4 @@
 import os
-import json
-import sys
 
 from PyQt5.QtWidgets import (
     QWidget,
@@ -11,7 +9,6 @@ from PyQt5.QtWidgets import (
     QApplication,
 )
 from PyQt5.QtCore import QUrl,Qt, QThread, pyqtSignal, QTimer
-import subprocess
 from utils.constants import TOKEN_FILE
 from PyQt5.QtGui import QFont, QColor, QPainter,QDesktopServices, QIcon
 
@@ -37,7 +34,7 @@ class MonitoringIndicator(QWidget):
 
 class UploadIndicator(QWidget):
     """Small centered widget that indicates an upload is in progress."""
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, warm=False):
         super().__init__(parent)
 
         self.setWindowFlags(
@@ -47,7 +44,9 @@ class UploadIndicator(QWidget):
         )
         self.setAttribute(Qt.WA_TranslucentBackground)
 
+        # A cold analysis server needs minutes to boot; a warm one doesn't
         self.label = QLabel(
+            "Uploading, Do Not Close the App, Please Wait..." if warm else
             "Uploading, Do Not Close the App, Please Wait 2-3 minutes...",
             self
         )
@@ -70,6 +69,10 @@ class UploadIndicator(QWidget):
         self.adjustSize()
 
         self.center(parent)
+    def set_text(self, text):
+        self.label.setText(text)
+        self.adjustSize()
+
     def center(self, parent=None):
         if parent:
             rect = parent.geometry()
@@ -83,20 +86,77 @@ class UploadIndicator(QWidget):
 
 
 
+UPLOAD_STAGE_TEXT = {
+    "preparing": "Preparing report...",
+    "uploading": "Uploading report and running analysis...",
+    "inserted": "Report stored, waiting for the analysis...",
+    "analyzed": "Saving the analysis...",
+}
+
+
 class UploadWorker(QThread):
-    """Run the uploader in a separate thread and emit signals on finish."""
-    success = pyqtSignal()
+    """Queue one report on the upload pipeline and relay its progress."""
+    progress = pyqtSignal(str)
+    success = pyqtSignal(bool)   # False: queued offline, sent later
     failure = pyqtSignal(str)
 
     def run(self):
+        pipeline = None
+        job = {"id": None}
+
+        def on_event(job_id, stage, detail):
+            if job_id == job["id"] and stage in UPLOAD_STAGE_TEXT:
+                self.progress.emit(UPLOAD_STAGE_TEXT[stage])
         try:
             # import inside thread to avoid blocking main thread import issues
-            from utils.uploader import upload
-            upload()
-            self.success.emit()
+            from utils.uploader import get_pipeline, submit_upload
+            pipeline = get_pipeline()
+            pipeline.add_listener(on_event)
+            job["id"], future = submit_upload()
+            result = future.result()
+            self.success.emit(not result["spooled"])
         except Exception as e:
             # send stringified exception back to UI
             self.failure.emit(str(e))
+        finally:
+            if pipeline is not None:
+                pipeline.remove_listener(on_event)
+
+
+class CollectorWorker(QThread):
+    """Start or stop the collector daemon without blocking the GUI
+    (start waits up to 5 s for it to come up, stop up to 10 s)."""
+    done = pyqtSignal(object)
+
+    def __init__(self, op):
+        super().__init__()
+        self.op = op
+
+    def run(self):
+        from utils import collector_daemon
+        try:
+            running = collector_daemon.is_running()
+            if self.op == "start":
+                # The collector resumes from the journal, marking the time
+                # it was not running as a gap
+                pid = collector_daemon.read_pid() if running else collector_daemon.start()
+                self.done.emit({"was_running": running, "pid": pid})
+            else:
+                if running:
+                    collector_daemon.stop()
+                self.done.emit({"was_running": running})
+        except Exception as e:
+            self.done.emit({"error": str(e)})
+
+
+class SpoolResumeWorker(QThread):
+    """Start the upload flusher so reports spooled while offline get sent."""
+    def run(self):
+        try:
+            from utils.uploader import get_flusher
+            get_flusher()
+        except Exception as e:
+            print(f"Upload spool not resumed: {e}")
 
 
 
@@ -104,14 +164,13 @@ class UploadWorker(QThread):
 class DashboardWindow(QWidget):
     def __init__(self, user_name: str):
         super().__init__()
-        from utils.constants import DATA_FILE
-        if os.path.exists(DATA_FILE):
-            os.remove(DATA_FILE)
+        # History persists across restarts (utils/journal.py); it is only
+        # discarded through "Reset History"
         self.user_name = user_name or "User"
-        self.monitor_process = None
+        self.attached = False
         self.indicator = None
-        # Guard to prevent concurrent start attempts
-        self._starting_monitor = False
+        # Start/stop in progress (one at a time, buttons disabled meanwhile)
+        self.collector_worker = None
 
         # icon
         from utils.constants import ICON_PATH
@@ -170,6 +229,10 @@ class DashboardWindow(QWidget):
                 background-color: #1557b0;
                 border-color: #1557b0;
             }
+            QPushButton:disabled {
+                background-color: #5f6368;
+                border-color: #5f6368;
+            }
         """)
 
         self.stop_btn = QPushButton("Stop Monitoring")
@@ -183,6 +246,10 @@ class DashboardWindow(QWidget):
                 background-color: #a50e0e;
                 border-color: #a50e0e;
             }
+            QPushButton:disabled {
+                background-color: #5f6368;
+                border-color: #5f6368;
+            }
         """)
 
         self.upload_btn = QPushButton("Upload Data")
@@ -212,6 +279,20 @@ class DashboardWindow(QWidget):
             }
         """)
 
+        self.reset_btn = QPushButton("Reset History")
+        self.reset_btn.setCursor(Qt.PointingHandCursor)
+        self.reset_btn.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                border: 2px solid #d93025;
+                color: #e0e0e0;
+            }
+            QPushButton:hover {
+                background-color: #333333;
+                border-color: #a50e0e;
+            }
+        """)
+
         self.graphs_btn = QPushButton("View Graphs")
         self.graphs_btn.setCursor(Qt.PointingHandCursor)
         self.graphs_btn.setStyleSheet("""
@@ -249,6 +330,7 @@ class DashboardWindow(QWidget):
         self.upload_btn.clicked.connect(self.handle_upload)
         self.graphs_btn.clicked.connect(self.show_graphs)
         self.logout_btn.clicked.connect(self.handle_logout)
+        self.reset_btn.clicked.connect(self.reset_history)
 
         layout.addWidget(self.hello_label)
         layout.addWidget(self.start_btn)
@@ -257,6 +339,7 @@ class DashboardWindow(QWidget):
         layout.addWidget(self.graphs_btn)
         layout.addWidget(self.site_btn) # <--- Added here
         layout.addSpacing(20)
+        layout.addWidget(self.reset_btn)
         layout.addWidget(self.logout_btn)
 
         self.setLayout(layout)
@@ -269,6 +352,24 @@ class DashboardWindow(QWidget):
 
         self._alert_shown = False  # prevent spamming
 
+        # Starting the collector and its "started" message wait until the
+        # window has been painted once (see paintEvent)
+        self._painted = False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            QTimer.singleShot(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        # Reports left in the spool by an earlier session (offline upload)
+        from utils.constants import UPLOAD_SPOOL_DIR
+        from utils.upload_spool import SUFFIX
+        if os.path.isdir(UPLOAD_SPOOL_DIR) and any(n.endswith(SUFFIX) for n in os.listdir(UPLOAD_SPOOL_DIR)):
+            self.spool_worker = SpoolResumeWorker(self)
+            self.spool_worker.start()
+
         self.start_monitoring() # auto start on login
 
     def show_graphs(self):
@@ -291,13 +392,8 @@ class DashboardWindow(QWidget):
                 )
 
         QMessageBox.information(self, "Logged Out", "You have been logged out.")
-        if self.monitor_process and self.monitor_process.poll() is None:
-            self.monitor_process.terminate()
-            self.monitor_process.wait()
-        
-        if self.indicator:
-            self.indicator.close()
-            self.indicator = None
+        # The collector keeps running; the next login attaches to it
+        self.detach_collector()
         # After logout, close dashboard and reopen login window
         from pages.auth import LoginWindow
 
@@ -306,86 +402,146 @@ class DashboardWindow(QWidget):
         self.close()
 
     def handle_upload(self):
-        # Prevent multiple simultaneous uploads
-        if getattr(self, "upload_worker", None) and self.upload_worker.isRunning():
-            QMessageBox.information(self, "Info", "Upload already in progress.")
-            return
+        # Reports are queued on the upload pipeline, which runs a few of
+        # them concurrently, so a second click doesn't have to wait
+        self.upload_workers = [w for w in getattr(self, "upload_workers", []) if w.isRunning()]
 
         # Create and show the upload indicator (centered on this dashboard)
-        self.upload_widget = UploadIndicator(parent=self)
-        self.upload_widget.show()
-
-        # Disable upload button while running
-        self.upload_btn.setEnabled(False)
+        if not self.upload_workers:
+            from utils.analysis_client import get_client
+            self.upload_widget = UploadIndicator(parent=self, warm=get_client().is_warm())
+            self.upload_widget.show()
 
         # Start worker thread to perform upload
-        self.upload_worker = UploadWorker()
-
-        def on_success():
-            self.upload_widget.close()
-            self.upload_btn.setEnabled(True)
-            QMessageBox.information(self, "Success", "Data uploaded successfully.")
+        worker = UploadWorker()
+        self.upload_workers.append(worker)
+
+        def finished():
+            self.upload_workers.remove(worker)
+            if not self.upload_workers:
+                self.upload_widget.close()
+
+        def on_progress(text):
+            pending = len(self.upload_workers)
+            self.upload_widget.set_text(text if pending == 1 else f"{pending} uploads in progress. {text}")
+
+        def on_success(delivered):
+            finished()
+            if delivered:
+                QMessageBox.information(self, "Success", "Data uploaded successfully.")
+            else:
+                QMessageBox.information(
+                    self, "Saved Offline",
+                    "The server could not be reached. Your report is saved and will be uploaded automatically."
+                )
 
         def on_failure(msg):
-            self.upload_widget.close()
-            self.upload_btn.setEnabled(True)
+            finished()
             QMessageBox.critical(self, "Upload Failed", msg)
 
-        self.upload_worker.success.connect(on_success)
-        self.upload_worker.failure.connect(on_failure)
-        self.upload_worker.start()
-    def start_monitoring(self):
-        if self.monitor_process and self.monitor_process.poll() is None:
-            QMessageBox.information(self, "Info", "Monitoring already running.")
+        worker.progress.connect(on_progress)
+        worker.success.connect(on_success)
+        worker.failure.connect(on_failure)
+        worker.start()
+
+    def attach_collector(self):
+        """ Follow the running collector: indicator on. The collector
+            itself is not owned by this window.
+        """
+        if self.attached:
             return
-        from utils.constants import DATA_FILE
-        if os.path.exists(DATA_FILE):
-            os.remove(DATA_FILE)
-        # Prevent concurrent starts
-        if getattr(self, "_starting_monitor", False):
+        self.attached = True
+        self.indicator = MonitoringIndicator()
+        self.indicator.show()
+
+    def detach_collector(self):
+        """ Stop following the collector (logout, window closed); it keeps
+            sampling in the background.
+        """
+        if not self.attached:
             return
+        self.attached = False
+        if self.indicator:
+            self.indicator.close()
+            self.indicator = None
 
-        
-
-        self._starting_monitor = True
-        try:
-            args = [sys.executable, sys.argv[0], "--child-get-info"]
-            kwargs = {
-                "stdout": subprocess.DEVNULL,
-                "stderr": subprocess.DEVNULL,
-                "close_fds": True
-            }
-            # Hide console on Windows
-            if sys.platform == "win32" and hasattr(subprocess, "CREATE_NO_WINDOW"):
-                kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
-
-            self.monitor_process = subprocess.Popen(args, **kwargs)
-
-            self.indicator = MonitoringIndicator()
-            self.indicator.show()
-
-            QMessageBox.information(self, "Started", "System monitoring started.")
-        finally:
-            self._starting_monitor = False
+    def _run_collector_op(self, op, button, busy_text, on_done):
+        """ Run a collector start/stop on CollectorWorker; both buttons stay
+            disabled until on_done(result) has been called.
+        """
+        if self.collector_worker is not None:
+            return
+        label = button.text()
+        button.setText(busy_text)
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(False)
+
+        def finished(result):
+            self.collector_worker = None
+            button.setText(label)
+            self.start_btn.setEnabled(True)
+            self.stop_btn.setEnabled(True)
+            on_done(result)
+
+        self.collector_worker = CollectorWorker(op)
+        self.collector_worker.done.connect(finished)
+        self.collector_worker.start()
 
+    def start_monitoring(self):
+        def on_done(result):
+            if "error" in result or (not result["was_running"] and result["pid"] is None):
+                QMessageBox.critical(self, "Error", "The monitoring service could not be started.")
+                return
+            if not result["was_running"]:
+                self.attach_collector()
+                QMessageBox.information(self, "Started", "System monitoring started.")
+            elif self.attached:
+                QMessageBox.information(self, "Info", "Monitoring already running.")
+            else:
+                # Left running by an earlier session: pick up where it is
+                self.attach_collector()
+
+        self._run_collector_op("start", self.start_btn, "Starting...", on_done)
 
     def stop_monitoring(self):
-        if self.monitor_process and self.monitor_process.poll() is None:
-            self.monitor_process.terminate()
-            self.monitor_process.wait()
-            self.monitor_process = None
-            
-            if self.indicator:
-                self.indicator.close()
-                self.indicator = None
-            
-            from utils.constants import DATA_FILE
-            if os.path.exists(DATA_FILE):
-                os.remove(DATA_FILE)
-            QMessageBox.information(self, "Stopped", "Monitoring stopped.")
-        else:
-            QMessageBox.information(self, "Info", "Monitoring not running.")
-    
+        def on_done(result):
+            if "error" in result:
+                QMessageBox.critical(self, "Error", f"Monitoring could not be stopped:\n{result['error']}")
+            elif result["was_running"]:
+                self.detach_collector()
+                QMessageBox.information(self, "Stopped", "Monitoring stopped. Collected history is kept.")
+            else:
+                QMessageBox.information(self, "Info", "Monitoring not running.")
+
+        self._run_collector_op("stop", self.stop_btn, "Stopping...", on_done)
+
+    def reset_history(self):
+        answer = QMessageBox.question(
+            self, "Reset History",
+            "Discard all collected monitoring history? Uploading needs about "
+            "25 minutes of new data afterwards.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if answer != QMessageBox.Yes:
+            return
+        from utils import collector_daemon
+        try:
+            if collector_daemon.is_running():
+                # The collector owns the journal while it runs
+                from utils.control_client import request
+                response = request("reset")
+                if not response.get("ok"):
+                    raise RuntimeError(response.get("error", "reset failed"))
+            else:
+                from utils.constants import JOURNAL_DIR
+                from utils.journal import clear_journal
+                clear_journal(JOURNAL_DIR)
+        except Exception as e:
+            QMessageBox.critical(self, "Reset Failed", f"History could not be reset:\n{e}")
+            return
+        self._alert_shown = False
+        QMessageBox.information(self, "Reset History", "Monitoring history has been discarded.")
+
     def check_and_show_alert(self):
         if self._alert_shown:
             return
@@ -398,46 +554,35 @@ class DashboardWindow(QWidget):
                 "Monitoring has Completed Minimum Quota, You May Upload Now"
             )
     def should_show_alert(self):
-        from utils.constants import DATA_FILE
-        if os.path.exists(DATA_FILE):
+        # Cheap path: the collector's shared-memory counters
+        if getattr(self, "_live_reader", None) is None:
             try:
-                with open(DATA_FILE, "r") as f:
-                    content = json.load(f)
-                    if isinstance(content, dict):
-                        raw = content.get("data", {}).get("aggregates", [])
-                    else:
-                        raw = []
-                    # print(len(raw))
-                    if raw:
-                        return len(raw) >= 5
-                    else:
-                        return False
-            except Exception as e:
-                print(f"Error loading: {e}")
-                return False
-        else:
+                from utils.live_ring import LiveRingReader
+                self._live_reader = LiveRingReader()
+            except ImportError:
+                self._live_reader = False
+        if self._live_reader:
+            self._live_reader.poll()
+            if self._live_reader.is_live():
+                return self._live_reader.aggregates >= 5
+
+        # Collector not running: the journal, through the shared reader
+        from utils.history_reader import get_reader
+        try:
+            history = get_reader()
+            history.refresh()
+            return history.aggregate_count() >= 5
+        except Exception as e:
+            print(f"Error loading: {e}")
             return False
 
     def closeEvent(self, event):
-        # Ensure monitoring child is terminated when dashboard closes
+        # Monitoring outlives the window: only detach from the collector
         try:
-            if self.monitor_process and self.monitor_process.poll() is None:
-                try:
-                    self.monitor_process.terminate()
-                    self.monitor_process.wait(timeout=5)
-                except Exception:
-                    pass
-                self.monitor_process = None
+            self.detach_collector()
         except Exception:
             pass
 
-        if self.indicator:
-            try:
-                self.indicator.close()
-            except Exception:
-                pass
-            self.indicator = None
-
         event.accept()
 
 
@@ -1,55 +1,267 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QLabel, QScrollArea, QHBoxLayout, 
-    QGridLayout, QTableWidget, QTableWidgetItem, QHeaderView
+    QGridLayout, QTableView, QHeaderView, QLineEdit
 )
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QBrush, QIcon
-from PyQt5.QtCore import Qt, QRectF, QTimer
-import json
-import os
-from utils.constants import DATA_FILE
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QBrush, QIcon, QPixmap, QPolygonF
+from PyQt5.QtCore import (
+    Qt, QRectF, QPointF, QTimer, QAbstractItemModel, QAbstractTableModel, QModelIndex
+)
+import math
+import time
+from operator import itemgetter
+import numpy as np
+from utils.downsample import m4
+from utils.history_reader import get_reader
+from utils.journal import MAX_RAW_SAMPLES
+from utils.time_index import pick_level
+
+# =======================
+# Line graph rendering
+# =======================
+# The static chrome (background, title, axes, grid, labels) is painted
+# once into a QPixmap and reused until the size, the y scale or the title
+# changes. Each series lives in a QPolygonF of (index, value) points in
+# data coordinates, written through a NumPy view of the polygon's own
+# memory, so neither a refresh nor an append builds Python tuples per
+# point. paintEvent maps a series to pixels into a second, reused polygon
+# (one vectorized pass, floored like the int() casts this replaced) and
+# draws it with drawPolyline.
+#
+# The polyline goes out in runs of POLYLINE_RUN segments, not in one call:
+# Qt strokes a wide, antialiased polyline as a single outline and fills
+# it, and a noisy series that keeps crossing itself made that fill 20x
+# slower (16 ms for 200 network points, 0.8 s for 5000) than drawing the
+# segments one by one. Short runs keep the fill cheap and still cut a
+# smooth series' cost 4-9x (benchmarks/bench_graph_paint.py).
+#
+# A LineGraph draws every point it is given. A series with more than four
+# points per pixel column is reduced with M4 (utils/downsample.py) before
+# it is drawn; the reduction is cached per series under (data version,
+# plot width), so a repaint with nothing new costs the same for 100 points
+# as for a million. The graphs window's CPU and network graphs only hold
+# the retained raw samples (MAX_RAW_SAMPLES, about 20 minutes), which is
+# below that threshold; hours to weeks of history are drawn by the time
+# range explorer below, which M4-reduces the span on screen.
+
+POINT_BYTES = 16        # QPointF: two doubles
+POLYLINE_RUN = 8        # segments per drawPolyline call
+
+
+class SeriesBuffer:
+    """ One series as a QPolygonF plus a writable NumPy (n, 2) view of it.
+        x is the absolute sample index, y the value clamped at 0. With a
+        capacity only the newest `capacity` points are kept. `version`
+        moves on every change.
+    """
+
+    def __init__(self, values=(), capacity=None):
+        self.capacity = capacity
+        self.total = 0              # samples ever added (x of the next one)
+        self.version = 0
+        self._pixels = None         # (QPolygonF, view) reused by to_pixels()
+        self._max = None            # (version, max y)
+        self._reduced = None        # ((version, buckets), points)
+        self.set(values)
+
+    @staticmethod
+    def _wrap(polygon):
+        ptr = polygon.data()
+        ptr.setsize(polygon.size() * POINT_BYTES)
+        return np.frombuffer(ptr, dtype=np.float64).reshape(-1, 2)
+
+    @staticmethod
+    def _alloc(size):
+        polygon = QPolygonF()
+        polygon.fill(QPointF(), size)
+        return polygon
+
+    def set(self, values):
+        ys = np.maximum(np.asarray(values, dtype=np.float64).ravel(), 0)
+        self.total = len(ys)
+        if self.capacity:
+            ys = ys[-self.capacity:]
+        self.polygon = self._alloc(len(ys))
+        self.points = self._wrap(self.polygon)
+        self.points[:, 0] = np.arange(self.total - len(ys), self.total)
+        self.points[:, 1] = ys
+        self.version += 1
+
+    def append(self, values):
+        ys = np.maximum(np.asarray(values, dtype=np.float64).ravel(), 0)
+        k = len(ys)
+        if not k:
+            return
+        n = len(self.points)
+        if self.capacity and k >= self.capacity:
+            total = self.total
+            self.set(ys)
+            self.points[:, 0] += total
+            self.total += total
+            return
+
+        grow = k if not self.capacity else min(k, self.capacity - n)
+        for _ in range(grow):
+            self.polygon.append(QPointF())
+        if grow:
+            self.points = self._wrap(self.polygon)
+        pts = self.points
+        drop = n + k - len(pts)
+        if drop:
+            # Full: slide the window in place
+            pts[:n - drop] = pts[drop:n].copy()
+        pts[-k:, 0] = np.arange(self.total, self.total + k)
+        pts[-k:, 1] = ys
+        self.total += k
+        if not drop and self._max is not None and self._max[0] == self.version:
+            self._max = (self.version + 1, max(self._max[1], float(ys.max())))
+        self.version += 1
+
+    def trim(self, keep):
+        """ Keep only the newest `keep` points: the source dropped the rest. """
+        drop = len(self.points) - max(keep, 0)
+        if drop <= 0:
+            return
+        self.polygon.remove(0, drop)
+        self.points = self._wrap(self.polygon)
+        self.version += 1
+
+    def __len__(self):
+        return len(self.points)
+
+    def first_x(self):
+        return self.points[0, 0] if len(self.points) else 0.0
+
+    def max_value(self):
+        if not len(self.points):
+            return 0.0
+        if self._max is None or self._max[0] != self.version:
+            self._max = (self.version, float(self.points[:, 1].max()))
+        return self._max[1]
+
+    def visible(self, buckets):
+        """ The points to draw across `buckets` pixel columns: all of them,
+            or their M4 reduction.
+        """
+        pts = self.points
+        if len(pts) <= 4 * buckets:
+            return pts
+        key = (self.version, buckets)
+        if self._reduced is None or self._reduced[0] != key:
+            self._reduced = (key, pts[m4(pts[:, 0], pts[:, 1], buckets)])
+        return self._reduced[1]
+
+    def to_pixels(self, x0, step_x, y0, scale_y, buckets):
+        """ visible(buckets) mapped to x0 + (x - first_x) * step_x,
+            y0 - y * scale_y. Returns (polygon, count): only the first
+            count points of the reused polygon are valid.
+        """
+        pts = self.visible(buckets)
+        count = len(pts)
+        if self._pixels is None or self._pixels[0].size() < count:
+            polygon = self._alloc(count)
+            self._pixels = (polygon, self._wrap(polygon))
+        polygon, px = self._pixels
+        px = px[:count]
+        np.multiply(pts[:, 0] - self.first_x(), step_x, out=px[:, 0])
+        px[:, 0] += x0
+        np.multiply(pts[:, 1], -scale_y, out=px[:, 1])
+        px[:, 1] += y0
+        np.floor(px, out=px)
+        return polygon, count
+
+
+def _draw_runs(painter, polygon, start, stop):
+    """ Points [start, stop) of polygon as polylines of POLYLINE_RUN
+        segments; a lone point becomes a dot.
+    """
+    if stop - start == 1:
+        painter.drawPoint(polygon.at(start))
+    for i in range(start, stop - 1, POLYLINE_RUN):
+        painter.drawPolyline(polygon.mid(i, min(POLYLINE_RUN + 1, stop - i)))
+
 
 class LineGraph(QWidget):
-    def __init__(self, title, datasets, y_label="", y_max=None):
+    MARGIN_LEFT = 60
+    MARGIN_RIGHT = 20
+    MARGIN_TOP = 50
+    MARGIN_BOTTOM = 30
+
+    def __init__(self, title, datasets, y_label="", y_max=None, max_points=None):
         super().__init__()
         self.title = title
-        self.datasets = datasets 
         self.y_label = y_label
         self.fixed_y_max = y_max
+        self.max_points = max_points
+        self._chrome = None
+        self._chrome_key = None
         self.setMinimumHeight(250)
+        self.update_data(datasets)
 
     # --- NEW METHOD ---
     def update_data(self, datasets):
+        """ Replace every series (one vectorized copy per series). """
         self.datasets = datasets
+        self.series = [SeriesBuffer(ds['data'], self.max_points) for ds in datasets]
+        self.pens = [self._pen(ds['color']) for ds in datasets]
         self.update()  # Triggers paintEvent
 
-    def paintEvent(self, event):
-        # ... (Keep your existing paintEvent logic exactly as it was) ...
-        # (For brevity, I'm assuming you keep the paint logic you pasted previously)
-        painter = QPainter(self)
+    def append_points(self, values, keep=None):
+        """ Append new samples without rebuilding the series: values holds
+            one sequence per dataset, in update_data order. keep, if given,
+            is how many points each series still has at its source; older
+            ones are trimmed off.
+        """
+        for i, (buf, new) in enumerate(zip(self.series, values)):
+            buf.append(new)
+            if keep is not None:
+                buf.trim(keep[i])
+        self.update()
+
+    @staticmethod
+    def _pen(color):
+        return QPen(QColor(color), 2)
+
+    def _max_val(self):
+        if self.fixed_y_max:
+            return self.fixed_y_max
+        max_val = max((buf.max_value() for buf in self.series), default=0)
+        return max_val or 1
+
+    def resizeEvent(self, event):
+        self._chrome = None
+        super().resizeEvent(event)
+
+    # ---- static chrome ----
+    def _chrome_pixmap(self, max_val):
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio, max_val, self.title, self.y_label)
+        if self._chrome is not None and self._chrome_key == key:
+            return self._chrome
+
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), QColor("#1e1e1e"))
-        # ... rest of your paint code ...
-        # Ensure you keep the logic that handles empty data!
+        self._paint_chrome(painter, max_val)
+        painter.end()
+        self._chrome, self._chrome_key = pixmap, key
+        return pixmap
+
+    def _paint_chrome(self, painter, max_val):
         width = self.width()
         height = self.height()
-        margin_left = 60
-        margin_right = 20
-        margin_top = 50
-        margin_bottom = 30
+        margin_left = self.MARGIN_LEFT
+        margin_right = self.MARGIN_RIGHT
+        margin_top = self.MARGIN_TOP
+        margin_bottom = self.MARGIN_BOTTOM
+        painter.fillRect(0, 0, width, height, QColor("#1e1e1e"))
         painter.setPen(QColor("#ffffff"))
         painter.setFont(QFont("Segoe UI", 12, QFont.Bold))
         painter.drawText(margin_left, 30, self.title)
-        
-        all_values = []
-        for ds in self.datasets:
-            all_values.extend(ds['data'][-50:]) 
-        
-        if not all_values:
-            painter.drawText(self.rect(), Qt.AlignCenter, "No Data")
-            return
 
-        max_val = max(all_values) if not self.fixed_y_max else self.fixed_y_max
-        if max_val == 0: max_val = 1
+        if max_val is None:
+            painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, "No Data")
+            return
 
         # Axes
         painter.setPen(QPen(QColor("#555555"), 2))
@@ -70,24 +282,211 @@ class LineGraph(QWidget):
             label = f"{val:.1f}{self.y_label}"
             painter.drawText(5, int(y) + 5, label)
 
-        # Lines
-        graph_width = width - margin_left - margin_right
-        graph_height = height - margin_top - margin_bottom
-        for ds in self.datasets:
-            data = ds['data'][-50:]
-            if len(data) < 2: continue
-            step_x = graph_width / (len(data) - 1)
-            path_color = QColor(ds['color'])
-            pen = QPen(path_color, 2)
+    # ---- paint ----
+    def paintEvent(self, event):
+        has_data = any(len(buf) for buf in self.series)
+        max_val = self._max_val() if has_data else None
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._chrome_pixmap(max_val))
+        if max_val is None:
+            return
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        graph_width = self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT
+        graph_height = self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM
+        base_y = self.height() - self.MARGIN_BOTTOM
+        for buf, pen in zip(self.series, self.pens):
+            if len(buf) < 2:
+                continue
+            # Each series spans the full width
+            step_x = graph_width / (len(buf) - 1)
             painter.setPen(pen)
-            points = []
-            for i, val in enumerate(data):
-                x = margin_left + i * step_x
-                clamped_val = max(0, val)
-                y = (height - margin_bottom) - (clamped_val / max_val * graph_height)
-                points.append((x, y))
-            for i in range(len(points) - 1):
-                painter.drawLine(int(points[i][0]), int(points[i][1]), int(points[i+1][0]), int(points[i+1][1]))
+            polygon, count = buf.to_pixels(
+                self.MARGIN_LEFT, step_x, base_y, graph_height / max_val, max(1, graph_width)
+            )
+            _draw_runs(painter, polygon, 0, count)
+
+
+# =======================
+# Time range explorer
+# =======================
+# CPU over time from HistoryReader.time_levels(). The wheel zooms around
+# the cursor, dragging pans and a double click shows everything. Each
+# paint picks the finest level that fits the visible span (raw samples,
+# 5 minute aggregates, then the rollup tiers), finds the visible points
+# with two binary searches and M4-reduces them if there are still more
+# than four per pixel, so a pan or zoom costs about the same with an hour
+# or a year loaded. While the right edge of the view is at the newest
+# point, the view follows new data.
+
+MIN_SPAN_SEC = 120
+ZOOM_STEP = 0.8         # span factor per wheel notch
+GAP_FACTOR = 3          # points more than this many intervals apart are not joined
+MAX_TIME_LABELS = 6
+TIME_STEPS = (
+    60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600,
+    86400, 2 * 86400, 7 * 86400, 30 * 86400,
+)
+LEVEL_LABELS = {"raw": "samples", "5m": "5 min avg / max", "1h": "hourly avg / max", "1d": "daily avg / max"}
+
+
+class TimeRangeGraph(LineGraph):
+    MARGIN_BOTTOM = 45      # room for the time labels
+    SERIES = (("avg", "#1a73e8"), ("max", "#d93025"))
+
+    def __init__(self, title):
+        self.base_title = title
+        self.levels = []
+        self.level = None
+        self.view = None            # (t0, t1), wall-clock seconds (utils.time_index)
+        self.extent = None
+        self.follow = True
+        self._drag = None
+        self._buffers = {}
+        super().__init__(title, [], y_max=100)
+        self.series_pens = {key: self._pen(color) for key, color in self.SERIES}
+        self.axis_font = QFont("Segoe UI", 8)
+        self.setCursor(Qt.OpenHandCursor)
+
+    def set_levels(self, levels):
+        if levels is self.levels:
+            return
+        self.levels = levels
+        if not levels:
+            self.view = self.extent = None
+            self.update()
+            return
+        lo = min(level.first() for level in levels)
+        hi = max(level.last() for level in levels)
+        self.extent = (lo, hi)
+        if self.view is None:
+            self.set_view(lo, hi)
+        elif self.follow:
+            span = self.view[1] - self.view[0]
+            self.set_view(hi - span, hi)
+        else:
+            self.set_view(*self.view)
+
+    def set_view(self, t0, t1):
+        """ Show [t0, t1], clamped to the data and to MIN_SPAN_SEC. """
+        lo, hi = self.extent
+        span = min(max(t1 - t0, MIN_SPAN_SEC), max(hi - lo, MIN_SPAN_SEC))
+        t0 = min(max(t0, lo), hi - span)
+        self.view = (t0, t0 + span)
+        self.follow = t0 + span >= hi
+        self.update()
+
+    def _plot_width(self):
+        return max(1, self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT)
+
+    # ---- interaction ----
+    def wheelEvent(self, event):
+        notches = event.angleDelta().y() / 120
+        if self.view is None or not notches:
+            return
+        t0, t1 = self.view
+        width = self._plot_width()
+        x = min(max(event.pos().x() - self.MARGIN_LEFT, 0), width)
+        anchor = t0 + (t1 - t0) * x / width
+        ratio = ZOOM_STEP ** notches
+        self.set_view(anchor - (anchor - t0) * ratio, anchor + (t1 - anchor) * ratio)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.view is not None:
+            self._drag = (event.x(), self.view)
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag is None:
+            return
+        x0, (t0, t1) = self._drag
+        dt = (x0 - event.x()) * (t1 - t0) / self._plot_width()
+        self.set_view(t0 + dt, t1 + dt)
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+        self.setCursor(Qt.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event):
+        if self.extent is not None:
+            self.set_view(*self.extent)
+
+    # ---- paint ----
+    def _buffer(self, key, n):
+        held = self._buffers.get(key)
+        if held is None or held[0].size() < n:
+            polygon = SeriesBuffer._alloc(n)
+            held = self._buffers[key] = (polygon, SeriesBuffer._wrap(polygon))
+        return held
+
+    def paintEvent(self, event):
+        level = None
+        if self.view is not None:
+            level = pick_level(self.levels, self.view[0], self.view[1], self._plot_width())
+        if level is not self.level:
+            self.level = level
+            self.title = self.base_title
+            if level is not None:
+                self.title = f"{self.base_title} - {LEVEL_LABELS.get(level.name, level.name)}"
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._chrome_pixmap(None if self.view is None else self.fixed_y_max))
+        if self.view is None:
+            return
+        t0, t1 = self.view
+        width = self._plot_width()
+        height = self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM
+        base_y = self.height() - self.MARGIN_BOTTOM
+        self._paint_time_axis(painter, t0, t1, width, base_y)
+        if level is None:
+            return
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setClipRect(QRectF(self.MARGIN_LEFT, self.MARGIN_TOP - 2, width, height + 4))
+        i0, i1 = level.bounds(t0, t1)
+        ts = level.ts[i0:i1]
+        # Don't join points across a gap in collection
+        gaps = np.flatnonzero(np.diff(ts) > GAP_FACTOR * level.interval) + 1
+        scale_x = width / (t1 - t0)
+        scale_y = height / self.fixed_y_max
+        for key, _ in self.SERIES:
+            column = level.columns.get(key)
+            if column is None:
+                continue
+            xs, ys, breaks = ts, column[i0:i1], gaps
+            if len(xs) > 4 * width:
+                keep = m4(xs, ys, width)
+                xs, ys = xs[keep], ys[keep]
+                breaks = np.flatnonzero(np.diff(np.searchsorted(gaps, keep, "right"))) + 1
+            n = len(xs)
+            polygon, px = self._buffer(key, n)
+            px = px[:n]
+            np.multiply(xs - t0, scale_x, out=px[:, 0])
+            px[:, 0] += self.MARGIN_LEFT
+            np.multiply(np.maximum(ys, 0), -scale_y, out=px[:, 1])
+            px[:, 1] += base_y
+            np.floor(px, out=px)
+            painter.setPen(self.series_pens[key])
+            start = 0
+            for stop in list(breaks) + [n]:
+                _draw_runs(painter, polygon, start, stop)
+                start = stop
+
+    def _paint_time_axis(self, painter, t0, t1, width, base_y):
+        span = t1 - t0
+        step = next((s for s in TIME_STEPS if span / s <= MAX_TIME_LABELS), TIME_STEPS[-1])
+        fmt = "%H:%M" if step < 86400 else "%b %d"
+        painter.setPen(QColor("#aaaaaa"))
+        painter.setFont(self.axis_font)
+        t = math.ceil(t0 / step) * step
+        while t <= t1:
+            x = self.MARGIN_LEFT + (t - t0) * width / span
+            painter.drawLine(int(x), base_y, int(x), base_y + 4)
+            label = time.strftime(fmt, time.gmtime(t))
+            painter.drawText(QRectF(x - 40, base_y + 6, 80, 14), Qt.AlignHCenter | Qt.AlignTop, label)
+            t += step
 
 
 class PieChart(QWidget):
@@ -129,16 +528,183 @@ class PieChart(QWidget):
         painter.drawText(rect, Qt.AlignCenter, f"{self.used_percent:.1f}%")
 
 
-class ProcessTable(QTableWidget):
+# =======================
+# Process table
+# =======================
+# A QAbstractTableModel keyed by PID. Each refresh is diffed against the
+# rows already shown: processes that exited are removed, new ones
+# inserted, and dataChanged is emitted only for the cells whose value
+# moved (one signal per run of consecutive rows in a column, or one per
+# column when the changes are scattered). The model sorts and filters
+# itself: a stable key sort in Python, then a single layoutChanged that
+# carries the selection along, only when the order actually changed. (A
+# QSortFilterProxyModel re-sorts on every dataChanged and calls back into
+# Python for each comparison; at a few thousand rows that stalled every
+# refresh.)
+
+PROC_COLUMNS = ("PID", "Name", "CPU %", "Mem %")
+# Past this many exits in one refresh, a model reset is cheaper than
+# removing row ranges one by one
+RESET_REMOVED = 256
+# Past this many runs of changed rows in a column, one dataChanged over
+# the whole span: the view only repaints what is on screen either way
+MAX_RUNS = 32
+
+
+def _runs(rows):
+    """ Ascending row numbers -> [[first, last]] of consecutive runs. """
+    runs = []
+    for r in rows:
+        if runs and runs[-1][1] == r - 1:
+            runs[-1][1] = r
+        else:
+            runs.append([r, r])
+    return runs
+
+
+class ProcessTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._all = {}          # pid -> row, every process of the last update
+        self._rows = []         # shown rows: [pid, name, cpu, mem]
+        self._filter = ""
+        self._sort = None       # (column, Qt.SortOrder)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PROC_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return PROC_COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            value = self._rows[index.row()][index.column()]
+            return f"{value:.1f}" if index.column() >= 2 else str(value)
+        if role == Qt.TextAlignmentRole and index.column() >= 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    # ---- updates ----
+    def update_rows(self, processes):
+        """ Show `processes` (dicts from the sampler), diffed by PID. """
+        rows = {}
+        for proc in processes:
+            get = proc.get
+            # cpu_percent_norm is the share of the whole machine; rows from
+            # older journals may only carry the per-core figure
+            cpu = get('cpu_percent_norm')
+            if cpu is None:
+                cpu = get('cpu_percent_raw') or 0
+            pid = get('pid', 0)
+            rows[pid] = [pid, get('name') or '', cpu, get('memory_percent') or 0]
+        self._all = rows
+        self._apply()
+
+    def set_filter(self, text):
+        self._filter = text.strip().lower()
+        self._apply()
+
+    def _apply(self):
+        wanted = self._filter
+        if wanted:
+            new = {pid: row for pid, row in self._all.items() if wanted in row[1].lower()}
+        else:
+            new = dict(self._all)
+
+        gone = [r for r, row in enumerate(self._rows) if row[0] not in new]
+        if len(gone) > RESET_REMOVED:
+            self.beginResetModel()
+            self._rows = list(new.values())
+            self._rows = self._sorted()
+            self.endResetModel()
+            return
+        for first, last in reversed(_runs(gone)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+
+        changed = [[] for _ in PROC_COLUMNS]
+        for r, row in enumerate(self._rows):
+            fresh = new.pop(row[0])
+            if fresh != row:
+                for c in range(1, len(row)):
+                    if fresh[c] != row[c]:
+                        changed[c].append(r)
+                self._rows[r] = fresh
+        for c, rows in enumerate(changed):
+            runs = _runs(rows)
+            if len(runs) > MAX_RUNS:
+                runs = [[runs[0][0], runs[-1][1]]]
+            for first, last in runs:
+                # createIndex: index() would call back into rowCount()
+                self.dataChanged.emit(self.createIndex(first, c), self.createIndex(last, c), [Qt.DisplayRole])
+
+        # What is left in `new` started since the last refresh
+        if new:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+            self._rows.extend(new.values())
+            self.endInsertRows()
+
+        self._relayout()
+
+    # ---- sorting ----
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort = (column, order)
+        self._relayout()
+
+    def _sorted(self):
+        if self._sort is None:
+            return list(self._rows)
+        column, order = self._sort
+        if column == 1:
+            key = lambda row: row[1].lower()
+        else:
+            key = itemgetter(column)
+        # Stable: equal rows keep their place instead of shuffling
+        return sorted(self._rows, key=key, reverse=order == Qt.DescendingOrder)
+
+    def _relayout(self):
+        rows = self._sorted()
+        if all(a is b for a, b in zip(rows, self._rows)):
+            return
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+        before = self._rows
+        self._rows = rows
+        # Selection and current index follow their process
+        old = self.persistentIndexList()
+        if old:
+            position = {row[0]: r for r, row in enumerate(rows)}
+            self.changePersistentIndexList(old, [
+                self.index(position[before[i.row()][0]], i.column()) for i in old
+            ])
+        self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
+
+
+class ProcessTable(QTableView):
     def __init__(self, processes):
         super().__init__()
-        self.setColumnCount(4)
-        self.setHorizontalHeaderLabels(["PID", "Name", "CPU %", "Mem %"])
+        self.table_model = ProcessTableModel(self)
+        self.setModel(self.table_model)
+
+        self.setSortingEnabled(True)
+        self.sortByColumn(2, Qt.DescendingOrder)
+        self.setSelectionBehavior(QTableView.SelectRows)
+        self.setEditTriggers(QTableView.NoEditTriggers)
         self.verticalHeader().setVisible(False)
+        # Fixed row height: no per-row size hints to compute on refresh
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(24)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        # Style (Keep your existing style)
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #1e1e1e;
                 color: #e0e0e0;
                 gridline-color: #333333;
@@ -153,20 +719,26 @@ class ProcessTable(QTableWidget):
         """)
         self.update_table(processes)
 
-    # --- NEW METHOD ---
     def update_table(self, processes):
-        self.setRowCount(len(processes))
-        for r, proc in enumerate(processes):
-            self.setItem(r, 0, QTableWidgetItem(str(proc.get('pid', ''))))
-            self.setItem(r, 1, QTableWidgetItem(str(proc.get('name', ''))))
-            self.setItem(r, 2, QTableWidgetItem(f"{proc.get('cpu_percent', 0):.1f}"))
-            self.setItem(r, 3, QTableWidgetItem(f"{proc.get('memory_percent', 0):.1f}"))
+        self.table_model.update_rows(processes)
+
+    def set_filter(self, text):
+        """ Show only processes whose name contains `text`. """
+        self.table_model.set_filter(text)
 
 class GraphsWindow(QWidget):
     def __init__(self, user_name, parent_dashboard=None):
         super().__init__()
         self.user_name = user_name
         self.parent_dashboard = parent_dashboard
+        self.history_reader = get_reader()
+        # (source, count) of the newest sample the line graphs hold
+        self._drawn = None
+        try:
+            from utils.live_ring import LiveRingReader
+            self.live_reader = LiveRingReader()
+        except ImportError:
+            self.live_reader = None
         
         # icon
         from utils.constants import ICON_PATH
@@ -205,12 +777,12 @@ class GraphsWindow(QWidget):
         grid.setSpacing(20)
 
         # --- INITIALIZE WIDGETS (Empty or with initial data) ---
-        # 1. CPU Graph
-        self.cpu_graph = LineGraph("CPU History (%)", [], y_max=100)
+        # 1. CPU Graph (the retained raw samples, like its source)
+        self.cpu_graph = LineGraph("CPU History (%)", [], y_max=100, max_points=MAX_RAW_SAMPLES)
         grid.addWidget(self.cpu_graph, 0, 0)
         
-        # 2. Network Graph
-        self.net_graph = LineGraph("Network I/O (KB/s)", [], y_label="K")
+        # 2. Network Graph (one rate per pair of samples)
+        self.net_graph = LineGraph("Network I/O (KB/s)", [], y_label="K", max_points=MAX_RAW_SAMPLES - 1)
         grid.addWidget(self.net_graph, 0, 1)
         
         # 3. Memory Pie
@@ -221,14 +793,29 @@ class GraphsWindow(QWidget):
         self.disk_pie = PieChart("Disk Usage", 0, "#9c27b0")
         grid.addWidget(self.disk_pie, 1, 1)
         
-        # 5. Process Table
-        proc_label = QLabel("Top 5 Processes (by CPU)")
+        # 5. CPU over the whole history: wheel to zoom, drag to pan
+        self.explorer = TimeRangeGraph("CPU Over Time (%)")
+        self.explorer.setMinimumHeight(300)
+        grid.addWidget(self.explorer, 2, 0, 1, 2)
+
+        # 6. Process Table
+        proc_header = QHBoxLayout()
+        proc_label = QLabel("Processes (click a column to sort)")
         proc_label.setFont(QFont("Segoe UI", 12, QFont.Bold))
-        grid.addWidget(proc_label, 2, 0, 1, 2)
-        
+        self.proc_filter = QLineEdit()
+        self.proc_filter.setPlaceholderText("Filter by name")
+        self.proc_filter.setClearButtonEnabled(True)
+        self.proc_filter.setFixedWidth(250)
+        self.proc_filter.setStyleSheet("background-color: #1e1e1e; border: 1px solid #5f6368; padding: 4px;")
+        proc_header.addWidget(proc_label)
+        proc_header.addStretch()
+        proc_header.addWidget(self.proc_filter)
+        grid.addLayout(proc_header, 3, 0, 1, 2)
+
         self.proc_table = ProcessTable([])
-        self.proc_table.setFixedHeight(200)
-        grid.addWidget(self.proc_table, 3, 0, 1, 2)
+        self.proc_table.setFixedHeight(320)
+        self.proc_filter.textChanged.connect(self.proc_table.set_filter)
+        grid.addWidget(self.proc_table, 4, 0, 1, 2)
         
         content.setLayout(grid)
         scroll.setWidget(content)
@@ -245,28 +832,58 @@ class GraphsWindow(QWidget):
         """Fetches new data and updates child widgets"""
         data = self.load_data()
         
-        # 1. Update CPU
-        cpu_history = [{'label': 'Usage', 'data': data['cpu_history'], 'color': '#1a73e8'}]
-        self.cpu_graph.update_data(cpu_history)
-        
-        # 2. Update Network
-        net_sent = self.calc_rate(data['net_sent'])
-        net_recv = self.calc_rate(data['net_recv'])
-        net_sent_kb = [x/1024 for x in net_sent]
-        net_recv_kb = [x/1024 for x in net_recv]
-        
-        net_datasets = [
-            {'label': 'Sent', 'data': net_sent_kb, 'color': '#fbbc04'},
-            {'label': 'Recv', 'data': net_recv_kb, 'color': '#188038'}
-        ]
-        self.net_graph.update_data(net_datasets)
+        # 1./2. Update CPU and Network: only the samples drawn since the
+        # last refresh are appended; the series are rebuilt when there is
+        # no common cursor (first load, other source, new journal segment)
+        new = self._new_samples(data['cursor'], len(data['cpu_history']))
+        if new is None:
+            cpu_history = [{'label': 'Usage', 'data': data['cpu_history'], 'color': '#1a73e8'}]
+            self.cpu_graph.update_data(cpu_history)
+
+            net_sent = self.calc_rate(data['net_sent'])
+            net_recv = self.calc_rate(data['net_recv'])
+            net_sent_kb = [x/1024 for x in net_sent]
+            net_recv_kb = [x/1024 for x in net_recv]
+
+            net_datasets = [
+                {'label': 'Sent', 'data': net_sent_kb, 'color': '#fbbc04'},
+                {'label': 'Recv', 'data': net_recv_kb, 'color': '#188038'}
+            ]
+            self.net_graph.update_data(net_datasets)
+        elif new:
+            # The source decides what is retained (the journal drops 30
+            # samples at once), so the series are trimmed to match it
+            retained = len(data['cpu_history'])
+            self.cpu_graph.append_points([data['cpu_history'][-new:]], keep=[retained])
+            # One more counter than samples: the rate needs the previous one
+            self.net_graph.append_points([
+                [x/1024 for x in self.calc_rate(data['net_sent'][-new - 1:])],
+                [x/1024 for x in self.calc_rate(data['net_recv'][-new - 1:])]
+            ], keep=[retained - 1, retained - 1])
+        self._drawn = data['cursor']
         
         # 3. Update Pies
         self.mem_pie.update_data(data['latest_mem'])
         self.disk_pie.update_data(data['latest_disk'])
         
-        # 4. Update Table
-        self.proc_table.update_table(data['top_processes'])
+        # 4. Update the explorer (a no-op while the journal is unchanged)
+        self.explorer.set_levels(data['levels'])
+
+        # 5. Update Table
+        self.proc_table.update_table(data['processes'])
+
+    def _new_samples(self, cursor, available):
+        """ How many samples arrived since the last refresh, or None when
+            the line graphs have to be rebuilt.
+        """
+        if cursor is None or self._drawn is None or cursor[0] != self._drawn[0]:
+            return None
+        new = cursor[1] - self._drawn[1]
+        # Gone backwards (collector restarted), or more new samples than
+        # are retained plus the one before them
+        if new < 0 or new >= available:
+            return None
+        return new
 
     def calc_rate(self, data):
         if not data: return []
@@ -284,30 +901,40 @@ class GraphsWindow(QWidget):
             'net_recv': [],
             'latest_mem': 0,
             'latest_disk': 0,
-            'top_processes': []
+            'processes': [],
+            'levels': [],
+            'cursor': None
         }
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r") as f:
-                    content = json.load(f)
-                    if isinstance(content, dict):
-                        raw = content.get("data", {}).get("recent_samples", [])
-                    else:
-                        raw = []
-                    
-                    for s in raw:
-                        res['cpu_history'].append(s.get('cpu', {}).get('usage', 0))
-                        net = s.get('network', {})
-                        res['net_sent'].append(net.get('bytes_sent', 0))
-                        res['net_recv'].append(net.get('bytes_recv', 0))
-                        
-                    if raw:
-                        last = raw[-1]
-                        res['latest_mem'] = last.get('memory', {}).get('ram', {}).get('percent', 0)
-                        res['latest_disk'] = last.get('disk', {}).get('percent', 0)
-                        res['top_processes'] = last.get('processes', [])[:5]
-            except Exception as e:
-                print(f"Error loading: {e}")
+        try:
+            # The explorer always reads the journal: a size check, and only
+            # the lines appended since the last refresh are parsed
+            history = self.history_reader
+            history.refresh()
+            res['levels'] = history.time_levels()
+
+            live = self.live_reader
+            if live is not None:
+                live.poll()
+            if live is not None and live.is_live() and len(live.samples):
+                # Shared-memory ring from the collector
+                samples = live.samples
+                res['cursor'] = ("live", live.written)
+                res['cpu_history'] = samples['cpu'].tolist()
+                res['net_sent'] = samples['sent'].tolist()
+                res['net_recv'] = samples['recv'].tolist()
+                res['latest_mem'] = float(samples['mem'][-1])
+                res['latest_disk'] = float(samples['disk'][-1])
+                # The ring keeps the top 5 only; the journal's newest
+                # sample has the whole sampled set
+                res['processes'] = history.top_processes(None) or live.top_processes()
+            else:
+                (segment, count), res['cpu_history'], (res['net_sent'], res['net_recv']) = history.sample_series()
+                res['cursor'] = (("journal", segment), count)
+                res['latest_mem'] = history.latest_memory()
+                res['latest_disk'] = history.latest_disk()
+                res['processes'] = history.top_processes(None)
+        except Exception as e:
+            print(f"Error loading: {e}")
         return res
 
     def go_back(self):
@@ -316,6 +943,8 @@ class GraphsWindow(QWidget):
 
     def closeEvent(self, event):
         self.timer.stop() # Double check timer is stopped
+        if self.live_reader is not None:
+            self.live_reader.detach()
         if self.parent_dashboard:
             self.parent_dashboard.show()
         event.accept()
\ No newline at end of file
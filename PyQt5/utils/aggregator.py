@@ -0,0 +1,332 @@
+import heapq
+import math
+from utils.percentiles import SPECS, Histogram
+
+# =======================
+# Streaming Window Aggregator
+# =======================
+# Folds each sample in as it arrives (O(1) per metric, O(processes) per
+# sample) so closing a window only has to format the result.
+
+
+class _Welford:
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+    def std(self):
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+    def merge(self, n, mean, m2, lo, hi):
+        """ Chan et al. parallel combination of two partial results. """
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        if lo is not None and (self.min is None or lo < self.min):
+            self.min = lo
+        if hi is not None and (self.max is None or hi > self.max):
+            self.max = hi
+
+
+# Per-pid CPU sums carried in "accumulators" (see WindowAggregator)
+ACCUMULATED_PROCS = 100   # twice get_info.TOP_PROCESSES_AGG
+OTHER_PROCS = "other"
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a >= b else b
+
+
+class WindowAggregator:
+    """ Incremental equivalent of aggregate_samples().
+
+        add(sample) updates running statistics; close() returns the
+        aggregate for the samples seen since the last close and resets.
+        merge(aggregate) folds an already closed window in exactly, using
+        the "accumulators" block every aggregate carries, which is how the
+        hourly/daily rollup tiers are built without the raw samples.
+
+        window_size counts whatever is fed in: samples for the 5 minute
+        tier, child aggregates for the rollup tiers. A window closed
+        before it was full (a gap, a forced close) or merged from a
+        partial child is tagged window["partial"] = True.
+
+        The accumulators also carry the first and last network counters,
+        so merge() adds the delta across each boundary between children
+        and the merged tx/rx equal aggregating the raw samples directly.
+
+        Per-pid CPU sums are kept for the ACCUMULATED_PROCS largest
+        (by CPU sum, well beyond the emitted top_processes) plus one
+        "other" bucket, so records stay bounded on a busy machine. A
+        process averaged across children is exact unless it fell into
+        "other" in one of them. A window nothing will be merged from (the
+        last rollup tier) can pass mergeable=False to keep just its top
+        pids.
+    """
+
+    def __init__(self, window_size, sample_interval, top_processes, mergeable=True):
+        self.window_size = window_size
+        self.sample_interval = sample_interval
+        self.top_processes = top_processes
+        self.mergeable = mergeable
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.partial = False   # a partial child was merged in
+        self.n = 0             # raw samples represented
+        self.duration = 0
+        self.start_ts = None
+        self.end_ts = None
+        self.cpu = _Welford()
+        self.mem_sum = 0.0
+        self.disk_sum = 0.0
+        self.net_first = None   # (sent, recv) counters
+        self.net_prev = None
+        self.tx = 0
+        self.rx = 0
+        self.temp_sum = 0.0
+        self.temp_n = 0
+        self.temp_max = None
+        self.per_sensor = {}   # name -> [sum_current, n_current, max]
+        self.procs = {}        # pid -> [name, cpu_sum, n]
+        self.other = [0.0, 0]  # cpu_sum, n of the pids not carried
+        self.hists = {name: Histogram(name) for name in SPECS}
+
+    def is_full(self):
+        return self.count >= self.window_size
+
+    def _net_step(self, sent, recv):
+        """ Account the counter delta from the previous sample. """
+        if self.net_prev is not None:
+            dtx = sent - self.net_prev[0]
+            drx = recv - self.net_prev[1]
+            self.tx += dtx
+            self.rx += drx
+            self.hists["net_tx_bps"].add(max(dtx, 0) / self.sample_interval)
+            self.hists["net_rx_bps"].add(max(drx, 0) / self.sample_interval)
+        elif self.net_first is None:
+            self.net_first = (sent, recv)
+        self.net_prev = (sent, recv)
+
+    def add(self, s):
+        if self.count == 0:
+            self.start_ts = s["ts"]
+        self.end_ts = s["ts"]
+        self.count += 1
+        self.n += 1
+        self.duration += self.sample_interval
+
+        hists = self.hists
+        net = s["network"]
+        self._net_step(net["bytes_sent"], net["bytes_recv"])
+
+        cpu = s["cpu"]["usage"]
+        mem = s["memory"]["ram"]["percent"]
+        disk = s["disk"]["percent"]
+        self.cpu.add(cpu)
+        self.mem_sum += mem
+        self.disk_sum += disk
+        hists["cpu"].add(cpu)
+        hists["memory"].add(mem)
+        hists["disk"].add(disk)
+
+        temps = s["temps"]
+        if temps.get("available"):
+            for sensor, entries in temps["sensors"].items():
+                acc = self.per_sensor.get(sensor)
+                if acc is None:
+                    acc = self.per_sensor[sensor] = [0.0, 0, None]
+                for e in entries:
+                    cur = e["current"]
+                    if cur is not None:
+                        self.temp_sum += cur
+                        self.temp_n += 1
+                        hists["temp_c"].add(cur)
+                        acc[0] += cur
+                        acc[1] += 1
+                    hi = e["max"]
+                    if hi is not None:
+                        if self.temp_max is None or hi > self.temp_max:
+                            self.temp_max = hi
+                        if acc[2] is None or hi > acc[2]:
+                            acc[2] = hi
+
+        procs = self.procs
+        for p in s["processes"]:
+            acc = procs.get(p["pid"])
+            if acc is None:
+                procs[p["pid"]] = [p["name"], p["cpu_percent_norm"], 1]
+            else:
+                acc[1] += p["cpu_percent_norm"]
+                acc[2] += 1
+
+    def merge(self, agg):
+        """ Fold a closed aggregate (from this class) into the window. """
+        acc = agg["accumulators"]
+        if self.count == 0:
+            self.start_ts = agg["window"]["start"]
+        self.end_ts = agg["window"]["end"]
+        self.count += 1
+        self.partial = self.partial or agg["window"].get("partial", False)
+        self.n += acc["n"]
+        self.duration += agg["window"]["duration_sec"]
+
+        mean, m2 = acc["cpu"]
+        self.cpu.merge(acc["n"], mean, m2, agg["cpu"]["min"], agg["cpu"]["max"])
+        self.mem_sum += acc["mem_sum"]
+        self.disk_sum += acc["disk_sum"]
+        self.tx += agg["network_delta"]["tx_bytes"]
+        self.rx += agg["network_delta"]["rx_bytes"]
+        net = acc.get("net")
+        if net:
+            # The delta from the previous child's last sample to this
+            # child's first one belongs to neither child
+            self._net_step(net[0], net[1])
+            self.net_prev = (net[2], net[3])
+        else:
+            self.net_prev = None
+        for name, sparse in acc.get("hist", {}).items():
+            if name in self.hists:
+                self.hists[name].merge_sparse(sparse)
+
+        temps = agg["temps"]
+        self.temp_sum += acc["temp"][0]
+        self.temp_n += acc["temp"][1]
+        if temps.get("available"):
+            self.temp_max = _max(self.temp_max, temps["max_c"])
+            for sensor, (t_sum, t_n) in acc["per_sensor"].items():
+                a = self.per_sensor.get(sensor)
+                if a is None:
+                    a = self.per_sensor[sensor] = [0.0, 0, None]
+                a[0] += t_sum
+                a[1] += t_n
+                a[2] = _max(a[2], temps["per_sensor"].get(sensor, {}).get("max"))
+
+        procs = self.procs
+        for pid, (name, cpu_sum, p_n) in acc["procs"].items():
+            if pid == OTHER_PROCS:
+                self.other[0] += cpu_sum
+                self.other[1] += p_n
+                continue
+            pid = int(pid)
+            a = procs.get(pid)
+            if a is None:
+                procs[pid] = [name, cpu_sum, p_n]
+            else:
+                a[1] += cpu_sum
+                a[2] += p_n
+
+    def _carried_procs(self, top_pids):
+        if not self.mergeable:
+            return {str(pid): self.procs[pid] for pid in top_pids}
+        procs = self.procs
+        keep = heapq.nlargest(ACCUMULATED_PROCS, procs, key=lambda pid: procs[pid][1])
+        carried = {str(pid): procs[pid] for pid in keep}
+        other = list(self.other)
+        for pid in procs.keys() - set(keep):
+            other[0] += procs[pid][1]
+            other[1] += procs[pid][2]
+        if other[1]:
+            carried[OTHER_PROCS] = [OTHER_PROCS, other[0], other[1]]
+        return carried
+
+    def close(self):
+        """ Emit the aggregate for the current window and start a new one. """
+        if self.count == 0:
+            return None
+        n = self.n
+
+        if self.temp_n:
+            temp_block = {
+                "available": True,
+                "avg_c": round(self.temp_sum / self.temp_n, 2),
+                "max_c": self.temp_max,
+                "per_sensor": {
+                    k: {
+                        "avg": round(v[0] / v[1], 2) if v[1] else None,
+                        "max": v[2]
+                    }
+                    for k, v in self.per_sensor.items()
+                }
+            }
+        else:
+            temp_block = {"available": False}
+
+        top_pids = heapq.nlargest(
+            self.top_processes,
+            self.procs,
+            key=lambda pid: round(self.procs[pid][1] / self.procs[pid][2], 2)
+        )
+        top = [
+            {
+                "pid": pid,
+                "name": self.procs[pid][0],
+                "avg_cpu": round(self.procs[pid][1] / self.procs[pid][2], 2)
+            }
+            for pid in top_pids
+        ]
+
+        result = {
+            "window": {
+                "start": self.start_ts,
+                "end": self.end_ts,
+                "duration_sec": self.duration
+            },
+            "cpu": {
+                "avg": round(self.cpu.mean, 2),
+                "min": self.cpu.min,
+                "max": self.cpu.max,
+                "std": round(self.cpu.std(), 2)
+            },
+            "memory_avg_percent": round(self.mem_sum / n, 2),
+            "disk_avg_percent": round(self.disk_sum / n, 2),
+            "network_delta": {
+                "tx_bytes": self.tx,
+                "rx_bytes": self.rx
+            },
+            "temps": temp_block,
+            "top_processes_avg_cpu": top,
+            "percentiles": {
+                name: h.percentiles() for name, h in self.hists.items() if h.counts.any()
+            },
+            # Unrounded running state, so windows can be merged exactly
+            "accumulators": {
+                "n": n,
+                "cpu": [self.cpu.mean, self.cpu.m2],
+                "mem_sum": self.mem_sum,
+                "disk_sum": self.disk_sum,
+                "temp": [self.temp_sum, self.temp_n],
+                "per_sensor": {k: [v[0], v[1]] for k, v in self.per_sensor.items()},
+                "net": list(self.net_first + self.net_prev) if self.net_prev else None,
+                "procs": self._carried_procs(top_pids),
+                "hist": {name: h.to_sparse() for name, h in self.hists.items()}
+            }
+        }
+        if self.partial or self.count < self.window_size:
+            result["window"]["partial"] = True
+        self.reset()
+        return result
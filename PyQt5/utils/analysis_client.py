@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.constants import ANALYSIS_URL
+from utils.stream_encode import iter_gzip_json, DEFAULT_LEVEL
+
+# =======================
+# Cloud analysis client
+# =======================
+# One keep-alive session for every call to the analysis service, so the
+# TCP/TLS handshake is paid once. The service sleeps when idle and takes
+# minutes to wake up; while uploads are queued or in flight (see
+# utils/uploader.py) a cheap GET is sent in the background every
+# KEEPWARM_INTERVAL_SEC, and the pings end when the queue drains or after
+# KEEPWARM_IDLE_SEC without new uploads.
+
+CONNECT_TIMEOUT_SEC = 15
+READ_TIMEOUT_SEC = 200           # worst-case cold start, kept from before
+WARMUP_TIMEOUT_SEC = 240
+KEEPWARM_INTERVAL_SEC = 10 * 60  # the free tier idles out after 15 min
+KEEPWARM_IDLE_SEC = 30 * 60      # safety stop if a job never reports its end
+WARMUP_PATH = "/"
+TIMING_HISTORY = 50
+
+_local = threading.local()
+
+
+# ---- per-call handshake timing (hooks into urllib3's connections) ----
+def _timing():
+    return getattr(_local, "timing", None)
+
+
+class _TimedMixin:
+    def _new_conn(self):
+        t0 = time.perf_counter()
+        sock = super()._new_conn()
+        t = _timing()
+        if t is not None:
+            t["connect_ms"] += (time.perf_counter() - t0) * 1000
+        return sock
+
+    def connect(self):
+        t = _timing()
+        before = t["connect_ms"] if t is not None else 0.0
+        t0 = time.perf_counter()
+        super().connect()
+        if t is not None:
+            # Everything connect() did beyond opening the socket is TLS
+            total = (time.perf_counter() - t0) * 1000
+            t["tls_ms"] += max(0.0, total - (t["connect_ms"] - before))
+            t["new_connections"] += 1
+
+
+class _TimedHTTPConnection(_TimedMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPPool, "https": _TimedHTTPSPool}
+
+
+# =======================
+# Client
+# =======================
+class AnalysisClient:
+    def __init__(self, base_url=ANALYSIS_URL, pool_size=2):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timings = deque(maxlen=TIMING_HISTORY)
+        self.last_warm = None            # monotonic time of the last successful ping
+        self._warming = threading.Lock()
+        self._stop = threading.Event()
+        self._keepwarm = None
+        self._keepwarm_lock = threading.Lock()
+        self._keepwarm_until = 0.0
+
+    def _call(self, op, method, path, **kwargs):
+        """ Send one request and record connect / TLS / server / total ms. """
+        _local.timing = t = {"connect_ms": 0.0, "tls_ms": 0.0, "new_connections": 0}
+        t0 = time.perf_counter()
+        status = None
+        try:
+            response = self.session.request(method, self.base_url + path, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            total = (time.perf_counter() - t0) * 1000
+            _local.timing = None
+            self.timings.append({
+                "op": op,
+                "ts": datetime.now().isoformat(),
+                "status": status,
+                "reused": t["new_connections"] == 0,
+                "connect_ms": round(t["connect_ms"], 2),
+                "tls_ms": round(t["tls_ms"], 2),
+                # Request upload + server time + first response bytes
+                "server_ms": round(max(0.0, total - t["connect_ms"] - t["tls_ms"]), 2),
+                "total_ms": round(total, 2),
+            })
+
+    # ---- warm-up ----
+    def warm_up(self, block=False):
+        """ Ping the service so a sleeping instance starts booting. Returns
+            False without waiting if a ping is already in flight.
+        """
+        if not block:
+            threading.Thread(target=self.warm_up, args=(True,), daemon=True).start()
+            return True
+        if not self._warming.acquire(blocking=False):
+            return False
+        try:
+            # Any HTTP answer, even a 404, means the instance is up
+            self._call("warmup", "GET", WARMUP_PATH, timeout=(CONNECT_TIMEOUT_SEC, WARMUP_TIMEOUT_SEC))
+            self.last_warm = time.monotonic()
+            return True
+        except requests.exceptions.RequestException:
+            return False
+        finally:
+            self._warming.release()
+
+    def start_keepwarm(self, interval=KEEPWARM_INTERVAL_SEC, idle_sec=KEEPWARM_IDLE_SEC):
+        """ Ping now, then every `interval` seconds until stop_keepwarm(),
+            or until idle_sec pass without another start_keepwarm() call.
+        """
+        with self._keepwarm_lock:
+            self._keepwarm_until = time.monotonic() + idle_sec
+            if self._keepwarm and self._keepwarm.is_alive() and not self._stop.is_set():
+                return
+            # A loop that was just stopped may still be finishing a ping
+            stop = self._stop = threading.Event()
+
+            def loop():
+                while True:
+                    self.warm_up(block=True)
+                    if stop.wait(interval) or time.monotonic() >= self._keepwarm_until:
+                        return
+
+            self._keepwarm = threading.Thread(target=loop, name="analysis-keepwarm", daemon=True)
+            self._keepwarm.start()
+
+    def stop_keepwarm(self):
+        with self._keepwarm_lock:
+            self._stop.set()
+
+    def is_warm(self, interval=KEEPWARM_INTERVAL_SEC):
+        return self.last_warm is not None and time.monotonic() - self.last_warm < interval
+
+    # ---- analysis ----
+    def analyze(self, history_dict, level=DEFAULT_LEVEL, read_timeout=READ_TIMEOUT_SEC):
+        """ POST the history (streamed, gzip) to /analyze and return the JSON.
+            read_timeout bounds the wait for the server's answer.
+        """
+        response = self._call(
+            "analyze", "POST", "/analyze",
+            data=iter_gzip_json(history_dict, level=level),
+            headers={
+                "Content-Encoding": "gzip",
+                "Content-Type": "application/json"
+            },
+            timeout=(CONNECT_TIMEOUT_SEC, read_timeout)
+        )
+        response.raise_for_status()
+        self.last_warm = time.monotonic()
+        return response.json()
+
+    def stats(self):
+        return {"warm": self.is_warm(), "calls": list(self.timings)}
+
+    def close(self):
+        self.stop_keepwarm()
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """ The process-wide client, so the GUI's warm-up and the upload share
+        one connection pool.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AnalysisClient()
+        return _client
@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+
+from utils.constants import COLLECTOR_PIDFILE, COLLECTOR_LOCKFILE
+
+# =======================
+# Collector daemon
+# =======================
+# The collector runs as one long-lived process per user, started by the
+# dashboard but not owned by it: closing the window or logging out only
+# detaches the GUI, so the history (and the ~25 minutes of warm-up before
+# the upload quota is met) survives a GUI restart.
+#
+#   python collector.py [run|start|stop|status]
+#
+# Single instance: the running collector holds an exclusive lock on
+# COLLECTOR_LOCKFILE for its whole life. The OS drops the lock when the
+# process dies, so a crash never leaves a stale "running" state behind;
+# COLLECTOR_PIDFILE only says which pid holds it.
+#
+# This module and collector.py import only the standard library until
+# run() loads the collector itself (psutil, the journal, NumPy).
+
+START_TIMEOUT_SEC = 5
+STOP_TIMEOUT_SEC = 10
+
+
+class InstanceLock:
+    """ Non-blocking exclusive lock on a file (flock / msvcrt). """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+
+
+def read_pid():
+    try:
+        with open(COLLECTOR_PIDFILE, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def is_running():
+    """ True while some process holds the collector lock. """
+    probe = InstanceLock(COLLECTOR_LOCKFILE)
+    if probe.acquire():
+        probe.release()
+        return False
+    return True
+
+
+def status():
+    running = is_running()
+    return {"running": running, "pid": read_pid() if running else None}
+
+
+# =======================
+# Collector side
+# =======================
+def run():
+    """ Run the collector in this process if no other instance is. """
+    lock = InstanceLock(COLLECTOR_LOCKFILE)
+    if not lock.acquire():
+        print(f"Collector already running (pid {read_pid()}).")
+        return 0
+
+    pid = os.getpid()
+    tmp = COLLECTOR_PIDFILE + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(f"{pid}\n")
+    os.replace(tmp, COLLECTOR_PIDFILE)
+    try:
+        from utils.get_info import main as collector_main
+        collector_main()
+    finally:
+        if read_pid() == pid:
+            try:
+                os.remove(COLLECTOR_PIDFILE)
+            except OSError:
+                pass
+        lock.release()
+    return 0
+
+
+# =======================
+# GUI side
+# =======================
+def launch_command():
+    # A PyInstaller build has a single executable: app.py routes --collector
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--collector"]
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collector.py")
+    return [sys.executable, script]
+
+
+def start(timeout=START_TIMEOUT_SEC):
+    """ Start the daemon unless it is already running; returns its pid
+        (None if it did not come up within timeout).
+    """
+    if is_running():
+        return read_pid()
+
+    import subprocess
+    kwargs = {
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.DEVNULL,
+        "close_fds": True,
+    }
+    if sys.platform == "win32":
+        # No console, and not part of the GUI's process group / console
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        # Own session: no SIGHUP / Ctrl+C from the GUI's terminal
+        kwargs["start_new_session"] = True
+    proc = subprocess.Popen(launch_command(), **kwargs)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_running() and read_pid():
+            return read_pid()
+        if proc.poll() is not None and not is_running():
+            return None
+        time.sleep(0.05)
+    return None
+
+
+def stop(timeout=STOP_TIMEOUT_SEC):
+    """ Ask the daemon to exit (control "shutdown", then SIGTERM, then a
+        hard kill). Returns True once it is gone.
+    """
+    if not is_running():
+        return True
+    pid = read_pid()
+
+    from utils.control_client import request, CollectorUnavailable
+    try:
+        request("shutdown", timeout=2)
+    except (CollectorUnavailable, OSError, ValueError):
+        if pid:
+            import signal
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    # The loop finishes its current pass and closes the journal
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not is_running():
+            return True
+        time.sleep(0.05)
+
+    if pid:
+        import signal
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return not is_running()
+
+
+def main(argv):
+    command = argv[0] if argv else "run"
+    if command == "run":
+        return run()
+    if command == "start":
+        pid = start()
+        print(f"Collector running (pid {pid})." if pid else "Collector did not start.")
+        return 0 if pid else 1
+    if command == "stop":
+        stopped = stop()
+        print("Collector stopped." if stopped else "Collector did not stop.")
+        return 0 if stopped else 1
+    if command == "status":
+        st = status()
+        print(f"Collector running (pid {st['pid']})." if st["running"] else "Collector not running.")
+        return 0 if st["running"] else 3
+    print("usage: python collector.py [run|start|stop|status]")
+    return 2
@@ -0,0 +1,286 @@
+from datetime import datetime, timedelta
+from bisect import bisect_left
+from itertools import accumulate
+
+# =======================
+# Schema v4: columnar records
+# =======================
+# v3 stores every sample / aggregate as its own nested object, so most of
+# the text is repeated keys. v4 stores each list of records as a structure
+# of arrays: one array per leaf field, with the keys written once. Repeated
+# strings (process names, sensor labels) go into one dictionary shared by
+# the whole payload.
+#
+# Node encodings inside a table (a JSON list is always a plain column):
+#   [v0, v1, ...]                       column, one value per record
+#   {"~s": [i0, i1, ...]}               indexes into the payload "strings"
+#   {"~delta": [first, d1, d2, ...]}    integer column, stored as differences
+#   {"~ts": base, "~us": [...]}         ISO timestamps, microseconds from base
+#   {"~rows": [len...], "~v": node}     list of objects per record (child table)
+#   {"~absent": [i...], "~v": node}     field missing in some records
+#   {"~map": [len...], "~k": node, "~v": node}
+#                                       object keyed by data (pid, sensor
+#                                       name): one (key, value) row per entry
+#   {"~tuple": [node, node, ...]}       fixed-length lists, one column per slot
+#   {key: node, ...}                    nested object
+#
+# Expansion back to v3 (to_v3 / decode_table) is exact, so v3 readers keep
+# working on top of v4 storage. Readers that only need a few fields should
+# use column() (or decode a record range) instead of expanding everything.
+
+SCHEMA_V3 = "3.0"
+SCHEMA_V4 = "4.0"
+
+_MISSING = object()
+
+# Objects whose keys are data rather than field names. As nested objects
+# they would turn every pid into a column of its own; they are stored as
+# ~map row tables instead.
+MAP_FIELDS = ("procs", "per_sensor", "sensors")
+MAX_TUPLE = 8           # wider fixed-length lists stay plain columns
+
+
+class Strings:
+    """ Payload-wide string dictionary. """
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self._index = {v: i for i, v in enumerate(self.values)}
+
+    def add(self, value):
+        i = self._index.get(value)
+        if i is None:
+            i = self._index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+
+# ---- encoding ----
+def _kind(v):
+    if isinstance(v, dict):
+        return "obj"
+    if isinstance(v, list) and v and isinstance(v[0], dict) and all(isinstance(x, dict) for x in v):
+        return "rows"
+    return "val"
+
+
+def _encode_ts(values):
+    try:
+        parsed = [datetime.fromisoformat(v) for v in values]
+    except (TypeError, ValueError):
+        return None
+    base = parsed[0]
+    us = [(p - base) // timedelta(microseconds=1) for p in parsed]
+    # Only when the text comes back byte for byte
+    if any((base + timedelta(microseconds=u)).isoformat() != v for u, v in zip(us, values)):
+        return None
+    return {"~ts": values[0], "~us": us}
+
+
+def _encode_values(values, strings):
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, str) for v in present):
+        if len(values) > 1 and None not in values and all("T" in v for v in values[:1]):
+            ts = _encode_ts(values)
+            if ts is not None:
+                return ts
+        if len(set(present)) * 2 <= len(present):
+            return {"~s": [None if v is None else strings.add(v) for v in values]}
+        return values
+    if len(values) > 2 and all(type(v) is int for v in values):
+        deltas = [values[0]] + [b - a for a, b in zip(values, values[1:])]
+        if sum(len(str(d)) for d in deltas) < sum(len(str(v)) for v in values) * 0.8:
+            return {"~delta": deltas}
+    return values
+
+
+def _tuple_width(values):
+    width = len(values[0]) if values and isinstance(values[0], list) else 0
+    if not 0 < width <= MAX_TUPLE:
+        return 0
+    if all(isinstance(v, list) and len(v) == width for v in values):
+        return width
+    return 0
+
+
+def _encode_map(values, strings):
+    return {
+        "~map": [len(v) for v in values],
+        "~k": _encode_values([k for v in values for k in v], strings),
+        "~v": _encode_column([x for v in values for x in v.values()], strings)
+    }
+
+
+def _encode_field(key, values, strings):
+    if key in MAP_FIELDS and values and all(isinstance(v, dict) for v in values):
+        return _encode_map(values, strings)
+    return _encode_column(values, strings)
+
+
+def _encode_column(values, strings):
+    types = set(map(type, values))
+    if dict not in types and list not in types:
+        return _encode_values(values, strings)
+    kinds = set(map(_kind, values))
+    if kinds == {"obj"}:
+        return _encode_objects(values, strings)
+    if kinds == {"rows"}:
+        return {"~rows": [len(v) for v in values],
+                "~v": _encode_objects([r for v in values for r in v], strings)}
+    if kinds == {"rows", "val"} and all(v == [] for v in values if _kind(v) == "val"):
+        # Some records have an empty list (e.g. no processes yet)
+        return {"~rows": [len(v) for v in values],
+                "~v": _encode_objects([r for v in values if v for r in v], strings)}
+    width = _tuple_width(values)
+    if width:
+        return {"~tuple": [_encode_column([v[i] for v in values], strings) for i in range(width)]}
+    return _encode_values(values, strings)
+
+
+def _encode_objects(records, strings):
+    keys = {}
+    for r in records:
+        for k in r:
+            keys.setdefault(k, None)
+    node = {}
+    for k in keys:
+        values = [r.get(k, _MISSING) for r in records]
+        absent = [i for i, v in enumerate(values) if v is _MISSING]
+        if absent:
+            inner = _encode_field(k, [v for v in values if v is not _MISSING], strings)
+            node[k] = {"~absent": absent, "~v": inner}
+        else:
+            node[k] = _encode_field(k, values, strings)
+    return node
+
+
+def encode_table(records, strings):
+    """ list of dicts -> {"n": count, "cols": node} """
+    return {"n": len(records), "cols": _encode_objects(records, strings)}
+
+
+# ---- decoding ----
+# Decoders take the record range [lo, hi) of a node holding n records, so
+# the newest record or a single column costs a slice of the work of a
+# full expansion.
+def _split(flat, lens):
+    out = []
+    pos = 0
+    for length in lens:
+        out.append(flat[pos:pos + length])
+        pos += length
+    return out
+
+
+def _decode_node(node, n, strings, lo=0, hi=None):
+    hi = n if hi is None else hi
+    if isinstance(node, list):
+        return node[lo:hi]
+    if "~s" in node:
+        return [None if i is None else strings[i] for i in node["~s"][lo:hi]]
+    if "~delta" in node:
+        return list(accumulate(node["~delta"][:hi]))[lo:]
+    if "~ts" in node:
+        base = datetime.fromisoformat(node["~ts"])
+        return [(base + timedelta(microseconds=u)).isoformat() for u in node["~us"][lo:hi]]
+    if "~rows" in node:
+        lens = node["~rows"]
+        start = sum(lens[:lo])
+        flat = _decode_node(node["~v"], sum(lens), strings, start, start + sum(lens[lo:hi]))
+        return _split(flat, lens[lo:hi])
+    if "~map" in node:
+        lens = node["~map"]
+        total = sum(lens)
+        start = sum(lens[:lo])
+        stop = start + sum(lens[lo:hi])
+        keys = _decode_node(node["~k"], total, strings, start, stop)
+        values = _decode_node(node["~v"], total, strings, start, stop)
+        return [dict(pairs) for pairs in _split(list(zip(keys, values)), lens[lo:hi])]
+    if "~tuple" in node:
+        columns = [_decode_node(c, n, strings, lo, hi) for c in node["~tuple"]]
+        return [list(row) for row in zip(*columns)]
+    if "~absent" in node:
+        absent = node["~absent"]
+        before = bisect_left(absent, lo)
+        inside = bisect_left(absent, hi) - before
+        inner = iter(_decode_node(node["~v"], n - len(absent), strings, lo - before, hi - before - inside))
+        gaps = set(absent[before:before + inside])
+        return [_MISSING if i in gaps else next(inner) for i in range(lo, hi)]
+    # nested object: build every record in one pass, then take out the
+    # fields that were missing
+    if not node:
+        return [{} for _ in range(hi - lo)]
+    keys = list(node)
+    columns = [_decode_node(v, n, strings, lo, hi) for v in node.values()]
+    out = [dict(zip(keys, row)) for row in zip(*columns)]
+    for k, v in node.items():
+        if isinstance(v, dict) and "~absent" in v:
+            for i in v["~absent"]:
+                if lo <= i < hi:
+                    del out[i - lo][k]
+    return out
+
+
+def decode_table(table, strings, lo=0, hi=None):
+    """ Records [lo, hi) of a table (all of them by default). """
+    return _decode_node(table["cols"], table["n"], strings, lo, hi)
+
+
+def column(table, strings, *path):
+    """ One leaf column without expanding the records, e.g.
+        column(samples, strings, "cpu", "usage"). Missing values are None.
+    """
+    node = table["cols"]
+    n = table["n"]
+    absent = set()
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return [None] * n
+        node = node[key]
+        if isinstance(node, dict) and "~absent" in node:
+            # Re-index what's left onto the full record range
+            present = [i for i in range(n) if i not in absent]
+            gaps = set(node["~absent"])
+            absent |= {present[j] for j in gaps}
+            node = node["~v"]
+    values = iter(_decode_node(node, n - len(absent), strings))
+    return [None if i in absent else next(values) for i in range(n)]
+
+
+# =======================
+# Payloads
+# =======================
+def to_v4(payload):
+    """ v3 history payload -> v4. Keys other than "data" are kept as is. """
+    if payload.get("schema_version") == SCHEMA_V4:
+        return payload
+    strings = Strings()
+    data = payload.get("data", {})
+    out_data = {}
+    for key, value in data.items():
+        if key == "tiers":
+            out_data[key] = {name: encode_table(recs, strings) for name, recs in value.items()}
+        elif isinstance(value, list):
+            out_data[key] = encode_table(value, strings)
+        else:
+            out_data[key] = value
+    return dict(payload, schema_version=SCHEMA_V4, data=out_data, strings=strings.values)
+
+
+def to_v3(payload):
+    """ Expand a v4 payload into the v3 view; v3 passes through. """
+    if payload.get("schema_version") != SCHEMA_V4:
+        return payload
+    strings = payload.get("strings", [])
+    data = payload.get("data", {})
+    out_data = {}
+    for key, value in data.items():
+        if key == "tiers":
+            out_data[key] = {name: decode_table(t, strings) for name, t in value.items()}
+        elif isinstance(value, dict) and "cols" in value:
+            out_data[key] = decode_table(value, strings)
+        else:
+            out_data[key] = value
+    out = {k: v for k, v in payload.items() if k != "strings"}
+    out.update(schema_version=SCHEMA_V3, data=out_data)
+    return out
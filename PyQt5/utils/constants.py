@@ -1,7 +1,24 @@
+import os
 from utils.path_helper import resource_path, writable_path
 # Use writable path for runtime data (history) so bundled exe can write to it.
 TOKEN_FILE = writable_path("data/token.json")
-DATA_FILE = writable_path("data/history.json")
+JOURNAL_DIR = writable_path("data/journal")
+CONTROL_SOCKET = writable_path("data/collector.sock")
+CONTROL_ENDPOINT_FILE = writable_path("data/collector.endpoint.json")
+COLLECTOR_PIDFILE = writable_path("data/collector.pid")
+COLLECTOR_LOCKFILE = writable_path("data/collector.lock")
+UPLOAD_WATERMARK_FILE = writable_path("data/upload_watermark.json")
+UPLOAD_SPOOL_DIR = writable_path("data/upload_spool")
+# Cloud analysis service (Render); /analyze is the model endpoint.
+# AIDM_ANALYSIS_URL points the app at benchmarks/fake_analysis_server.py.
+ANALYSIS_URL = os.environ.get("AIDM_ANALYSIS_URL", "https://ml-engine-backend.onrender.com")
+# local_first | cloud_first | race (see utils/packager.py)
+ANALYSIS_POLICY = os.environ.get("AIDM_ANALYSIS_POLICY", "cloud_first")
+# Per-core CPU capture period in ms (100-500), 0 = off; a running collector
+# can also be switched with: python -m utils.control_client set_per_core ms=250
+PER_CORE_CPU_MS = os.environ.get("AIDM_PER_CORE_MS", "0")
 SECRETS_PATH = resource_path("data/supabase_secrets.json")
 CLIENT_SECRETS_PATH = resource_path("data/client_secrets.json")
-ICON_PATH = resource_path("data/appiconmain.png")
\ No newline at end of file
+ICON_PATH = resource_path("data/appiconmain.png")
+# Written by app.py --startup-trace (see utils/startup_trace.py)
+STARTUP_TRACE_FILE = writable_path("data/startup_trace.json")
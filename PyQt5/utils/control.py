@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import secrets
+import sys
+import threading
+
+# =======================
+# Collector Control / Query Server
+# =======================
+# Newline-delimited JSON over a Unix-domain socket (loopback TCP plus a
+# token on Windows, where asyncio has no AF_UNIX support). The server runs
+# its own asyncio loop on a daemon thread, so a slow client only ever
+# blocks its own connection, never the sampling loop. Requests are handled
+# on the loop's default executor, never on the loop itself.
+#
+# Requests                                      Response
+#   {"op": "samples", "since": c, "limit": n}   {"ok": true, "cursor": c, "items": [...]}
+#   {"op": "aggregates", "tier": "5m"|"1h"|"1d", "since": c, "limit": n}
+#   {"op": "flush"}                             compact the journal now
+#   {"op": "reset"}                             discard all history
+#   {"op": "aggregate"}                         close the current window now
+#   {"op": "set_interval", "collector": name|"emit", "seconds": s}
+#   {"op": "set_per_core", "ms": m}              per-core CPU capture period (100-500), 0 = off
+#   {"op": "stats"}                             scheduler stats and cursors
+#   {"op": "shutdown"}                          stop sampling; the collector exits
+#   {"op": "subscribe"}                         then one {"event": "sample", ...} per sample
+#
+# The endpoint ({"unix": path} or {"tcp": [host, port], "token": t}) is
+# written to the endpoint file for clients to discover.
+
+SUBSCRIBER_QUEUE = 64      # per-client backlog before old events are dropped
+MAX_LINE = 64 * 1024
+
+
+class ControlServer:
+    def __init__(self, recorder, scheduler, socket_path, endpoint_file, per_core=None):
+        self.recorder = recorder
+        self.scheduler = scheduler
+        self.per_core = per_core
+        self.socket_path = socket_path
+        self.endpoint_file = endpoint_file
+        self.token = None
+        self.loop = None
+        self._server = None
+        self._subscribers = set()
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ---- lifecycle (called from the sampling thread) ----
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread:
+            self._thread.join(timeout=2)
+        for path in (self.endpoint_file, self.socket_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def publish(self, seq, sample):
+        """ Push a new sample to every subscriber (thread-safe). """
+        if self.loop is not None and self._subscribers:
+            self.loop.call_soon_threadsafe(self._fanout, {"event": "sample", "seq": seq, "sample": sample})
+
+    # ---- event loop thread ----
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._listen())
+        except OSError:
+            self.loop = None
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            self.loop.close()
+
+    async def _listen(self):
+        if hasattr(asyncio, "start_unix_server") and sys.platform != "win32":
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+            old_umask = os.umask(0o077)   # socket readable by this user only
+            try:
+                self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_LINE)
+            finally:
+                os.umask(old_umask)
+            endpoint = {"unix": self.socket_path}
+        else:
+            self.token = secrets.token_hex(16)
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0, limit=MAX_LINE)
+            port = self._server.sockets[0].getsockname()[1]
+            endpoint = {"tcp": ["127.0.0.1", port], "token": self.token}
+
+        tmp = self.endpoint_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(endpoint, f)
+        os.replace(tmp, self.endpoint_file)
+
+    def _fanout(self, event):
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()     # slow client: drop its oldest event
+            queue.put_nowait(event)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    await self._send(writer, {"ok": False, "error": "invalid json"})
+                    continue
+                if self.token and req.get("token") != self.token:
+                    await self._send(writer, {"ok": False, "error": "unauthorized"})
+                    break
+                if req.get("op") == "subscribe":
+                    await self._stream(writer)
+                    break
+                # flush / reset / aggregate compact and fsync the journal
+                # under recorder.lock, and every recorder query waits on that
+                # lock: run requests on the default executor so a slow disk
+                # only holds up the client that asked, not the loop (other
+                # clients, subscribers).
+                response = await self.loop.run_in_executor(None, self._dispatch, req)
+                await self._send(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        try:
+            await self._send(writer, {"ok": True, "subscribed": True})
+            while True:
+                await self._send(writer, await queue.get())
+        finally:
+            self._subscribers.discard(queue)
+
+    async def _send(self, writer, obj):
+        writer.write((json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    def _dispatch(self, req):
+        op = req.get("op")
+        try:
+            if op == "samples":
+                cursor, items = self.recorder.since("samples", req.get("since"), req.get("limit"))
+                return {"ok": True, "cursor": cursor, "items": items}
+            if op == "aggregates":
+                tier = req.get("tier", "5m")
+                stream = "aggregates" if tier == "5m" else tier
+                cursor, items = self.recorder.since(stream, req.get("since"), req.get("limit"))
+                return {"ok": True, "cursor": cursor, "items": items}
+            if op == "flush":
+                self.recorder.flush()
+                return {"ok": True}
+            if op == "reset":
+                self.recorder.reset()
+                return {"ok": True}
+            if op == "aggregate":
+                return {"ok": True, "aggregate": self.recorder.force_aggregate()}
+            if op == "set_interval":
+                name, seconds = req["collector"], float(req["seconds"])
+                if seconds <= 0:
+                    raise ValueError("seconds must be positive")
+                if name == "emit":
+                    self.scheduler.set_emit_interval(seconds)
+                    self.recorder.set_emit_interval(seconds)
+                else:
+                    self.scheduler.set_period(name, seconds)
+                return {"ok": True}
+            if op == "set_per_core":
+                if self.per_core is None:
+                    return {"ok": False, "error": "per-core capture unavailable"}
+                try:
+                    self.per_core.set(req.get("ms"))
+                except ImportError:
+                    return {"ok": False, "error": "per-core capture needs numpy"}
+                except ValueError as e:
+                    return {"ok": False, "error": f"set_per_core: {e}"}
+                return {"ok": True, "ms": self.per_core.period_ms}
+            if op == "stats":
+                return {"ok": True, "collectors": self.scheduler.stats(), "cursors": dict(self.recorder.counts),
+                        "per_core_ms": self.per_core.period_ms if self.per_core else 0,
+                        "pid": os.getpid()}
+            if op == "shutdown":
+                self.scheduler.stop()
+                return {"ok": True}
+        except KeyError as e:
+            return {"ok": False, "error": f"unknown name: {e}"}
+        except (TypeError, ValueError) as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": f"unknown op: {op}"}
@@ -0,0 +1,100 @@
+import json
+import socket
+import sys
+
+from utils.constants import CONTROL_ENDPOINT_FILE
+
+# =======================
+# Collector Control Client
+# =======================
+# Blocking client for utils.control.ControlServer, usable from the GUI,
+# scripts or the command line:
+#   python -m utils.control_client samples limit=5
+#   python -m utils.control_client set_interval collector=disk seconds=120
+#   python -m utils.control_client subscribe
+
+
+class CollectorUnavailable(Exception):
+    pass
+
+
+def _endpoint():
+    try:
+        with open(CONTROL_ENDPOINT_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        raise CollectorUnavailable("Collector is not running.")
+
+
+def _connect(timeout):
+    ep = _endpoint()
+    try:
+        if "unix" in ep:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(ep["unix"])
+        else:
+            host, port = ep["tcp"]
+            sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError as e:
+        raise CollectorUnavailable(f"Collector is not reachable: {e}")
+    return sock, ep.get("token")
+
+
+def _send(sock, token, req):
+    if token:
+        req = dict(req, token=token)
+    sock.sendall((json.dumps(req) + "\n").encode("utf-8"))
+
+
+def request(op, timeout=5, **params):
+    """ One request/response round trip; returns the decoded response. """
+    sock, token = _connect(timeout)
+    with sock, sock.makefile("rb") as f:
+        _send(sock, token, dict(params, op=op))
+        line = f.readline()
+    if not line:
+        raise CollectorUnavailable("Collector closed the connection.")
+    return json.loads(line)
+
+
+def subscribe(timeout=None):
+    """ Yields each new sample event as the collector emits it. """
+    sock, token = _connect(5)
+    sock.settimeout(timeout)
+    with sock, sock.makefile("rb") as f:
+        _send(sock, token, {"op": "subscribe"})
+        for line in f:
+            msg = json.loads(line)
+            if msg.get("event"):
+                yield msg
+
+
+def main(argv):
+    if not argv:
+        print("usage: python -m utils.control_client <op> [key=value ...]")
+        return 2
+    op = argv[0]
+    params = {}
+    for arg in argv[1:]:
+        key, _, value = arg.partition("=")
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    try:
+        if op == "subscribe":
+            for event in subscribe():
+                print(json.dumps(event))
+        else:
+            print(json.dumps(request(op, **params), indent=2))
+    except CollectorUnavailable as e:
+        print(e)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
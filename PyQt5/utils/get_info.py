@@ -1,23 +1,62 @@
 import psutil
 import datetime
 import platform
-import time
-import json
 import os
-import collections
-from utils.constants import DATA_FILE
+import itertools
+import threading
+from utils.constants import JOURNAL_DIR, CONTROL_SOCKET, CONTROL_ENDPOINT_FILE, PER_CORE_CPU_MS
+from utils.process_sampler import ProcessSampler
+from utils.scheduler import SamplingScheduler
+from utils.aggregator import WindowAggregator
+from utils.rollup import RollupTiers
+from utils.journal import HistoryJournal, MAX_RAW_SAMPLES
 
 # =======================
 # Configuration
 # =======================
 SAMPLE_INTERVAL_SECONDS = 10
 AGGREGATE_EVERY_N_SAMPLES = 30   # 5 minutes
-MAX_RAW_SAMPLES = 120            # ~20 mins of raw data
 TOP_PROCESSES_AGG = 50
-MAX_AGGREGATED_RECORDS = 50
+
+# Per-collector (period seconds, cost budget ms). Cheap counters follow the
+# sample interval; disk, sensors and the process scan change far more slowly.
+COLLECTORS = {
+    "cpu":       (10, 5),
+    "cpu_freq":  (60, 20),
+    "memory":    (10, 5),
+    "network":   (10, 5),
+    "disk":      (60, 20),
+    "temps":     (30, 50),
+    "processes": (30, 250),
+}
+# A sample can't be built without these, so nothing is emitted until each
+# has produced a value. The others start from a placeholder: a sensor read
+# or process scan that fails doesn't hold samples back.
+REQUIRED_COLLECTORS = ("cpu", "memory", "network", "disk")
+COLLECTOR_DEFAULTS = {
+    "temps": {"available": False, "reason": "error"},
+    "processes": [],
+}
+
+# Optional per-core capture at 100-500 ms (needs numpy); 0 disables it.
+# Set with AIDM_PER_CORE_MS, or on a running collector with the control
+# server's set_per_core op.
+try:
+    HIGH_RATE_CPU_MS = int(PER_CORE_CPU_MS)
+except ValueError:
+    HIGH_RATE_CPU_MS = 0
+# MAX_RAW_SAMPLES (~20 mins of raw data) and MAX_AGGREGATED_RECORDS live in
+# utils.journal so the GUI-side reader applies the same bounds.
+
+# Samples more than this many emit intervals apart mark a gap (collector
+# stopped, machine asleep). The open 5 min window is closed at a gap rather
+# than spanning it. Measured against the current interval, which the
+# control server's set_interval can change at run time
+# (Recorder.set_emit_interval).
+GAP_AFTER_INTERVALS = 3
 
 # =======================
-# Metric Functions (UNCHANGED)
+# Metric Functions
 # =======================
 
 NUM_CORES = psutil.cpu_count(logical=True)
@@ -99,190 +138,274 @@ def get_cpu_temps():
     }
 
 
+_process_sampler = None
+
 def get_processes_info():
-    procs = []
-    for p in psutil.process_iter(attrs=["pid", "name", "cpu_percent", "memory_percent"]):
-        try:
-            cpu_raw = p.info["cpu_percent"]
-            if cpu_raw is None:
-                continue
-
-            procs.append({
-                "pid": p.info["pid"],
-                "name": p.info["name"],
-                "cpu_percent_raw": cpu_raw,
-                "cpu_percent_norm": round(cpu_raw / NUM_CORES, 2),
-                "memory_percent": p.info["memory_percent"]
-            })
-        except Exception:
-            pass
+    global _process_sampler
+    if _process_sampler is None:
+        _process_sampler = ProcessSampler(top_k=20, num_cores=NUM_CORES)
+    return _process_sampler.scan()
 
-    procs.sort(key=lambda x: x["cpu_percent_norm"], reverse=True)
-    return procs[:20]
+def get_process_scan_stats():
+    return _process_sampler.stats() if _process_sampler else None
 
 
 # =======================
-# Aggregation Logic (REWORKED)
+# Aggregation Logic (STREAMING)
 # =======================
 def aggregate_samples(samples):
-    cpu_vals = [s["cpu"]["usage"] for s in samples]
-    mem_vals = [s["memory"]["ram"]["percent"] for s in samples]
-    disk_vals = [s["disk"]["percent"] for s in samples]
-
-    # --- Network deltas ---
-    tx_vals = [s["network"]["bytes_sent"] for s in samples]
-    rx_vals = [s["network"]["bytes_recv"] for s in samples]
-
-    network_delta = {
-        "tx_bytes": tx_vals[-1] - tx_vals[0],
-        "rx_bytes": rx_vals[-1] - rx_vals[0]
-    }
-
-    # --- Temperature aggregation ---
-    temp_curr = []
-    temp_max = []
-    per_sensor = {}
-
+    """ Aggregate a complete list of samples in one call.
+        The collector loop feeds WindowAggregator directly instead.
+    """
+    agg = WindowAggregator(len(samples), SAMPLE_INTERVAL_SECONDS, TOP_PROCESSES_AGG)
     for s in samples:
-        temps = s["temps"]
-        if temps.get("available"):
-            for sensor, entries in temps["sensors"].items():
-                per_sensor.setdefault(sensor, {"current": [], "max": []})
-                for e in entries:
-                    if e["current"] is not None:
-                        temp_curr.append(e["current"])
-                        per_sensor[sensor]["current"].append(e["current"])
-                    if e["max"] is not None:
-                        temp_max.append(e["max"])
-                        per_sensor[sensor]["max"].append(e["max"])
-
-    if temp_curr:
-        temp_block = {
-            "available": True,
-            "avg_c": round(sum(temp_curr) / len(temp_curr), 2),
-            "max_c": max(temp_max) if temp_max else None,
-            "per_sensor": {
-                k: {
-                    "avg": round(sum(v["current"]) / len(v["current"]), 2) if v["current"] else None,
-                    "max": max(v["max"]) if v["max"] else None
-                }
-                for k, v in per_sensor.items()
-            }
-        }
-    else:
-        temp_block = {"available": False}
-
-
-    # --- Process aggregation ---
-    proc_map = {}
+        agg.add(s)
+    return agg.close()
 
+# =======================
+# Sample Assembly
+# =======================
+def build_sample(latest, per_core=None):
+    """ Merge the most recent value of every collector into one sample. """
+    cpu = {
+        "usage": latest["cpu"],
+        "freq": latest["cpu_freq"]
+    }
+    reduced = per_core.reduce() if per_core is not None else None
+    if reduced is not None:
+        cpu["per_core"] = reduced
+    return {
+        "ts": datetime.datetime.now().isoformat(),
+        "cpu": cpu,
+        "memory": latest["memory"],
+        "disk": latest["disk"],
+        "network": latest["network"],
+        "temps": latest["temps"],
+        "processes": latest["processes"] or [],
+        "process_scan": get_process_scan_stats()
+    }
 
-    for s in samples:
-        for p in s["processes"]:
-            pid = p["pid"]
-            if pid not in proc_map:
-                proc_map[pid] = {
-                    "name": p["name"],
-                    "cpu": []
-                }
-            proc_map.setdefault(p["pid"], {
-                "name": p["name"],
-                "cpu": []
-            })["cpu"].append(p["cpu_percent_norm"])
-    
-    top_procs = sorted(
-        (
-            {
-                "pid": pid,
-                "name": data["name"],
-                "avg_cpu": round(sum(data["cpu"]) / len(data["cpu"]), 2)
-            }
-            for pid, data in proc_map.items()
-        ),
-        key=lambda x: x["avg_cpu"],
-        reverse=True
-    )[:TOP_PROCESSES_AGG]
 
-    return {
-        "window": {
-            "start": samples[0]["ts"],
-            "end": samples[-1]["ts"],
-            "duration_sec": SAMPLE_INTERVAL_SECONDS * len(samples)
-        },
-        "cpu": {
-            "avg": round(sum(cpu_vals) / len(cpu_vals), 2),
-            "min": min(cpu_vals),
-            "max": max(cpu_vals),
-            "std": round((sum((x - sum(cpu_vals)/len(cpu_vals))**2 for x in cpu_vals) / len(cpu_vals))**0.5, 2)
-        },
-        "memory_avg_percent": round(sum(mem_vals) / len(mem_vals), 2),
-        "disk_avg_percent": round(sum(disk_vals) / len(disk_vals), 2),
-        "network_delta": network_delta,
-        "temps": temp_block,
-        "top_processes_avg_cpu": top_procs
+class Recorder:
+    """ Journals samples and closes 5 min windows / rollup tiers.
+
+        All state changes go through self.lock so the control server
+        thread can read consistent slices while the loop keeps sampling.
+
+        History persists across restarts: the journal replays its newest
+        segment, and samples newer than the last aggregate go back into
+        the open window, so a restart costs neither the retained data nor
+        the part-built 5 minute window.
+    """
+
+    def __init__(self, journal, per_core=None):
+        self.journal = journal
+        self.lock = threading.Lock()
+        self.per_core = per_core    # hf_cpu.PerCoreSwitch, sized to the emit interval
+        self.recent_samples = journal.state.recent_samples
+        self.window = WindowAggregator(AGGREGATE_EVERY_N_SAMPLES, SAMPLE_INTERVAL_SECONDS, TOP_PROCESSES_AGG)
+        self.gap_after_sec = GAP_AFTER_INTERVALS * SAMPLE_INTERVAL_SECONDS
+        self.rollups = RollupTiers(SAMPLE_INTERVAL_SECONDS, TOP_PROCESSES_AGG)
+        self.rollups.rehydrate(journal.state.aggregates, journal.state.tiers)
+        # Sequence number of the newest record in each stream (cursors)
+        self.counts = {"samples": len(self.recent_samples), "aggregates": len(journal.state.aggregates)}
+        for name, ring in journal.state.tiers.items():
+            self.counts[name] = len(ring)
+        self._resume_window()
+        # The first sample after a restart is compared with the last one
+        # on disk; a gap there means the collector was not running
+        self._gap_reason = "stopped"
+
+    def _resume_window(self):
+        aggregates = self.journal.state.aggregates
+        last_end = aggregates[-1]["window"]["end"] if aggregates else None
+        for s in self.recent_samples:
+            if last_end is None or s["ts"] > last_end:
+                self.window.add(s)
+        if self.window.is_full():
+            self._close_window()
+
+    def _check_gap(self, sample):
+        reason, self._gap_reason = self._gap_reason, "stalled"
+        if not self.recent_samples:
+            return
+        prev_ts = self.recent_samples[-1]["ts"]
+        try:
+            seconds = (datetime.datetime.fromisoformat(sample["ts"])
+                       - datetime.datetime.fromisoformat(prev_ts)).total_seconds()
+        except (TypeError, ValueError):
+            return
+        if seconds <= self.gap_after_sec:
+            return
+        # Don't let a 5 min window (or its network deltas) span the gap
+        self._close_window()
+        self.journal.append_gap({"start": prev_ts, "end": sample["ts"],
+                                 "seconds": round(seconds, 1), "reason": reason})
+
+    def record(self, sample):
+        with self.lock:
+            self._check_gap(sample)
+            # Each record is appended once; the journal keeps the bounded
+            # recent_samples / aggregates view (deque maxlen trims aggregates).
+            self.journal.append_sample(sample)
+            self.counts["samples"] += 1
+            self.window.add(sample)
+
+            # Consecutive, non-overlapping windows: every sample is folded
+            # into exactly one aggregate.
+            if self.window.is_full():
+                self._close_window()
+
+    def set_emit_interval(self, seconds):
+        """ A new emit interval: what the open windows count each sample
+            as, the gap threshold and the per-core ring all follow it.
+        """
+        with self.lock:
+            self.window.sample_interval = seconds
+            for window in self.rollups.pending.values():
+                window.sample_interval = seconds
+            self.gap_after_sec = GAP_AFTER_INTERVALS * seconds
+            if self.per_core is not None:
+                self.per_core.set_window(seconds)
+
+    def force_aggregate(self):
+        """ Close the current (possibly partial) window now. """
+        with self.lock:
+            return self._close_window()
+
+    def flush(self):
+        with self.lock:
+            self.journal.compact()
+
+    def reset(self):
+        """ Discard all history; sampling carries on into an empty journal.
+            Cursors keep counting up, so clients just see no older records.
+        """
+        with self.lock:
+            self.journal.reset()
+            self.window.reset()
+            self.rollups.rehydrate([], {})
+
+    def _close_window(self):
+        aggregate = self.window.close()
+        if aggregate is None:
+            return None
+        self.journal.append_aggregate(aggregate)
+        self.counts["aggregates"] += 1
+        # 5 min -> 1 h -> 1 d, merged from accumulators only
+        for tier, record in self.rollups.add(aggregate):
+            self.journal.append_rollup(tier, record)
+            self.counts[tier] += 1
+
+        if len(self.recent_samples) >= MAX_RAW_SAMPLES:
+            self.journal.drop_samples(AGGREGATE_EVERY_N_SAMPLES)
+        return aggregate
+
+    def since(self, stream, cursor=None, limit=None):
+        """ (cursor, items) for records newer than cursor, oldest first;
+            without a cursor, the latest `limit` records.
+        """
+        state = self.journal.state
+        with self.lock:
+            if stream == "samples":
+                ring = state.recent_samples
+            elif stream == "aggregates":
+                ring = state.aggregates
+            else:
+                ring = state.tiers[stream]
+            last = self.counts[stream]
+            first = last - len(ring) + 1
+            if cursor is None:
+                skip = max(0, len(ring) - (limit or len(ring)))
+            else:
+                skip = max(0, cursor + 1 - first)
+            items = list(itertools.islice(ring, skip, None))
+        if cursor is not None and limit:
+            items = items[:limit]
+            last = first + skip + len(items) - 1 if items else cursor
+        return last, items
+
+
+def build_scheduler():
+    scheduler = SamplingScheduler(SAMPLE_INTERVAL_SECONDS)
+    functions = {
+        "cpu": get_cpu_usage,
+        "cpu_freq": get_cpu_freq,
+        "memory": get_memory_info,
+        "network": get_network_info,
+        "disk": get_disk_info,
+        "temps": get_cpu_temps,
+        "processes": get_processes_info,
     }
+    for name, fn in functions.items():
+        period, budget_ms = COLLECTORS[name]
+        scheduler.register(name, fn, period, budget_ms,
+                           default=COLLECTOR_DEFAULTS.get(name),
+                           required=name in REQUIRED_COLLECTORS)
+    return scheduler
+
 
 # =======================
 # Main Loop
 # =======================
 def main():
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
     psutil.cpu_percent(interval=None)
 
-    state = {
-        "recent_samples": collections.deque(maxlen=MAX_RAW_SAMPLES),
-        "aggregates": []
-    }
+    journal = HistoryJournal(JOURNAL_DIR, {
+        "hostname": platform.node(),
+        "os": platform.system(),
+        "arch": platform.machine(),
+        "boot_time": psutil.boot_time()
+    })
+    from utils.hf_cpu import PerCoreSwitch
+    per_core = PerCoreSwitch(SAMPLE_INTERVAL_SECONDS)
+    if HIGH_RATE_CPU_MS:
+        try:
+            per_core.set(HIGH_RATE_CPU_MS)
+        except ImportError:
+            pass
+        except ValueError as e:
+            print(f"AIDM_PER_CORE_MS ignored: {e}")
+    recorder = Recorder(journal, per_core)
+    scheduler = build_scheduler()
 
+    # Live view for the GUI; the journal remains the durable copy.
     try:
-        while True:
-            sample = {
-                "ts": datetime.datetime.now().isoformat(),
-                "cpu": {
-                    "usage": get_cpu_usage(),
-                    "freq": get_cpu_freq()
-                },
-                "memory": get_memory_info(),
-                "disk": get_disk_info(),
-                "network": get_network_info(),
-                "temps": get_cpu_temps(),
-                "processes": get_processes_info()
-            }
-
-            state["recent_samples"].append(sample)
-
-            if len(state["recent_samples"]) > 0 and  len(state["recent_samples"]) % AGGREGATE_EVERY_N_SAMPLES == 0:
-                block = list(state["recent_samples"])[:AGGREGATE_EVERY_N_SAMPLES]
-                state["aggregates"].append(aggregate_samples(block))
-
-                if len(state["recent_samples"]) >= MAX_RAW_SAMPLES:
-                    for _ in range(AGGREGATE_EVERY_N_SAMPLES):
-                        state["recent_samples"].popleft()
-
-                if len(state["aggregates"]) > MAX_AGGREGATED_RECORDS:
-                    state["aggregates"] = state["aggregates"][-MAX_AGGREGATED_RECORDS:]
-
-            payload = {
-                "schema_version": "3.0",
-                "machine": {
-                    "hostname": platform.node(),
-                    "os": platform.system(),
-                    "arch": platform.machine(),
-                    "boot_time": psutil.boot_time()
-                },
-                "data": {
-                    "recent_samples": list(state["recent_samples"]),
-                    "aggregates": state["aggregates"]
-                }
-            }
-
-            with open(DATA_FILE, "w") as f:
-                json.dump(payload, f, indent=2)
-
-            time.sleep(SAMPLE_INTERVAL_SECONDS)
+        from utils.live_ring import LiveRingWriter
+        live = LiveRingWriter()
+    except (ImportError, OSError):
+        live = None
+
+    # Query/control API for the GUI, CLI and exporters
+    from utils.control import ControlServer
+    control = ControlServer(recorder, scheduler, CONTROL_SOCKET, CONTROL_ENDPOINT_FILE, per_core)
+    control.start()
+
+    def emit(latest):
+        sample = build_sample(latest, per_core)
+        recorder.record(sample)
+        if live:
+            live.publish(sample, journal.state.complete_aggregates())
+        control.publish(recorder.counts["samples"], sample)
+
+    # SIGTERM (collector_daemon.stop, logout of the OS session) ends the
+    # loop the same way as the control server's "shutdown"
+    if threading.current_thread() is threading.main_thread():
+        import signal
+        for name in ("SIGTERM", "SIGBREAK"):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), lambda *_: scheduler.stop())
 
+    try:
+        scheduler.run(emit)
     except KeyboardInterrupt:
         pass
+    finally:
+        control.stop()
+        per_core.stop()
+        if live:
+            live.close()
+        journal.close()
 
 if __name__ == "__main__":
     main()
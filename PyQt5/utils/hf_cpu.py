@@ -0,0 +1,159 @@
+import threading
+import time
+
+import psutil
+
+# =======================
+# High-rate Per-core CPU Capture (optional)
+# =======================
+# A background thread reads psutil.cpu_percent(percpu=True) every
+# period_ms into a preallocated NumPy ring (rows = ticks, cols = cores).
+# reduce() summarizes the ticks since the previous call into per-core
+# mean / max / p95 and seconds spent above SATURATION_PERCENT.
+#
+# The ring holds two emit intervals of ticks; when the interval changes,
+# resize() re-sizes it so a slower emit loop doesn't lose ticks.
+
+SATURATION_PERCENT = 90.0
+MIN_PERIOD_MS = 100
+MAX_PERIOD_MS = 500
+
+
+def _capacity(window_sec, period):
+    # Two windows of headroom so a late reduce() loses nothing
+    return max(2, int(2 * window_sec / period))
+
+
+class PerCoreCapture:
+    def __init__(self, period_ms=250, window_sec=10):
+        import numpy as np  # only needed when the mode is enabled
+        self.np = np
+        self.period = period_ms / 1000.0
+        self.cores = psutil.cpu_count(logical=True) or 1
+        self.capacity = _capacity(window_sec, self.period)
+        self.ring = np.zeros((self.capacity, self.cores), dtype=np.float32)
+        self.written = 0         # total ticks ever written
+        self.reduced = 0         # ticks already consumed by reduce()
+        self.tick_cost = 0.0     # seconds spent inside ticks since last reduce
+        self.ticks = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._thread = threading.Thread(target=self._loop, name="per-core-cpu", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _loop(self):
+        next_tick = time.monotonic() + self.period
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            t0 = time.perf_counter()
+            values = psutil.cpu_percent(interval=None, percpu=True)
+            with self._lock:
+                self.ring[self.written % self.capacity, :len(values)] = values
+                self.written += 1
+                self.ticks += 1
+                self.tick_cost += time.perf_counter() - t0
+            next_tick += self.period
+            if next_tick < time.monotonic():
+                next_tick = time.monotonic() + self.period
+
+    def resize(self, window_sec):
+        """ Re-size the ring for a new emit interval, keeping the ticks
+            not reduced yet (the newest ones, if they no longer fit).
+        """
+        np = self.np
+        capacity = _capacity(window_sec, self.period)
+        with self._lock:
+            if capacity == self.capacity:
+                return
+            kept = np.arange(max(self.reduced, self.written - self.capacity, self.written - capacity), self.written)
+            ring = np.zeros((capacity, self.cores), dtype=np.float32)
+            ring[kept % capacity] = self.ring[kept % self.capacity]
+            self.ring = ring
+            self.capacity = capacity
+
+    def reduce(self):
+        """ Per-core stats over the ticks since the previous call, or None. """
+        np = self.np
+        with self._lock:
+            start = max(self.reduced, self.written - self.capacity)
+            end = self.written
+            idx = np.arange(start, end) % self.capacity
+            block = self.ring[idx]   # fancy indexing copies, so unlock after
+            ticks, cost = self.ticks, self.tick_cost
+            self.reduced = end
+            self.ticks = 0
+            self.tick_cost = 0.0
+
+        if block.shape[0] == 0:
+            return None
+        # float32 values would come out of tolist() as 12.300000190734863
+        block = block.astype(np.float64)
+        return {
+            "period_ms": round(self.period * 1000),
+            "ticks": int(block.shape[0]),
+            "mean": np.round(block.mean(axis=0), 1).tolist(),
+            "max": np.round(block.max(axis=0), 1).tolist(),
+            "p95": np.round(np.percentile(block, 95, axis=0), 1).tolist(),
+            "above_90_sec": np.round((block > SATURATION_PERCENT).sum(axis=0) * self.period, 2).tolist(),
+            "overhead": {
+                "avg_tick_us": round(cost / ticks * 1e6, 1) if ticks else 0.0,
+                "cpu_fraction": round(cost / (ticks * self.period), 5) if ticks else 0.0
+            }
+        }
+
+
+class PerCoreSwitch:
+    """ The capture as a runtime setting, shared by the sampling loop and
+        the control server: set(period_ms) starts it, restarts it at a new
+        period, or (0) stops it. reduce() is None while it is off.
+        window_sec is the emit interval; set_window() follows changes to it.
+    """
+
+    def __init__(self, window_sec):
+        self.window_sec = window_sec
+        self.capture = None
+        self._lock = threading.Lock()
+
+    @property
+    def period_ms(self):
+        capture = self.capture
+        return round(capture.period * 1000) if capture else 0
+
+    def set(self, period_ms):
+        """ Raises ImportError (no NumPy) or ValueError (bad period). """
+        try:
+            period_ms = int(period_ms)
+        except (TypeError, ValueError):
+            raise ValueError(f"ms must be a number, got {period_ms!r}")
+        if period_ms and not MIN_PERIOD_MS <= period_ms <= MAX_PERIOD_MS:
+            raise ValueError(f"ms must be 0 (off) or {MIN_PERIOD_MS}-{MAX_PERIOD_MS}, got {period_ms}")
+        capture = PerCoreCapture(period_ms, self.window_sec) if period_ms else None
+        with self._lock:
+            old, self.capture = self.capture, capture
+        if old:
+            old.stop()
+        if capture:
+            capture.start()
+
+    def set_window(self, window_sec):
+        with self._lock:
+            self.window_sec = window_sec
+            capture = self.capture
+        if capture:
+            capture.resize(window_sec)
+
+    def reduce(self):
+        with self._lock:
+            capture = self.capture
+        return capture.reduce() if capture else None
+
+    def stop(self):
+        self.set(0)
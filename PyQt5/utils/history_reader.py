@@ -0,0 +1,131 @@
+import threading
+
+from utils.constants import JOURNAL_DIR
+from utils.journal import JournalReader
+
+# =======================
+# Shared history reader
+# =======================
+# One JournalReader per process, shared by the graphs window, the
+# dashboard's upload-quota check and the packager (which reads it from the
+# upload thread). refresh() is a listdir plus a size check when nothing
+# was appended, and parses only the new lines when something was. Every
+# change bumps `version`; the snapshot and the series accessors are
+# computed once per version and returned from cache until the next one.
+# The series are read column by column from the journal's columnar
+# snapshot; only snapshot() expands it into records.
+#
+# Returned lists and dicts are shared between callers: treat them as
+# read-only.
+
+
+class HistoryReader:
+    def __init__(self, directory=JOURNAL_DIR):
+        self.directory = directory
+        self.version = 0
+        self._reader = JournalReader(directory)
+        self._lock = threading.RLock()
+        self._cache = {}
+
+    def refresh(self):
+        """ Pick up new journal records; returns True when anything changed. """
+        with self._lock:
+            changed = self._reader.refresh()
+            if changed:
+                self.version += 1
+                self._cache.clear()
+            return changed
+
+    def _cached(self, key, build):
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is None or hit[0] != self.version:
+                hit = (self.version, build(self._reader.state))
+                self._cache[key] = hit
+            return hit[1]
+
+    # ---- whole history ----
+    def has_data(self):
+        with self._lock:
+            return self._reader.has_data()
+
+    def snapshot(self):
+        """ The v3 history payload, or None when there is no journal. """
+        if not self.has_data():
+            return None
+        return self._cached("snapshot", lambda state: state.payload())
+
+    def sample_cursor(self):
+        """ (segment, samples read from it): the count moves by one per
+            new raw sample. A new segment (compaction, reset) starts a new
+            count, so a cursor from another segment means "reload".
+        """
+        with self._lock:
+            return self._reader.segment, self._reader.state.samples_seen
+
+    # ---- accessors ----
+    def sample_count(self):
+        with self._lock:
+            return len(self._reader.state.recent_samples)
+
+    def aggregate_count(self):
+        """ Complete (non-partial) 5 minute windows. """
+        with self._lock:
+            return self._reader.state.complete_aggregates()
+
+    def cpu_series(self):
+        """ CPU usage (%) of every retained raw sample, oldest first. """
+        return self._cached("cpu", lambda state: [
+            v or 0 for v in state.recent_samples.column("cpu", "usage")
+        ])
+
+    def network_counters(self):
+        """ (bytes_sent, bytes_recv): cumulative counters per raw sample. """
+        def build(state):
+            samples = state.recent_samples
+            return ([v or 0 for v in samples.column("network", "bytes_sent")],
+                    [v or 0 for v in samples.column("network", "bytes_recv")])
+        return self._cached("network", build)
+
+    def sample_series(self):
+        """ sample_cursor(), cpu_series() and network_counters() read
+            together, so another thread's refresh can't fall between them.
+        """
+        with self._lock:
+            return self.sample_cursor(), self.cpu_series(), self.network_counters()
+
+    def _latest(self):
+        with self._lock:
+            samples = self._reader.state.recent_samples
+            return samples[-1] if samples else {}
+
+    def latest_memory(self):
+        """ RAM percent of the newest sample (0 without samples). """
+        return self._latest().get("memory", {}).get("ram", {}).get("percent", 0)
+
+    def latest_disk(self):
+        return self._latest().get("disk", {}).get("percent", 0)
+
+    def top_processes(self, n=5):
+        """ Processes of the newest sample, by CPU; n=None for all of them. """
+        return self._latest().get("processes", [])[:n]
+
+    def time_levels(self):
+        """ CPU over time per level, finest first (utils.time_index). """
+        from utils.time_index import build_levels
+        return self._cached("levels", lambda state: build_levels(
+            state.recent_samples, state.aggregates, state.tiers
+        ))
+
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def get_reader():
+    """ The process-wide reader of JOURNAL_DIR. """
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = HistoryReader()
+        return _reader
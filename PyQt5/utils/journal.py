@@ -0,0 +1,417 @@
+import os
+import json
+import collections
+from utils.rollup import TIERS
+from utils.columnar import SCHEMA_V3, SCHEMA_V4, to_v4, column, decode_table
+
+# =======================
+# Configuration
+# =======================
+SCHEMA_VERSION = SCHEMA_V4      # on disk; readers still get the v3 view
+SEGMENT_PREFIX = "seg-"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_MAX_RECORDS = 360        # rotate + compact roughly once an hour
+MAX_RAW_SAMPLES = 120
+MAX_AGGREGATED_RECORDS = 50
+MAX_GAPS = 100
+
+# Record types, one JSON object per line:
+#   {"t": "h", "v": {...}}   segment header (schema_version + machine)
+#   {"t": "s", "v": {...}}   raw sample
+#   {"t": "a", "v": {...}}   aggregate (5 minute tier)
+#   {"t": "r", "k": "1h", "v": {...}}   rollup tier record
+#   {"t": "d", "n": 30}      drop n oldest raw samples
+#   {"t": "g", "v": {...}}   gap in sampling: {"start", "end", "seconds", "reason"}
+#   {"t": "c", "v": {...}}   columnar snapshot (schema v4 "strings" + "data")
+#
+# Every segment starts with a header followed by a compacted copy of the
+# retained state, so a reader only ever needs the newest segment. Since
+# schema 4.0 that copy is a single "c" record; 3.0 segments wrote it as
+# individual s / a / r records and still load. Appends between compactions
+# stay one row per line so each sample is durable on its own.
+#
+# A reader keeps the "c" snapshot columnar (_Rows): the graphs read their
+# columns straight from it, and it is only expanded into row dicts when
+# something walks the records (an upload snapshot, the collector itself).
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _segment_name(seq):
+    return f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory):
+    """ Sorted list of (seq, path) for the segments in directory. """
+    if not os.path.isdir(directory):
+        return []
+    segments = []
+    for name in os.listdir(directory):
+        if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+            continue
+        try:
+            seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        except ValueError:
+            continue
+        segments.append((seq, os.path.join(directory, name)))
+    segments.sort()
+    return segments
+
+
+def clear_journal(directory):
+    """ Remove every segment (explicit history reset). """
+    for _, path in list_segments(directory):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _field(record, path):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+class _Rows:
+    """ A bounded record stream, like deque(maxlen=...), whose oldest part
+        can still be a columnar table from a "c" record.
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._table = None          # (table, strings)
+        self._start = 0             # first retained record of the table
+        self._rows = collections.deque()
+
+    def _table_len(self):
+        return self._table[0]["n"] - self._start if self._table else 0
+
+    def __len__(self):
+        return self._table_len() + len(self._rows)
+
+    def _trim(self):
+        extra = len(self) - self.maxlen
+        if extra > 0:
+            self.drop(extra)
+
+    def load(self, table, strings):
+        """ Append the records of a columnar table without expanding them. """
+        n = table["n"]
+        if len(self) or n > self.maxlen:
+            # Only the newest maxlen are kept: decode just those, so the
+            # rest of the parsed table can be freed
+            self.extend(decode_table(table, strings, max(0, n - self.maxlen)))
+            return
+        self._table = (table, strings)
+        self._start = 0
+
+    def append(self, record):
+        self._rows.append(record)
+        self._trim()
+
+    def extend(self, records):
+        self._rows.extend(records)
+        self._trim()
+
+    def drop(self, n):
+        """ Remove the n oldest records. """
+        from_table = min(n, self._table_len())
+        self._start += from_table
+        if self._table and not self._table_len():
+            self._table, self._start = None, 0
+        for _ in range(min(n - from_table, len(self._rows))):
+            self._rows.popleft()
+
+    def clear(self):
+        self._table, self._start = None, 0
+        self._rows.clear()
+
+    def _expand(self):
+        if self._table:
+            table, strings = self._table
+            self._rows.extendleft(reversed(decode_table(table, strings, self._start)))
+            self._table, self._start = None, 0
+
+    def __iter__(self):
+        self._expand()
+        return iter(self._rows)
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("record index out of range")
+        base = self._table_len()
+        if i >= base:
+            return self._rows[i - base]
+        table, strings = self._table
+        return decode_table(table, strings, self._start + i, self._start + i + 1)[0]
+
+    def column(self, *path):
+        """ One field of every record (None where missing), e.g.
+            column("cpu", "usage"); the table part is not expanded.
+        """
+        values = column(*self._table, *path)[self._start:] if self._table else []
+        return values + [_field(r, path) for r in self._rows]
+
+
+class _State:
+    """ Replays journal records into the v3 recent_samples / aggregates view. """
+
+    def __init__(self):
+        self.header = {}
+        self.recent_samples = _Rows(MAX_RAW_SAMPLES)
+        self.aggregates = _Rows(MAX_AGGREGATED_RECORDS)
+        self.tiers = {name: _Rows(keep) for name, _, keep in TIERS}
+        self.gaps = _Rows(MAX_GAPS)
+        self.samples_seen = 0       # raw samples applied, dropped ones included
+
+    def clear(self):
+        """ Empty every stream in place (callers keep references to them). """
+        self.recent_samples.clear()
+        self.aggregates.clear()
+        for ring in self.tiers.values():
+            ring.clear()
+        self.gaps.clear()
+
+    def apply(self, rec):
+        t = rec.get("t")
+        if t == "s":
+            self.recent_samples.append(rec["v"])
+            self.samples_seen += 1
+        elif t == "a":
+            self.aggregates.append(rec["v"])
+        elif t == "r":
+            ring = self.tiers.get(rec.get("k"))
+            if ring is not None:
+                ring.append(rec["v"])
+        elif t == "d":
+            self.recent_samples.drop(rec.get("n", 0))
+        elif t == "g":
+            self.gaps.append(rec["v"])
+        elif t == "c":
+            strings = rec["v"].get("strings", [])
+            data = rec["v"].get("data", {})
+            streams = [(self.recent_samples, data.get("recent_samples")),
+                       (self.aggregates, data.get("aggregates")),
+                       (self.gaps, data.get("gaps"))]
+            streams += [(self.tiers[name], table) for name, table in data.get("tiers", {}).items()
+                        if name in self.tiers]
+            for stream, table in streams:
+                if table:
+                    stream.load(table, strings)
+            if data.get("recent_samples"):
+                self.samples_seen += data["recent_samples"]["n"]
+        elif t == "h":
+            self.header = rec.get("v", {})
+
+    def records(self):
+        v4 = to_v4(self.payload())
+        yield {"t": "c", "v": {"strings": v4["strings"], "data": v4["data"]}}
+
+    def complete_aggregates(self):
+        """ 5 minute windows that ran their full length (not cut short by
+            a gap or a forced close): what the upload minimum counts.
+        """
+        return sum(1 for partial in self.aggregates.column("window", "partial") if not partial)
+
+    def payload(self):
+        return {
+            "schema_version": SCHEMA_V3,
+            "machine": self.header.get("machine", {}),
+            "data": {
+                "recent_samples": list(self.recent_samples),
+                "aggregates": list(self.aggregates),
+                "tiers": {name: list(ring) for name, ring in self.tiers.items()},
+                "gaps": list(self.gaps)
+            }
+        }
+
+
+# =======================
+# Writer
+# =======================
+class HistoryJournal:
+    """ Append-only, segmented history store.
+
+        Each record is written once as a single line and fsync'd. When the
+        active segment reaches SEGMENT_MAX_RECORDS appends it is compacted:
+        the retained state is written to a temp file, atomically renamed to
+        the next segment, and older segments are deleted.
+    """
+
+    def __init__(self, directory, machine, max_records=SEGMENT_MAX_RECORDS):
+        self.directory = directory
+        self.machine = machine
+        self.max_records = max_records
+        self.state = _State()
+        self.state.header = {"schema_version": SCHEMA_VERSION, "machine": machine}
+        self._fd = None
+        self._seq = 0
+        self._appended = 0
+        os.makedirs(directory, exist_ok=True)
+
+        segments = list_segments(directory)
+        if segments:
+            self._seq = segments[-1][0]
+            _load_segment(segments[-1][1], self.state)
+            self.state.header = {"schema_version": SCHEMA_VERSION, "machine": machine}
+        self.compact()
+
+    def append_sample(self, sample):
+        self._append({"t": "s", "v": sample})
+
+    def append_aggregate(self, aggregate):
+        self._append({"t": "a", "v": aggregate})
+
+    def append_rollup(self, tier, record):
+        self._append({"t": "r", "k": tier, "v": record})
+
+    def drop_samples(self, n):
+        self._append({"t": "d", "n": n})
+
+    def append_gap(self, gap):
+        self._append({"t": "g", "v": gap})
+
+    def reset(self):
+        """ Discard all history (explicit user reset) and start a new,
+            empty segment.
+        """
+        self.state.clear()
+        self.compact()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _append(self, rec):
+        self.state.apply(rec)
+        if self._appended >= self.max_records:
+            self.compact()
+            return
+        os.write(self._fd, (_dumps(rec) + "\n").encode("utf-8"))
+        os.fsync(self._fd)
+        self._appended += 1
+
+    def compact(self):
+        """ Start a new segment holding only the retained state. """
+        self.close()
+        old = list_segments(self.directory)
+        self._seq += 1
+        path = os.path.join(self.directory, _segment_name(self._seq))
+        tmp = path + ".tmp"
+
+        lines = [_dumps({"t": "h", "v": self.state.header})]
+        lines.extend(_dumps(r) for r in self.state.records())
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        # Readers only open the newest segment, so one that can't be removed
+        # yet (Windows: a GUI reader has it open) is left for the next
+        # compaction, which lists it again.
+        for _, old_path in old:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self._appended = 0
+
+
+def _load_segment(path, state, offset=0):
+    """ Apply complete lines from path starting at offset.
+        Returns the offset just past the last complete line; a torn
+        trailing line (crash mid-write) is left for the next read.
+    """
+    # Line by line from the file: a compacted segment is mostly one long
+    # "c" line, and reading the whole chunk first would hold a second copy
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                state.apply(json.loads(line))
+            except ValueError:
+                continue
+    return offset
+
+
+# =======================
+# Reader
+# =======================
+class JournalReader:
+    """ Incremental reader: only bytes appended since the last refresh are
+        parsed. A newer segment (after compaction) is read from its start,
+        which is bounded by the retained window.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.state = _State()
+        self._seq = None
+        self._offset = 0
+
+    def refresh(self):
+        """ Returns True when new records were applied. """
+        segments = list_segments(self.directory)
+        if not segments:
+            changed = self._seq is not None
+            self.state = _State()
+            self._seq = None
+            self._offset = 0
+            return changed
+
+        seq, path = segments[-1]
+        if seq != self._seq:
+            self.state = _State()
+            self._seq = seq
+            self._offset = 0
+
+        try:
+            if os.path.getsize(path) == self._offset:
+                return False
+            new_offset = _load_segment(path, self.state, self._offset)
+        except FileNotFoundError:
+            # compacted away between listdir and open; pick it up next time
+            return False
+        changed = new_offset != self._offset
+        self._offset = new_offset
+        return changed
+
+    def has_data(self):
+        return self._seq is not None
+
+    @property
+    def segment(self):
+        """ Sequence number of the segment being read (None without one). """
+        return self._seq
+
+    def snapshot(self):
+        return self.state.payload()
+
+
+def read_history(directory, schema=SCHEMA_V3):
+    """ One-shot read of the current history payload, or None if empty.
+        schema=SCHEMA_V4 returns it columnar (see utils.columnar).
+    """
+    reader = JournalReader(directory)
+    reader.refresh()
+    if not reader.has_data():
+        return None
+    payload = reader.snapshot()
+    return to_v4(payload) if schema == SCHEMA_V4 else payload
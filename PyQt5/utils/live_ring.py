@@ -0,0 +1,247 @@
+import getpass
+import os
+import re
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# =======================
+# Shared-memory Live Sample Ring
+# =======================
+# The collector child publishes each sample into a fixed-layout shared
+# memory block; GUI windows map it as NumPy structured arrays. A sequence
+# lock (odd = write in progress) lets readers copy only new slots without
+# any locking, and a reader whose sequence number has not moved returns
+# immediately.
+
+MAGIC = 0x41494D31          # "AIM1"
+CAPACITY = 120              # same as MAX_RAW_SAMPLES
+TOP_PROCS = 5
+REATTACH_SEC = 30           # re-open if nothing changed for this long
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("capacity", "<u4"),
+    ("seq", "<u8"),         # seqlock counter
+    ("written", "<u8"),     # total samples ever published
+    ("aggregates", "<u4"),  # complete aggregates in the retained history
+    ("writer_pid", "<u4"),
+    ("live", "<u4"),        # 0 once the writer has shut down
+    ("_pad", "<u4"),
+])
+
+PROC_DTYPE = np.dtype([
+    ("pid", "<u4"),
+    ("cpu", "<f4"),
+    ("mem", "<f4"),
+    ("name", "S32"),
+])
+
+SLOT_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("cpu", "<f4"),
+    ("mem", "<f4"),
+    ("disk", "<f4"),
+    ("nprocs", "<u4"),
+    ("sent", "<u8"),
+    ("recv", "<u8"),
+    ("procs", PROC_DTYPE, (TOP_PROCS,)),
+])
+
+SIZE = HEADER_DTYPE.itemsize + SLOT_DTYPE.itemsize * CAPACITY
+
+
+def ring_name():
+    user = re.sub(r"[^A-Za-z0-9]", "", getpass.getuser())[:16] or "user"
+    return f"aidm_live_{user}"
+
+
+def _views(buf):
+    header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=buf)[0:1]
+    slots = np.ndarray((CAPACITY,), dtype=SLOT_DTYPE, buffer=buf, offset=HEADER_DTYPE.itemsize)
+    return header, slots
+
+
+def _untrack(shm):
+    # Readers must not unlink the block when they exit (Python < 3.13
+    # registers every attached segment with the resource tracker).
+    if os.name == "posix":
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+
+# =======================
+# Writer (collector side)
+# =======================
+class LiveRingWriter:
+    def __init__(self, name=None):
+        self.name = name or ring_name()
+        try:
+            self.shm = shared_memory.SharedMemory(self.name, create=True, size=SIZE)
+        except FileExistsError:
+            # Stale block from a previous collector; reuse it so readers
+            # that are already attached keep working.
+            self.shm = shared_memory.SharedMemory(self.name)
+            if self.shm.size < SIZE:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = shared_memory.SharedMemory(self.name, create=True, size=SIZE)
+        self.header, self.slots = _views(self.shm.buf)
+        h = self.header
+        h["seq"] += 1
+        h["magic"] = MAGIC
+        h["capacity"] = CAPACITY
+        h["written"] = 0
+        h["aggregates"] = 0
+        h["writer_pid"] = os.getpid()
+        h["live"] = 1
+        h["seq"] += 1
+
+    def publish(self, sample, aggregates):
+        h = self.header
+        written = int(h["written"][0])
+        slot = self.slots[written % CAPACITY]
+        procs = sample.get("processes") or []
+
+        h["seq"] += 1                       # odd: write in progress
+        slot["ts"] = time.time()
+        slot["cpu"] = sample["cpu"]["usage"] or 0.0
+        slot["mem"] = sample["memory"]["ram"]["percent"]
+        slot["disk"] = sample["disk"]["percent"]
+        slot["sent"] = sample["network"]["bytes_sent"]
+        slot["recv"] = sample["network"]["bytes_recv"]
+        slot["nprocs"] = min(len(procs), TOP_PROCS)
+        for i, p in enumerate(procs[:TOP_PROCS]):
+            slot["procs"][i] = (
+                p["pid"],
+                p.get("cpu_percent_norm") or 0.0,
+                p.get("memory_percent") or 0.0,
+                str(p.get("name") or "")[:32].encode("utf-8", "ignore")[:32]
+            )
+        h["written"] = written + 1
+        h["aggregates"] = aggregates
+        h["seq"] += 1                       # even: consistent
+
+    def close(self):
+        try:
+            self.header["seq"] += 1
+            self.header["live"] = 0
+            self.header["seq"] += 1
+            del self.header, self.slots
+            self.shm.close()
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+# =======================
+# Reader (GUI side)
+# =======================
+class LiveRingReader:
+    """ poll() is a single integer compare when nothing has changed; when
+        it has, only the slots written since the last poll are copied.
+    """
+
+    def __init__(self, name=None):
+        self.name = name or ring_name()
+        self.shm = None
+        self.header = None
+        self.slots = None
+        self._seq = None
+        self._written = 0
+        self._last_change = 0.0
+        self.samples = np.zeros(0, dtype=SLOT_DTYPE)
+        self.aggregates = 0
+
+    def attach(self):
+        if self.shm is not None:
+            return True
+        try:
+            shm = shared_memory.SharedMemory(self.name)
+        except (FileNotFoundError, OSError, ValueError):
+            return False
+        _untrack(shm)
+        if shm.size < SIZE:
+            shm.close()
+            return False
+        self.shm = shm
+        self.header, self.slots = _views(shm.buf)
+        self._seq = None
+        self._last_change = time.monotonic()
+        return True
+
+    def detach(self):
+        if self.shm is not None:
+            self.header = self.slots = None
+            try:
+                self.shm.close()
+            except Exception:
+                pass
+            self.shm = None
+
+    def is_live(self):
+        return self.shm is not None and int(self.header["live"][0]) == 1
+
+    @property
+    def written(self):
+        """ Samples published up to the last poll (goes back to 0 when the
+            collector restarts).
+        """
+        return self._written
+
+    def poll(self):
+        """ Returns True when new samples (or counters) were read. """
+        if not self.attach():
+            return False
+        h = self.header
+        seq = int(h["seq"][0])
+        if seq == self._seq:
+            if time.monotonic() - self._last_change > REATTACH_SEC:
+                self.detach()     # writer may have re-created the block
+            return False
+
+        for _ in range(5):
+            seq = int(h["seq"][0])
+            if seq & 1:
+                time.sleep(0.001)
+                continue
+            if int(h["magic"][0]) != MAGIC:
+                return False
+            written = int(h["written"][0])
+            aggregates = int(h["aggregates"][0])
+            if written < self._written:
+                self.samples = np.zeros(0, dtype=SLOT_DTYPE)   # collector restarted
+                self._written = 0
+            start = max(self._written, written - CAPACITY)
+            new = self.slots[np.arange(start, written) % CAPACITY]  # copy
+            if int(h["seq"][0]) != seq:
+                continue      # torn read, retry
+            break
+        else:
+            return False
+
+        if len(new):
+            self.samples = np.concatenate([self.samples, new])[-CAPACITY:]
+        self._written = written
+        self.aggregates = aggregates
+        self._seq = seq
+        self._last_change = time.monotonic()
+        return True
+
+    def top_processes(self):
+        if not len(self.samples):
+            return []
+        last = self.samples[-1]
+        return [
+            {
+                "pid": int(p["pid"]),
+                "name": p["name"].decode("utf-8", "ignore"),
+                "cpu_percent_norm": round(float(p["cpu"]), 2),
+                "memory_percent": round(float(p["mem"]), 2)
+            }
+            for p in last["procs"][:int(last["nprocs"])]
+        ]
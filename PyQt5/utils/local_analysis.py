@@ -0,0 +1,180 @@
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+# =======================
+# On-device analysis engine
+# =======================
+# Fallback for the cloud /analyze call. It produces the same report shape
+# (health score, anomaly flags, 15-sample forecast) from the same input
+# (recent_samples + aggregates), using NumPy:
+#   - metrics are pulled into one (samples x metrics) matrix;
+#   - anomalies are robust z-scores (median / MAD) plus hard limits, for
+#     all metrics at once;
+#   - the forecast is one least-squares trend fit over the last
+#     FORECAST_FIT samples for every metric, damped toward the recent mean.
+# A full window takes a few milliseconds.
+
+ENGINE_VERSION = 1
+FORECAST_STEPS = 15
+FORECAST_FIT = 60          # samples the trend is fitted on
+FORECAST_DAMPING = 0.9     # per step; keeps a short spike from running away
+ANOMALY_Z = 3.5
+MAX_EVENTS = 20
+
+METRICS = ("cpu", "memory", "disk", "temp_c")
+# Sustained use above these is unhealthy no matter how normal it is here
+LIMITS = {"cpu": 90.0, "memory": 90.0, "disk": 90.0, "temp_c": 85.0}
+# Share of the 100-point score each component can take away
+WEIGHTS = {"cpu": 25.0, "memory": 25.0, "disk": 15.0, "temp_c": 15.0, "stability": 20.0}
+
+
+def _sample_row(s):
+    temps = s.get("temps") or {}
+    currents = [r["current"] for readings in temps.get("sensors", {}).values() for r in readings
+                if r.get("current") is not None]
+    return (
+        s.get("cpu", {}).get("usage", np.nan),
+        s.get("memory", {}).get("ram", {}).get("percent", np.nan),
+        s.get("disk", {}).get("percent", np.nan),
+        max(currents) if currents else np.nan,
+    )
+
+
+def _matrix(samples):
+    if not samples:
+        return np.empty((0, len(METRICS)))
+    return np.array([_sample_row(s) for s in samples], dtype=np.float64)
+
+
+def _aggregate_matrix(aggregates):
+    if not aggregates:
+        return np.empty((0, len(METRICS)))
+    return np.array([(
+        a.get("cpu", {}).get("avg", np.nan),
+        a.get("memory_avg_percent", np.nan),
+        a.get("disk_avg_percent", np.nan),
+        (a.get("temps") or {}).get("avg_c", np.nan),
+    ) for a in aggregates], dtype=np.float64)
+
+
+def _robust_z(m):
+    """ |x - median| / (1.4826 * MAD) per column; 0 where MAD is 0. """
+    med = np.nanmedian(m, axis=0)
+    mad = np.nanmedian(np.abs(m - med), axis=0) * 1.4826
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.abs(m - med) / mad
+    return np.where(mad > 0, np.nan_to_num(z, nan=0.0), 0.0)
+
+
+def _forecast(m, steps):
+    """ Damped linear trend for every column in one lstsq call. """
+    tail = m[-FORECAST_FIT:]
+    n = len(tail)
+    if n == 0:
+        return np.full((steps, m.shape[1]), np.nan)
+    # Missing values (e.g. no temperature sensor) -> column mean
+    col_mean = np.nanmean(np.where(np.isnan(tail).all(axis=0), 0.0, tail), axis=0)
+    tail = np.where(np.isnan(tail), col_mean, tail)
+    if n < 3:
+        return np.repeat(tail[-1:], steps, axis=0)
+    t = np.arange(n, dtype=np.float64)
+    X = np.column_stack([t, np.ones(n)])
+    (slope, intercept), *_ = np.linalg.lstsq(X, tail, rcond=None)
+    level = intercept + slope * (n - 1)
+    damp = np.cumsum(FORECAST_DAMPING ** np.arange(1, steps + 1))
+    return np.clip(level + np.outer(damp, slope), 0.0, None)
+
+
+def _round(a, nd=2):
+    return [None if np.isnan(x) else round(float(x), nd) for x in a]
+
+
+def analyze_local(history, sample_interval=10):
+    """ Analyze a history payload ({"machine", "data": {"recent_samples",
+        "aggregates"}}) the way the cloud engine does.
+    """
+    # All-NaN columns (no temperature sensor) are expected, not an error
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return _analyze(history, sample_interval)
+
+
+def _analyze(history, sample_interval):
+    data = history.get("data", {})
+    samples = data.get("recent_samples", [])
+    aggregates = data.get("aggregates", [])
+    m = _matrix(samples)
+    agg = _aggregate_matrix(aggregates)
+    present = ~np.isnan(m).all(axis=0) if len(m) else np.zeros(len(METRICS), dtype=bool)
+
+    # ---- anomalies ----
+    z = _robust_z(m) if len(m) else m
+    limits = np.array([LIMITS[k] for k in METRICS])
+    with np.errstate(invalid="ignore"):
+        over = m > limits
+    outlier = z > ANOMALY_Z
+    flagged = outlier | over
+    idx_s, idx_m = np.nonzero(flagged)
+    order = np.argsort(-z[idx_s, idx_m], kind="stable")[:MAX_EVENTS] if len(idx_s) else []
+    events = [{
+        "metric": METRICS[idx_m[i]],
+        "ts": samples[idx_s[i]].get("ts"),
+        "value": round(float(m[idx_s[i], idx_m[i]]), 2),
+        "score": round(float(z[idx_s[i], idx_m[i]]), 2),
+        "reason": "limit" if over[idx_s[i], idx_m[i]] else "outlier",
+    } for i in order]
+    # Sustained: more than a fifth of the window over the limit
+    with np.errstate(invalid="ignore"):
+        sustained = (over.mean(axis=0) > 0.2) if len(m) else np.zeros(len(METRICS), dtype=bool)
+    flags = {k: bool(flagged[:, i].any()) for i, k in enumerate(METRICS)} if len(m) else {k: False for k in METRICS}
+
+    # ---- health ----
+    with np.errstate(invalid="ignore"):
+        p95 = np.nanpercentile(m, 95, axis=0) if len(m) else np.full(len(METRICS), np.nan)
+    # Penalty ramps from 0 at 60% of the limit to the full weight at the limit
+    ramp = np.clip((p95 - 0.6 * limits) / (0.4 * limits), 0.0, 1.0)
+    ramp = np.where(present, np.nan_to_num(ramp), 0.0)
+    anomaly_rate = float(outlier.any(axis=1).mean()) if len(m) else 0.0
+    components = {k: round(float(WEIGHTS[k] * (1 - ramp[i])), 2) for i, k in enumerate(METRICS)}
+    components["stability"] = round(WEIGHTS["stability"] * (1 - min(1.0, anomaly_rate * 5)), 2)
+    score = round(sum(components.values()), 1)
+    status = "critical" if score < 50 or sustained.any() else ("warning" if score < 75 else "healthy")
+
+    # ---- forecast ----
+    fc = _forecast(m, FORECAST_STEPS) if len(m) else np.full((FORECAST_STEPS, len(METRICS)), np.nan)
+    fc = np.where(present, fc, np.nan)
+    fc[:, :3] = np.clip(fc[:, :3], 0.0, 100.0)       # percentages
+
+    # ---- trend over the aggregated windows ----
+    if len(agg) >= 2:
+        with np.errstate(invalid="ignore"):
+            trend = (agg[-1] - agg[0]) / (len(agg) - 1)
+    else:
+        trend = np.full(len(METRICS), np.nan)
+
+    return {
+        "engine": "local",
+        "engine_version": ENGINE_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "health": {"score": score, "status": status, "components": components},
+        "anomalies": {
+            "flags": flags,
+            "sustained": {k: bool(sustained[i]) for i, k in enumerate(METRICS)},
+            "count": int(flagged.sum()),
+            "events": events,
+        },
+        "forecast": {
+            "interval_sec": sample_interval,
+            "steps": FORECAST_STEPS,
+            **{k: _round(fc[:, i]) for i, k in enumerate(METRICS)},
+        },
+        "stats": {
+            "samples": len(samples),
+            "aggregates": len(aggregates),
+            "mean": dict(zip(METRICS, _round(np.nanmean(m, axis=0) if len(m) else np.full(len(METRICS), np.nan)))),
+            "p95": dict(zip(METRICS, _round(p95))),
+            "trend_per_window": dict(zip(METRICS, _round(trend, 3))),
+        },
+    }
@@ -3,8 +3,16 @@ import uuid
 import platform
 import os
 import socket
+import threading
+import time
 from datetime import datetime
-from utils.constants import TOKEN_FILE, DATA_FILE as HISTORY_FILE
+from utils.constants import TOKEN_FILE, UPLOAD_WATERMARK_FILE, ANALYSIS_POLICY
+from utils.history_reader import get_reader
+from utils.columnar import to_v4
+
+# A full (non-delta) raw_data upload is forced this often
+FULL_CHECKPOINT_EVERY = 12
+FULL_CHECKPOINT_MAX_AGE_HOURS = 24
 
 def load_email():
     with open(TOKEN_FILE, "r") as f:
@@ -19,45 +27,237 @@ def generate_secret_id():
         f.write(secret_id)
     return secret_id
 
-import requests
-import gzip
-import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+# gzip level for the /analyze body (1 = fastest, 9 = smallest)
+ANALYSIS_GZIP_LEVEL = 6
 
-def get_cloud_analysis(history_dict):
-    # Your Render URL looks like: https://my-app.onrender.com/analyze
-    API_URL = "https://ml-engine-backend.onrender.com/analyze"
-    
+def get_cloud_analysis(history_dict, level=ANALYSIS_GZIP_LEVEL, client=None, timeout=None):
+    # Sent over the shared keep-alive session, which is pinged while
+    # uploads are queued (utils/uploader.py), so a busy queue stays warm.
+    # Serialized and compressed as it is sent (chunked transfer encoding).
+    # requests is imported here, not at startup.
+    import requests
+    from utils.analysis_client import get_client, READ_TIMEOUT_SEC
     try:
-        json_str = json.dumps(history_dict)
-        compressed_payload = gzip.compress(json_str.encode("utf-8"))
-        
-        # We increase timeout to 120s to account for the "Cold Start" spin-up
-        response = requests.post(
-            API_URL,
-            data=compressed_payload,
-            headers={
-                "Content-Encoding": "gzip",
-                "Content-Type": "application/json"
-            },
-            timeout=200 
-        )
-        response.raise_for_status()
-        return response.json()
+        return (client or get_client()).analyze(history_dict, level=level, read_timeout=timeout or READ_TIMEOUT_SEC)
         
     except requests.exceptions.Timeout:
         return {"error": "Server is taking too long to wake up. Please try again in 30 seconds."}
     except Exception as e:
         return {"error": f"Connection failed: {str(e)}"}
 
-def build_payload():
-    if not os.path.exists(HISTORY_FILE):
+# =======================
+# Analysis policy (cloud vs on-device engine)
+# =======================
+#   local_first  on-device engine only; instant, nothing is sent
+#   cloud_first  the cloud model, unless it misses CLOUD_DEADLINE_SEC or
+#                fails, then the on-device engine
+#   race         both at once; the on-device answer (milliseconds) is
+#                held for up to RACE_GRACE_SEC so a warm cloud server
+#                can still win, then it is used
+# get_analysis() is the one place these are decided; the upload pipeline
+# runs it in a worker thread.
+#
+# The cloud request's read timeout is the deadline, so a call that loses
+# ends on its own shortly after instead of waiting out a cold start;
+# repeated uploads don't pile up abandoned /analyze calls.
+#
+# Every summary says which engine produced it in summary["engine"].
+ANALYSIS_POLICIES = ("local_first", "cloud_first", "race")
+CLOUD_DEADLINE_SEC = 20
+RACE_GRACE_SEC = 5
+
+
+def is_usable(summary):
+    return isinstance(summary, dict) and "error" not in summary
+
+
+def _from(engine, summary):
+    summary["engine"] = engine
+    return summary
+
+
+def get_analysis(history_dict, policy=ANALYSIS_POLICY, deadline=CLOUD_DEADLINE_SEC, client=None):
+    """ Analysis summary under `policy`; never waits on the cloud longer
+        than `deadline` seconds. `client` defaults to the shared
+        utils.analysis_client session.
+    """
+    if policy not in ANALYSIS_POLICIES:
+        raise ValueError(f"Unknown analysis policy: {policy}")
+    from utils.local_analysis import analyze_local      # NumPy
+    if policy == "local_first":
+        return _from("local", analyze_local(history_dict))
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+    try:
+        started = time.monotonic()
+        cloud = pool.submit(get_cloud_analysis, history_dict, client=client, timeout=deadline)
+        if policy == "race":
+            local = analyze_local(history_dict)
+            grace = min(RACE_GRACE_SEC, deadline - (time.monotonic() - started))
+            try:
+                summary = cloud.result(timeout=max(0.0, grace))
+            except FuturesTimeout:
+                summary = None
+            if is_usable(summary):
+                return _from("cloud", summary)
+            return _from("local", local)
+
+        try:
+            summary = cloud.result(timeout=deadline)
+        except FuturesTimeout:
+            summary = {"error": f"No answer within {deadline}s"}
+        if is_usable(summary):
+            return _from("cloud", summary)
+        fallback = analyze_local(history_dict)
+        fallback["cloud_error"] = summary["error"]
+        return _from("local", fallback)
+    finally:
+        # Don't wait for a cloud call that lost; its own timeout ends it
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# =======================
+# Upload watermark (delta uploads)
+# =======================
+# Committed by the upload pipeline and invalidated by the spool's flusher
+# thread: read-modify-write under one lock.
+_watermark_lock = threading.Lock()
+
+
+def load_watermark():
+    try:
+        with open(UPLOAD_WATERMARK_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_watermark(state):
+    tmp = UPLOAD_WATERMARK_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, UPLOAD_WATERMARK_FILE)
+
+
+def commit_watermark(payload):
+    """ Persist the watermark of a payload once it is delivered: inserted,
+        or durably written to the offline spool (which then owns it).
+    """
+    upload = payload["raw_data"]["upload"]
+    with _watermark_lock:
+        previous = load_watermark() or {}
+        _save_watermark({
+            "hostname": upload["hostname"],
+            "marks": upload["watermark"],
+            "uploads_since_full": 0 if upload["mode"] == "full" else previous.get("uploads_since_full", 0) + 1,
+            "last_full": upload["created"] if upload["mode"] == "full" else previous.get("last_full"),
+        })
+
+
+def invalidate_watermark():
+    """ A delivered report was lost after all (dropped from a full spool,
+        or rejected by the server): the deltas after it no longer add up,
+        so the next upload is a full checkpoint.
+    """
+    with _watermark_lock:
+        wm = load_watermark()
+        if wm and wm.get("last_full"):
+            wm["last_full"] = None
+            _save_watermark(wm)
+
+
+def _needs_full(wm, hostname, now):
+    if not wm or wm.get("hostname") != hostname or not wm.get("last_full"):
+        return True
+    if wm.get("uploads_since_full", 0) + 1 >= FULL_CHECKPOINT_EVERY:
+        return True
+    age = now - datetime.fromisoformat(wm["last_full"])
+    return age.total_seconds() > FULL_CHECKPOINT_MAX_AGE_HOURS * 3600
+
+
+def _sample_ts(s):
+    return s["ts"]
+
+
+def _window_end(a):
+    return a["window"]["end"]
+
+
+def build_raw_data(history, wm=None, now=None):
+    """ The raw_data to store: everything newer than the watermark, or the
+        whole history for a periodic full checkpoint. Timestamps are ISO
+        strings, so they order lexicographically.
+    """
+    now = now or datetime.now()
+    data = history.get("data", {})
+    hostname = history.get("machine", {}).get("hostname") or socket.gethostname()
+    full = _needs_full(wm, hostname, now)
+    marks = {} if full else wm.get("marks", {})
+
+    streams = {
+        "samples": (data.get("recent_samples", []), _sample_ts),
+        "aggregates": (data.get("aggregates", []), _window_end),
+    }
+    for tier, records in data.get("tiers", {}).items():
+        streams[tier] = (records, _window_end)
+
+    selected = {}
+    new_marks = {}
+    gaps = []
+    for name, (records, key) in streams.items():
+        since = marks.get(name)
+        if since is None:
+            selected[name] = list(records)
+        else:
+            selected[name] = [r for r in records if key(r) > since]
+            # Oldest retained record is already past the mark: some records
+            # aged out locally before they could be uploaded.
+            if records and key(records[0]) > since and len(selected[name]) == len(records):
+                gaps.append(name)
+        new_marks[name] = key(records[-1]) if records else since
+
+    tiers = {name: recs for name, recs in selected.items() if name not in ("samples", "aggregates")}
+    # Sampling gaps that end inside the uploaded sample range
+    since = marks.get("samples")
+    sampling_gaps = [g for g in data.get("gaps", []) if since is None or g["end"] > since]
+    return {
+        "schema_version": history.get("schema_version"),
+        "machine": history.get("machine", {}),
+        "data": {
+            "recent_samples": selected["samples"],
+            "aggregates": selected["aggregates"],
+            "tiers": tiers,
+            "gaps": sampling_gaps
+        },
+        "upload": {
+            "mode": "full" if full else "delta",
+            "since": None if full else marks,
+            "watermark": new_marks,
+            "gaps": gaps,
+            "hostname": hostname,
+            "created": now.isoformat()
+        }
+    }
+
+
+def prepare_report():
+    """ The report row without its analysis, plus the analysis input.
+        The row is complete enough to insert as "pending" before the
+        analysis comes back (see utils/upload_pipeline.py).
+    """
+    # Shared with the GUI: only lines appended since its last read are parsed
+    reader = get_reader()
+    reader.refresh()
+    history = reader.snapshot()
+    if history is None:
         raise FileNotFoundError("No monitoring data found. Please run monitoring before upload.")
-    with open(HISTORY_FILE, "r") as f:
-        history = json.load(f)
 
     # 1. DATA SUFFICIENCY CHECK
     recent_count = len(history.get("data", {}).get("recent_samples", []))
-    agg_count = len(history.get("data", {}).get("aggregates", []))
+    # Windows cut short by a gap or a forced close don't count
+    agg_count = sum(1 for a in history.get("data", {}).get("aggregates", [])
+                    if not a["window"].get("partial"))
 
     if recent_count < 50 or agg_count < 5:
         # This string will appear in your PyQt QMessageBox
@@ -66,18 +266,25 @@ def build_payload():
             f"Please let monitoring continue for {(5-agg_count)*5} mins minimum before upload."
         )
 
-    # 2. RUN ANALYTIC ENGINE
-    # The engine expects a JSON string, so we dump the history dict
-    analysis_summary = get_cloud_analysis(history)
+    # 2. ANALYTIC ENGINE INPUT
+    # The model only looks at the current window, so the rollup tiers
+    # are not shipped to it.
+    analysis_input = dict(history, data={
+        "recent_samples": history["data"].get("recent_samples", []),
+        "aggregates": history["data"].get("aggregates", [])
+    })
 
     # 3. CONSTRUCT FINAL PAYLOAD
-    return {
+    # raw_data only carries what was not uploaded yet (see commit_watermark).
+    # It is stored columnar (schema 4.0); utils.columnar.to_v3 expands it.
+    report = {
         "user_email": load_email(),
-        "raw_data": history,
-        "summary": analysis_summary, # The AI results & 15 forecast samples
+        "raw_data": to_v4(build_raw_data(history, load_watermark())),
+        "summary": None, # The AI results & 15 forecast samples
         "device_name": socket.gethostname(),
         "os": platform.system(),
         "source": "desktop_app",
         "status": "pending"
     }
+    return analysis_input, report
 
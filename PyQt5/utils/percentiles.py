@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+# =======================
+# Mergeable Percentile Histograms
+# =======================
+# Fixed-bin histograms: adding a value is one bin increment, merging two
+# windows is adding counts, and p50/p90/p95/p99 are read off the cumulative
+# counts in one vectorized pass. Bins are fixed, so the serialized (sparse)
+# form is bounded no matter how many windows were merged.
+
+QUANTILES = (50, 90, 95, 99)
+
+# name -> ("linear", low, width, nbins) | ("log2", steps_per_octave, nbins)
+SPECS = {
+    "cpu":        ("linear", 0.0, 1.0, 101),
+    "memory":     ("linear", 0.0, 1.0, 101),
+    "disk":       ("linear", 0.0, 1.0, 101),
+    "temp_c":     ("linear", 0.0, 1.0, 150),
+    "net_tx_bps": ("log2", 4, 161),     # ~19% wide bins up to 1 TB/s
+    "net_rx_bps": ("log2", 4, 161),
+}
+
+
+def _edges(spec):
+    if spec[0] == "linear":
+        _, low, width, nbins = spec
+        return low + width * np.arange(nbins + 1, dtype=np.float64)
+    _, k, nbins = spec
+    edges = np.empty(nbins + 1, dtype=np.float64)
+    edges[0] = 0.0
+    edges[1:] = np.exp2(np.arange(nbins, dtype=np.float64) / k)
+    return edges
+
+
+_EDGES = {name: _edges(spec) for name, spec in SPECS.items()}
+
+
+class Histogram:
+    __slots__ = ("name", "spec", "counts", "lo", "hi")
+
+    def __init__(self, name):
+        self.name = name
+        self.spec = SPECS[name]
+        self.counts = np.zeros(self.spec[-1], dtype=np.int64)
+        # exact extremes, used to clamp interpolated values
+        self.lo = None
+        self.hi = None
+
+    def bin_of(self, x):
+        spec = self.spec
+        nbins = spec[-1]
+        if spec[0] == "linear":
+            i = int((x - spec[1]) / spec[2])
+        else:
+            i = 0 if x < 1 else 1 + int(spec[1] * math.log2(x))
+        return 0 if i < 0 else (nbins - 1 if i >= nbins else i)
+
+    def add(self, x):
+        self.counts[self.bin_of(x)] += 1
+        if self.lo is None or x < self.lo:
+            self.lo = x
+        if self.hi is None or x > self.hi:
+            self.hi = x
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def to_sparse(self):
+        """ {"b": [[bin, count], ...], "lo": min, "hi": max} """
+        nz = np.flatnonzero(self.counts)
+        return {
+            "b": [[int(i), int(self.counts[i])] for i in nz],
+            "lo": self.lo,
+            "hi": self.hi
+        }
+
+    def merge_sparse(self, sparse):
+        pairs = sparse.get("b")
+        if not pairs:
+            return
+        idx, cnt = np.asarray(pairs, dtype=np.int64).T
+        np.add.at(self.counts, idx, cnt)
+        lo, hi = sparse.get("lo"), sparse.get("hi")
+        if lo is not None and (self.lo is None or lo < self.lo):
+            self.lo = lo
+        if hi is not None and (self.hi is None or hi > self.hi):
+            self.hi = hi
+
+    def percentiles(self, quantiles=QUANTILES):
+        """ {"p50": v, ...} interpolated linearly inside the bin, or None. """
+        total = self.counts.sum()
+        if total == 0:
+            return None
+        edges = _EDGES[self.name]
+        cum = np.cumsum(self.counts)
+        targets = np.asarray(quantiles, dtype=np.float64) / 100.0 * total
+        idx = np.minimum(np.searchsorted(cum, targets, side="left"), len(cum) - 1)
+        below = cum[idx] - self.counts[idx]
+        frac = np.where(self.counts[idx] > 0, (targets - below) / np.maximum(self.counts[idx], 1), 0.0)
+        values = edges[idx] + np.clip(frac, 0.0, 1.0) * (edges[idx + 1] - edges[idx])
+        values = np.clip(values, self.lo, self.hi)
+        return {f"p{q}": round(float(v), 2) for q, v in zip(quantiles, values)}
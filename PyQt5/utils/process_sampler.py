@@ -0,0 +1,88 @@
+import heapq
+import time
+from operator import itemgetter
+
+import psutil
+
+# =======================
+# Process Sampler
+# =======================
+# Keeps psutil.Process handles between ticks so cpu_percent() measures the
+# delta since the previous scan, and selects the top-k with a bounded heap
+# instead of sorting every process on the box.
+
+_SKIP = (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess)
+
+
+class ProcessSampler:
+    def __init__(self, top_k=20, num_cores=None):
+        self.top_k = top_k
+        self.num_cores = num_cores or psutil.cpu_count(logical=True) or 1
+        self._procs = {}          # pid -> (psutil.Process, name)
+        self.last_scan_ms = 0.0
+        self.last_count = 0
+
+    def _register(self, pid):
+        try:
+            p = psutil.Process(pid)
+            name = p.name()
+            p.cpu_percent(interval=None)  # prime; first real value next tick
+        except _SKIP:
+            return False
+        self._procs[pid] = (p, name)
+        return True
+
+    def _row(self, pid, name, cpu_raw, mem):
+        return {
+            "pid": pid,
+            "name": name,
+            "cpu_percent_raw": cpu_raw,
+            "cpu_percent_norm": round(cpu_raw / self.num_cores, 2),
+            "memory_percent": mem
+        }
+
+    def scan(self):
+        """ Returns the union of the top-k by CPU and the top-k by memory,
+            ordered by CPU, with the same fields as before.
+        """
+        t0 = time.perf_counter()
+        procs = self._procs
+
+        pids = set(psutil.pids())
+        for pid in procs.keys() - pids:
+            del procs[pid]
+        fresh = {pid for pid in pids - procs.keys() if self._register(pid)}
+
+        rows = []
+        gone = []
+        for pid, (p, name) in procs.items():
+            try:
+                with p.oneshot():
+                    cpu = 0.0 if pid in fresh else p.cpu_percent(interval=None)
+                    mem = p.memory_percent()
+            except psutil.NoSuchProcess:
+                gone.append(pid)
+                continue
+            except _SKIP:
+                continue
+            rows.append((cpu, mem, pid, name))
+        for pid in gone:
+            procs.pop(pid, None)
+
+        top = heapq.nlargest(self.top_k, rows, key=itemgetter(0))
+        seen = {row[2] for row in top}
+        for row in heapq.nlargest(self.top_k, rows, key=itemgetter(1)):
+            if row[2] not in seen:
+                top.append(row)
+        top.sort(key=itemgetter(0), reverse=True)
+
+        self.last_count = len(rows)
+        self.last_scan_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return [self._row(pid, name, cpu, mem) for cpu, mem, pid, name in top]
+
+    def stats(self):
+        return {
+            "count": self.last_count,
+            "tracked": len(self._procs),
+            "scan_ms": self.last_scan_ms
+        }
@@ -0,0 +1,99 @@
+import collections
+from datetime import datetime
+
+# =======================
+# Rollup Tiers
+# =======================
+# The 5 minute aggregates ("aggregates" in the payload) are merged into
+# coarser tiers. Each tier keeps a bounded ring, so a week of history costs
+# about the same to store and render as the last few hours.
+#
+# Tier records cover wall-clock periods (an hour, a day): a child belongs
+# to the period its window starts in, and the open record closes when the
+# first child of a later period arrives. A period the collector was not
+# running for all of (or with a partial child) is tagged partial.
+#
+# (name, period in seconds, records retained)
+TIERS = [
+    ("1h", 3600, 24 * 14),     # two weeks
+    ("1d", 86400, 365),        # one year
+]
+AGGREGATE_PERIOD_SEC = 300     # get_info: 30 samples x 10 s
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _period(record, seconds):
+    """ Index of the wall-clock period the record's window starts in.
+        Journal timestamps are naive local time, so days start at local
+        midnight.
+    """
+    start = datetime.fromisoformat(record["window"]["start"])
+    return int((start - _EPOCH).total_seconds() // seconds)
+
+
+class RollupTiers:
+    def __init__(self, sample_interval, top_processes, tiers=TIERS):
+        # Imported here: the journal (and so the GUI) only needs TIERS, and
+        # the aggregator pulls in NumPy
+        from utils.aggregator import WindowAggregator
+        self.tiers = tiers
+        self.rings = {name: collections.deque(maxlen=keep) for name, _, keep in tiers}
+        # Nothing is merged from the last tier, so its records keep only
+        # their top pids instead of every process seen that day
+        last = tiers[-1][0]
+        self.pending = {}
+        child_period = AGGREGATE_PERIOD_SEC
+        for name, period, _ in tiers:
+            # Children a complete period holds; fewer means partial
+            self.pending[name] = WindowAggregator(period // child_period, sample_interval,
+                                                  top_processes, mergeable=name != last)
+            child_period = period
+        self.periods = {name: None for name, _, _ in tiers}   # of the open window
+
+    def add(self, aggregate):
+        """ Feed one 5 minute aggregate; returns [(tier, record), ...] for
+            every tier record that closed as a result.
+        """
+        emitted = []
+        child = aggregate
+        for name, seconds, _ in self.tiers:
+            window = self.pending[name]
+            period = _period(child, seconds)
+            closed = None
+            if window.count and period != self.periods[name]:
+                closed = window.close()
+                self.rings[name].append(closed)
+                emitted.append((name, closed))
+            window.merge(child)
+            self.periods[name] = period
+            if closed is None:
+                break
+            child = closed
+        return emitted
+
+    def rehydrate(self, aggregates, rings):
+        """ Restore rings and the open windows from persisted records.
+            A tier's open window is every child newer than its last record.
+        """
+        children = aggregates
+        for name, seconds, _ in self.tiers:
+            ring = self.rings[name]
+            ring.clear()
+            ring.extend(rings.get(name, ()))
+            last_end = ring[-1]["window"]["end"] if ring else None
+            window = self.pending[name]
+            window.reset()
+            self.periods[name] = None
+            for child in children:
+                if "accumulators" not in child:
+                    continue
+                if last_end is None or child["window"]["start"] > last_end:
+                    period = _period(child, seconds)
+                    if window.count and period != self.periods[name]:
+                        # Only after a crash between a child and the tier
+                        # record it closed: that period is lost
+                        window.reset()
+                    window.merge(child)
+                    self.periods[name] = period
+            children = ring
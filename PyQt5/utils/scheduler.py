@@ -0,0 +1,146 @@
+import threading
+import time
+
+# =======================
+# Per-metric Sampling Scheduler
+# =======================
+# Each collector runs on its own period; the latest value of every
+# collector is merged into each emitted sample. Collectors that come due
+# within `slack` seconds of each other are run in the same wakeup, so the
+# loop sleeps once per batch instead of once per collector.
+#
+# A collector that raises keeps its previous value. Until a required one
+# has produced a value at all, nothing is emitted (its next run is one
+# period later); the others can start from a placeholder default.
+
+MAX_STRETCH = 4.0   # a collector over budget is slowed down at most this much
+
+
+class _Collector:
+    __slots__ = ("name", "fn", "period", "budget_ms", "required", "next_due",
+                 "value", "cost_ms", "runs", "errors")
+
+    def __init__(self, name, fn, period, budget_ms, default, required):
+        self.name = name
+        self.fn = fn
+        self.period = period
+        self.budget_ms = budget_ms
+        self.required = required
+        self.next_due = 0.0
+        self.value = default
+        self.cost_ms = 0.0
+        self.runs = 0
+        self.errors = 0
+
+    def effective_period(self):
+        if self.budget_ms and self.cost_ms > self.budget_ms:
+            return self.period * min(self.cost_ms / self.budget_ms, MAX_STRETCH)
+        return self.period
+
+
+class SamplingScheduler:
+    def __init__(self, emit_interval, slack=1.0, clock=time.monotonic, sleep=None):
+        self.emit_interval = emit_interval
+        self.slack = slack
+        self.clock = clock
+        self._wake = threading.Event()
+        self.sleep = sleep or self._interruptible_sleep
+        self.collectors = {}
+        self.wakeups = 0
+        self._next_emit = 0.0
+        self._stopped = False
+
+    def _interruptible_sleep(self, delay):
+        self._wake.wait(delay)
+        self._wake.clear()
+
+    def wake(self):
+        """ Cut the current sleep short (e.g. after a period change). """
+        self._wake.set()
+
+    def stop(self):
+        """ Make run() return after the current pass (thread-safe). """
+        self._stopped = True
+        self.wake()
+
+    def register(self, name, fn, period, budget_ms=None, default=None, required=False):
+        """ Run fn every `period` seconds. If its measured cost (EWMA) goes
+            over budget_ms, its period is stretched proportionally.
+            `default` is its value until a run succeeds; with required=True
+            nothing is emitted before one has.
+        """
+        self.collectors[name] = _Collector(name, fn, period, budget_ms, default, required)
+
+    def set_period(self, name, period):
+        c = self.collectors[name]
+        c.next_due = min(c.next_due, self.clock() + period)
+        c.period = period
+        self.wake()
+
+    def set_emit_interval(self, interval):
+        self.emit_interval = interval
+        self._next_emit = min(self._next_emit, self.clock() + interval)
+        self.wake()
+
+    def latest(self):
+        return {name: c.value for name, c in self.collectors.items()}
+
+    def ready(self):
+        """ True once every required collector has a value. """
+        return all(c.value is not None for c in self.collectors.values() if c.required)
+
+    def stats(self):
+        return {
+            name: {
+                "period": c.period,
+                "effective_period": round(c.effective_period(), 2),
+                "cost_ms": round(c.cost_ms, 2),
+                "runs": c.runs,
+                "errors": c.errors
+            }
+            for name, c in self.collectors.items()
+        }
+
+    def run_due(self, now=None):
+        """ Run every collector due at (or within slack of) now. """
+        now = self.clock() if now is None else now
+        ran = []
+        for c in self.collectors.values():
+            if c.next_due > now + self.slack:
+                continue
+            t0 = time.perf_counter()
+            try:
+                c.value = c.fn()
+            except Exception:
+                c.errors += 1
+            cost = (time.perf_counter() - t0) * 1000
+            c.cost_ms = cost if c.runs == 0 else 0.8 * c.cost_ms + 0.2 * cost
+            c.runs += 1
+            # Stay on the original grid unless we fell behind
+            c.next_due = max(c.next_due + c.effective_period(), now)
+            ran.append(c.name)
+        return ran
+
+    def run(self, on_emit):
+        """ Blocking loop: collect on each collector's period and call
+            on_emit(latest_values) every emit_interval seconds.
+        """
+        start = self.clock()
+        for c in self.collectors.values():
+            c.next_due = start
+        self._next_emit = start
+        self._stopped = False
+
+        while not self._stopped:
+            now = self.clock()
+            self.run_due(now)
+            if now + self.slack >= self._next_emit:
+                if self.ready():
+                    on_emit(self.latest())
+                self._next_emit = max(self._next_emit + self.emit_interval, now)
+
+            wake = min([self._next_emit] + [c.next_due for c in self.collectors.values()])
+            delay = wake - self.clock()
+            if delay > 0 and not self._stopped:
+                self.sleep(delay)
+            self.wakeups += 1
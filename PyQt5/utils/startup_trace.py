@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import time
+
+# =======================
+# Startup trace
+# =======================
+# Off unless app.py is started with --startup-trace. Records:
+#   - every module imported after start(), with its own (self) and
+#     cumulative load time, like python -X importtime but from inside
+#     the app, so bundled (PyInstaller) builds can be traced too;
+#   - named marks (qapplication, window_created, ...);
+#   - the first paint of the first window.
+# Times are from start(), at the top of app.main(); interpreter start-up
+# comes before that (benchmarks/bench_startup.py measures the whole launch).
+# The report goes to stderr and to STARTUP_TRACE_FILE as JSON; the
+# startup benchmark reads the same file.
+
+TOP_IMPORTS = 15
+
+
+class _TimedLoader:
+    """ Wraps a module loader to time create_module + exec_module. """
+
+    def __init__(self, loader, tracer, name):
+        self._loader = loader
+        self._tracer = tracer
+        self._name = name
+
+    def create_module(self, spec):
+        # Extension modules (PyQt5.QtWidgets, numpy's core) load here
+        self._tracer._enter(self._name)
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._tracer._exit()
+
+    def exec_module(self, module):
+        self._tracer._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._tracer._exit()
+
+    def __getattr__(self, attr):
+        # get_resource_reader, get_data, is_package, ... go to the real loader
+        return getattr(self._loader, attr)
+
+
+class _ImportFinder:
+    """ sys.meta_path entry that asks the other finders, then wraps the
+        loader they return.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self.tracer, name)
+                return spec
+        return None
+
+
+class StartupTrace:
+    def __init__(self):
+        self.enabled = False
+        self.t0 = None
+        self.marks = []
+        self.imports = {}           # name -> (self_ms, cumulative_ms)
+        self._stack = []            # [name, start, child_ms]
+        self._finder = None
+
+    def start(self):
+        if self.enabled:
+            return self
+        self.enabled = True
+        self.t0 = time.perf_counter()
+        self._finder = _ImportFinder(self)
+        sys.meta_path.insert(0, self._finder)
+        return self
+
+    def stop_imports(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def _enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        name, start, child = self._stack.pop()
+        total = (time.perf_counter() - start) * 1000
+        if self._stack:
+            self._stack[-1][2] += total
+        own, cumulative = self.imports.get(name, (0.0, 0.0))
+        self.imports[name] = (own + total - child, cumulative + total)
+
+    def mark(self, name):
+        if self.enabled:
+            self.marks.append((name, (time.perf_counter() - self.t0) * 1000))
+
+    # ---- first paint ----
+    def watch_first_paint(self, widget, callback=None):
+        """ Mark "first_paint" when widget is first painted, then report. """
+        if not self.enabled:
+            return
+        from PyQt5.QtCore import QObject, QEvent
+
+        trace = self
+
+        class _PaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    trace.mark("first_paint")
+                    trace.stop_imports()
+                    trace.report()
+                    if callback:
+                        callback()
+                return False
+
+        self._paint_filter = _PaintFilter(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    # ---- output ----
+    def results(self):
+        marks = dict(self.marks)
+        top = sorted(self.imports.items(), key=lambda kv: kv[1][0], reverse=True)[:TOP_IMPORTS]
+        return {
+            "marks_ms": {k: round(v, 2) for k, v in marks.items()},
+            "first_paint_ms": round(marks["first_paint"], 2) if "first_paint" in marks else None,
+            "modules_imported": len(self.imports),
+            "import_ms": round(sum(s for s, _ in self.imports.values()), 2),
+            "top_imports": [
+                {"module": name, "self_ms": round(s, 2), "cumulative_ms": round(c, 2)}
+                for name, (s, c) in top
+            ],
+        }
+
+    def report(self, path=None):
+        from utils.constants import STARTUP_TRACE_FILE
+        path = path or STARTUP_TRACE_FILE
+        results = self.results()
+        print("Startup trace:", file=sys.stderr)
+        for name, ms in self.marks:
+            print(f"  {name:24} {ms:9.1f} ms", file=sys.stderr)
+        print(f"  {results['modules_imported']} modules imported in {results['import_ms']:.1f} ms; slowest:",
+              file=sys.stderr)
+        for entry in results["top_imports"]:
+            print(f"    {entry['module']:40} {entry['self_ms']:8.1f} ms  ({entry['cumulative_ms']:.1f} ms cumulative)",
+                  file=sys.stderr)
+        try:
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(results, f, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Startup trace not saved: {e}", file=sys.stderr)
+        return results
+
+
+trace = StartupTrace()
@@ -0,0 +1,76 @@
+import json
+import zlib
+
+# =======================
+# Streaming JSON + gzip encoder
+# =======================
+# Walks the payload a few levels deep and serializes each leaf record on its
+# own, feeding the text through an incremental gzip compressor. Only one
+# batch (~chunk_size) of JSON text and the compressor state are alive at a
+# time, instead of the whole document as str, bytes and gzip bytes.
+#
+# json.JSONEncoder.iterencode is not used: with the C accelerator it builds
+# the full list of fragments before returning.
+
+DEFAULT_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+_SEPARATORS = (", ", ": ")   # json.dumps() defaults, so output is identical
+
+
+def iter_json(obj, depth=3):
+    """ Yield JSON text fragments; containers deeper than `depth` (e.g.
+        individual samples) are dumped in one call.
+    """
+    if depth <= 0 or not isinstance(obj, (dict, list, tuple)):
+        yield json.dumps(obj, separators=_SEPARATORS)
+        return
+    if isinstance(obj, dict):
+        yield "{"
+        first = True
+        for key, value in obj.items():
+            yield (_SEPARATORS[0] if not first else "") + json.dumps(str(key)) + _SEPARATORS[1]
+            yield from iter_json(value, depth - 1)
+            first = False
+        yield "}"
+    else:
+        yield "["
+        first = True
+        for value in obj:
+            if not first:
+                yield _SEPARATORS[0]
+            yield from iter_json(value, depth - 1)
+            first = False
+        yield "]"
+
+
+def iter_gzip_json(obj, level=DEFAULT_LEVEL, chunk_size=CHUNK_SIZE, stats=None):
+    """ Yield gzip-compressed chunks of json.dumps(obj). Suitable as a
+        requests `data=` body, which is then sent chunked.
+        If a dict is passed as stats, raw/compressed byte counts are filled in.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # 31 = gzip wrapper
+    pending = []
+    pending_len = 0
+    raw = 0
+    sent = 0
+    for fragment in iter_json(obj):
+        pending.append(fragment)
+        pending_len += len(fragment)
+        if pending_len >= chunk_size:
+            data = "".join(pending).encode("utf-8")
+            raw += len(data)
+            pending = []
+            pending_len = 0
+            out = compressor.compress(data)
+            if out:
+                sent += len(out)
+                yield out
+    data = "".join(pending).encode("utf-8")
+    raw += len(data)
+    out = compressor.compress(data) + compressor.flush()
+    sent += len(out)
+    if stats is not None:
+        stats["raw_bytes"] = raw
+        stats["compressed_bytes"] = sent
+    if out:
+        yield out
@@ -0,0 +1,112 @@
+import numpy as np
+
+from utils.rollup import TIERS
+
+# =======================
+# Time Index
+# =======================
+# The history as time series, one level per resolution: raw samples, the
+# 5 minute aggregates and each rollup tier, finest first. Every level
+# keeps its timestamps in a sorted float64 array, so finding the points of
+# a time range is two binary searches (np.searchsorted) instead of a scan
+# over the records.
+#
+# Timestamps are the journal's naive ISO strings parsed as if they were
+# UTC: seconds of local wall-clock time. Format them back with
+# datetime.utcfromtimestamp (or time.gmtime) to show the time the
+# collector wrote. Aggregates and tier records sit at the middle of their
+# window.
+
+RAW_INTERVAL_SEC = 10           # get_info.SAMPLE_INTERVAL_SECONDS (not imported: psutil)
+AGGREGATE_INTERVAL_SEC = 300    # 30 samples
+
+
+def parse_ts(strings):
+    """ ISO timestamps -> float64 seconds, in one vectorized pass. """
+    if not len(strings):
+        return np.zeros(0)
+    return np.array(strings, dtype="datetime64[us]").astype(np.int64) / 1e6
+
+
+class TimeIndex:
+    """ One level: sorted timestamps plus value columns of the same length. """
+
+    def __init__(self, name, interval, ts, columns):
+        ts = np.asarray(ts, dtype=np.float64)
+        columns = {k: np.asarray(v, dtype=np.float64) for k, v in columns.items()}
+        if len(ts) > 1 and np.any(np.diff(ts) < 0):
+            # Clock stepped back while collecting
+            order = np.argsort(ts, kind="stable")
+            ts = ts[order]
+            columns = {k: v[order] for k, v in columns.items()}
+        self.name = name
+        self.interval = interval
+        self.ts = ts
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.ts)
+
+    def first(self):
+        return self.ts[0]
+
+    def last(self):
+        return self.ts[-1]
+
+    def count(self, t0, t1):
+        """ Number of points with t0 <= ts <= t1. """
+        return int(np.searchsorted(self.ts, t1, "right") - np.searchsorted(self.ts, t0, "left"))
+
+    def bounds(self, t0, t1):
+        """ [i0, i1) of the points in [t0, t1], plus the neighbour on each
+            side so a line runs on to the edges of the range.
+        """
+        i0 = max(0, int(np.searchsorted(self.ts, t0, "left")) - 1)
+        i1 = min(len(self.ts), int(np.searchsorted(self.ts, t1, "right")) + 1)
+        return i0, i1
+
+
+def _window_mid(records):
+    starts = parse_ts(records.column("window", "start"))
+    ends = parse_ts(records.column("window", "end"))
+    return (starts + ends) / 2
+
+
+def _cpu_level(name, interval, records):
+    return TimeIndex(name, interval, _window_mid(records), {
+        "avg": records.column("cpu", "avg"),
+        "max": records.column("cpu", "max"),
+    })
+
+
+def build_levels(samples, aggregates, tiers):
+    """ CPU levels, finest first; empty ones are left out. The streams are
+        the journal's (utils.journal._Rows): read column by column.
+    """
+    levels = [
+        TimeIndex("raw", RAW_INTERVAL_SEC, parse_ts(samples.column("ts")), {
+            "avg": [v or 0 for v in samples.column("cpu", "usage")],
+        }),
+        _cpu_level("5m", AGGREGATE_INTERVAL_SEC, aggregates),
+    ]
+    for name, period, _ in TIERS:
+        if name in tiers:
+            levels.append(_cpu_level(name, period, tiers[name]))
+    return [level for level in levels if len(level)]
+
+
+def pick_level(levels, t0, t1, max_points):
+    """ The finest level that reaches back to t0 and has at most max_points
+        in [t0, t1]; if they all have more, the finest one that reaches
+        back (the caller reduces it). If none reaches back, the level with
+        the oldest data in range. None when nothing is in range.
+    """
+    # A line may cross the range between two points just outside it
+    in_range = [level for level in levels if level.first() <= t1 and level.last() >= t0]
+    covering = [level for level in in_range if level.first() <= t0 + level.interval]
+    for level in covering:
+        if level.count(t0, t1) <= max_points:
+            return level
+    if covering:
+        return covering[0]
+    return min(in_range, key=TimeIndex.first) if in_range else None
@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import threading
+
+import httpx
+
+from utils.analysis_client import CONNECT_TIMEOUT_SEC, READ_TIMEOUT_SEC
+from utils.constants import ANALYSIS_POLICY
+from utils.packager import ANALYSIS_POLICIES, CLOUD_DEADLINE_SEC, get_analysis
+
+# =======================
+# Pipelined upload
+# =======================
+# A report used to go through read -> analyze (up to minutes on a cold
+# server) -> insert, one step after the other. Here the raw report is
+# inserted as "pending" while the analysis runs, and the summary is
+# PATCHed onto that row when it arrives. Wall time is about
+# max(insert, analysis) + one small PATCH.
+#
+# Runs on its own asyncio loop (daemon thread) with one shared httpx
+# client for PostgREST. Up to max_in_flight reports are processed
+# concurrently, but each report is prepared and delivered (inserted, or
+# durably spooled) before the next one is prepared: on_delivered commits
+# its watermark there, so each delta starts where the previous delivered
+# one ended, and a report that never got out leaves the watermark alone.
+# The analysis and the PATCH still overlap with the next report.
+#
+# Progress goes to listeners as listener(job_id, stage, detail):
+#   queued, preparing, uploading (insert + analysis started), inserted,
+#   analyzed, done, spooled (insert failed: handed to the offline spool),
+#   failed
+#
+# The analysis is packager.get_analysis() in a worker thread: the same
+# policy decision as everywhere else, and /analyze goes through the
+# shared utils.analysis_client session (its connection pool, timings and
+# keep-warm state). With local_first nothing is sent to the cloud.
+
+MAX_IN_FLIGHT = 3
+PATCH_RETRIES = 3
+REPORTS_TABLE = "user_system_reports"
+
+
+class UploadPipeline:
+    def __init__(self, rest_url, api_key, analysis_client=None,
+                 max_in_flight=MAX_IN_FLIGHT, spool=None,
+                 policy=ANALYSIS_POLICY, deadline=CLOUD_DEADLINE_SEC):
+        if policy not in ANALYSIS_POLICIES:
+            raise ValueError(f"Unknown analysis policy: {policy}")
+        self.rest_url = rest_url.rstrip("/") + "/rest/v1/" + REPORTS_TABLE
+        # None: the process-wide utils.analysis_client session
+        self.analysis_client = analysis_client
+        self.headers = {
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        self.max_in_flight = max_in_flight
+        self.spool = spool
+        self.policy = policy
+        self.deadline = deadline
+        self.loop = None
+        self._client = None
+        self._slots = None
+        self._deliver_lock = None
+        self._listeners = []
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._ready = threading.Event()
+
+    # ---- lifecycle ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._thread = threading.Thread(target=self._run, name="upload-pipeline", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT_SEC, connect=CONNECT_TIMEOUT_SEC),
+            limits=httpx.Limits(max_keepalive_connections=self.max_in_flight * 2),
+        )
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._deliver_lock = asyncio.Lock()
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self._client.aclose())
+            self.loop.close()
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _emit(self, job_id, stage, detail=None):
+        for fn in list(self._listeners):
+            try:
+                fn(job_id, stage, detail)
+            except Exception as e:
+                print(f"Upload listener error: {e}")
+
+    def submit(self, prepare, on_delivered=None):
+        """ Queue one report (thread-safe). prepare() -> (analysis_input,
+            report) runs in a worker thread; on_delivered(report), if given,
+            runs once the report is inserted or durably spooled (e.g. to
+            advance the upload watermark), never when it failed before that.
+            Returns (job_id, concurrent.futures.Future).
+        """
+        job_id = next(self._ids)
+        self._emit(job_id, "queued")
+        future = asyncio.run_coroutine_threadsafe(self._process(job_id, prepare, on_delivered), self.loop)
+        return job_id, future
+
+    async def _delivered(self, report, on_delivered):
+        if not on_delivered:
+            return
+        try:
+            await asyncio.to_thread(on_delivered, report)
+        except Exception as e:
+            # The report is out; the next delta just overlaps it
+            print(f"Upload on_delivered error: {e}")
+
+    # ---- one report ----
+    async def _process(self, job_id, prepare, on_delivered):
+        async with self._slots:
+            async with self._deliver_lock:
+                try:
+                    self._emit(job_id, "preparing")
+                    analysis_input, report = await asyncio.to_thread(prepare)
+                except Exception as e:
+                    self._emit(job_id, "failed", str(e))
+                    raise
+
+                self._emit(job_id, "uploading")
+                analysis = asyncio.ensure_future(asyncio.to_thread(
+                    get_analysis, analysis_input, self.policy, self.deadline, self.analysis_client
+                ))
+                try:
+                    row_id = await self._insert(report)
+                except (httpx.HTTPError, ValueError, KeyError, IndexError) as e:
+                    # Keep the report: once the analysis is in, the offline
+                    # spool delivers it as a complete row.
+                    report["summary"] = await analysis
+                    if self.spool is None:
+                        self._emit(job_id, "failed", f"Insert failed: {e}")
+                        raise
+                    try:
+                        await asyncio.to_thread(self.spool.enqueue, report)
+                    except OSError as spool_error:
+                        self._emit(job_id, "failed", f"Insert failed ({e}) and could not be spooled: {spool_error}")
+                        raise
+                    await self._delivered(report, on_delivered)
+                    self._emit(job_id, "spooled", str(e))
+                    return {"job": job_id, "id": None, "spooled": True}
+                await self._delivered(report, on_delivered)
+            self._emit(job_id, "inserted", row_id)
+
+            summary = await analysis
+            self._emit(job_id, "analyzed", summary.get("engine"))
+            try:
+                await self._patch(row_id, {"summary": summary})
+            except httpx.HTTPError as e:
+                self._emit(job_id, "failed", f"Report saved, but its analysis could not be attached: {e}")
+                raise
+            self._emit(job_id, "done", row_id)
+            return {"job": job_id, "id": row_id, "spooled": False}
+
+    async def _insert(self, report):
+        response = await self._client.post(
+            self.rest_url,
+            params={"select": "id"},
+            json=report,
+            headers=dict(self.headers, Prefer="return=representation"),
+        )
+        response.raise_for_status()
+        return response.json()[0]["id"]
+
+    async def _patch(self, row_id, changes):
+        for attempt in range(PATCH_RETRIES):
+            try:
+                response = await self._client.patch(
+                    self.rest_url,
+                    params={"id": f"eq.{row_id}"},
+                    json=changes,
+                    headers=dict(self.headers, Prefer="return=minimal"),
+                )
+                response.raise_for_status()
+                return
+            except httpx.HTTPError:
+                if attempt == PATCH_RETRIES - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
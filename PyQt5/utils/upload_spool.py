@@ -0,0 +1,266 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from utils.stream_encode import iter_gzip_json
+
+# =======================
+# Durable upload spool
+# =======================
+# Finished reports are written here first (one gzip JSON file per report,
+# temp file + fsync + rename) and deleted only after the database accepted
+# them. A background flusher drains the spool in batches, backing off with
+# jitter while the network or the database is unavailable.
+#
+# Disk use is bounded: past max_files / max_bytes the oldest reports are
+# dropped (counted in stats()). Reports the server rejects outright are
+# moved to rejected/ instead of blocking the queue. Either way the report
+# is lost, and on_lost(name, reason) is told ("dropped" / "rejected").
+
+SPOOL_MAX_FILES = 500
+SPOOL_MAX_BYTES = 50 * 1024 * 1024
+REJECTED_KEEP = 20
+SUFFIX = ".json.gz"
+
+
+class UploadSpool:
+    def __init__(self, directory, max_files=SPOOL_MAX_FILES, max_bytes=SPOOL_MAX_BYTES,
+                 on_lost=None):
+        self.directory = directory
+        self.rejected_dir = os.path.join(directory, "rejected")
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self.on_lost = on_lost
+        self._lock = threading.Lock()
+        os.makedirs(self.rejected_dir, exist_ok=True)
+        # Leftovers of a write interrupted by a crash
+        for name in os.listdir(directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(directory, name))
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def enqueue(self, report):
+        """ Durably queue one report; returns its spool name. """
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}{SUFFIX}"
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            for chunk in iter_gzip_json(report):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(name))
+        with self._lock:
+            self._enforce_bounds()
+        return name
+
+    def pending(self):
+        """ Queued report names, oldest first. """
+        return sorted(n for n in os.listdir(self.directory) if n.endswith(SUFFIX))
+
+    def size(self, name):
+        try:
+            return os.path.getsize(self._path(name))
+        except OSError:
+            return 0
+
+    def load(self, name):
+        with gzip.open(self._path(name), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def remove(self, names):
+        for name in names:
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def reject(self, name):
+        """ Park a report the server will never accept. """
+        try:
+            os.replace(self._path(name), os.path.join(self.rejected_dir, name))
+        except FileNotFoundError:
+            return
+        rejected = sorted(os.listdir(self.rejected_dir))
+        for old in rejected[:-REJECTED_KEEP]:
+            os.remove(os.path.join(self.rejected_dir, old))
+        self._lost(name, "rejected")
+
+    def _lost(self, name, reason):
+        if self.on_lost is None:
+            return
+        try:
+            self.on_lost(name, reason)
+        except Exception as e:
+            print(f"Spool on_lost error: {e}")
+
+    def _enforce_bounds(self):
+        names = self.pending()
+        sizes = {n: self.size(n) for n in names}
+        total = sum(sizes.values())
+        while names and (len(names) > self.max_files or total > self.max_bytes):
+            oldest = names.pop(0)
+            total -= sizes[oldest]
+            self.remove([oldest])
+            self.dropped += 1
+            self._lost(oldest, "dropped")
+
+    def stats(self):
+        names = self.pending()
+        return {
+            "pending": len(names),
+            "bytes": sum(self.size(n) for n in names),
+            "dropped": self.dropped,
+            "rejected": len(os.listdir(self.rejected_dir)),
+        }
+
+
+# =======================
+# Background flusher
+# =======================
+BATCH_MAX_REPORTS = 20
+BATCH_MAX_BYTES = 4 * 1024 * 1024    # compressed, on disk
+BACKOFF_BASE_SEC = 5
+BACKOFF_MAX_SEC = 15 * 60
+
+
+def is_transient(exc):
+    """ Retry network / server errors. A PostgREST error carrying a
+        Postgres data/constraint/syntax SQLSTATE (class 22/23/42) or a
+        request error (PGRST1xx) will fail the same way every time.
+    """
+    code = str(getattr(exc, "code", None) or "")
+    return not code.startswith(("22", "23", "42", "PGRST1"))
+
+
+class SpoolFlusher:
+    """ Drains an UploadSpool through insert_rows(list_of_reports), which
+        must raise on failure. is_transient(exc) decides between backing
+        off and rejecting the offending report.
+    """
+
+    def __init__(self, spool, insert_rows, is_transient=is_transient,
+                 batch_reports=BATCH_MAX_REPORTS, batch_bytes=BATCH_MAX_BYTES,
+                 base_delay=BACKOFF_BASE_SEC, max_delay=BACKOFF_MAX_SEC):
+        self.spool = spool
+        self.insert_rows = insert_rows
+        self.is_transient = is_transient
+        self.batch_reports = batch_reports
+        self.batch_bytes = batch_bytes
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0          # consecutive transient failures
+        self.sent = 0
+        self.batches = 0
+        self.last_error = None
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _next_batch(self):
+        batch = []
+        total = 0
+        for name in self.spool.pending():
+            size = self.spool.size(name)
+            if batch and (len(batch) >= self.batch_reports or total + size > self.batch_bytes):
+                break
+            batch.append(name)
+            total += size
+        return batch
+
+    def _send(self, names):
+        """ Insert `names` in one request. A permanent error on a multi-row
+            batch is narrowed down by splitting it, so one bad report
+            doesn't hold back the others.
+        """
+        loaded = []
+        for name in names:
+            try:
+                loaded.append((name, self.spool.load(name)))
+            except (OSError, EOFError, ValueError):
+                self.spool.reject(name)      # unreadable: never sendable
+        if not loaded:
+            return
+        names = [name for name, _ in loaded]
+        rows = [row for _, row in loaded]
+        try:
+            self.insert_rows(rows)
+        except Exception as e:
+            if self.is_transient(e):
+                raise
+            if len(names) == 1:
+                print(f"Upload rejected, parked {names[0]}: {e}")
+                self.spool.reject(names[0])
+                return
+            mid = len(names) // 2
+            self._send(names[:mid])
+            self._send(names[mid:])
+            return
+        self.spool.remove(names)
+        self.sent += len(names)
+        self.batches += 1
+
+    def flush_once(self):
+        """ Send everything queued now; returns how many reports remain.
+            A transient error stops the pass and arms the backoff.
+        """
+        with self._flush_lock:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    self.failures = 0
+                    return 0
+                try:
+                    self._send(batch)
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    return len(self.spool.pending())
+                self.failures = 0
+                self.last_error = None
+
+    def backoff_delay(self):
+        """ Exponential backoff with equal jitter: somewhere in [d/2, d]. """
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, self.failures - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _run(self):
+        while not self._stop.is_set():
+            remaining = self.flush_once()
+            # Idle: wait for the next enqueue; failing: retry after backoff
+            timeout = self.backoff_delay() if remaining else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="upload-flusher", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return dict(
+            self.spool.stats(),
+            sent=self.sent,
+            batches=self.batches,
+            failures=self.failures,
+            last_error=self.last_error,
+        )
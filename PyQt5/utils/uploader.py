@@ -1,27 +1,127 @@
-from supabase import create_client
-from utils.packager import build_payload
+from utils.packager import prepare_report, commit_watermark, invalidate_watermark
 from utils.path_helper import resource_path
+from utils.upload_spool import UploadSpool, SpoolFlusher
 import json
-from utils.constants import SECRETS_PATH
-try:
-    with open(SECRETS_PATH, 'r') as file:
-        secrets = json.load(file)
-    
-    # print("Data successfully loaded into a Python object (likely a dictionary or list):")
-    # print(data)
-    # print(f"Type of data: {type(data)}")
-
-except FileNotFoundError:
-    print("Error: The file 'data.json' was not found.")
-except json.JSONDecodeError:
-    print("Error: Could not decode JSON from the file. Check for invalid JSON syntax.")
-
-url = secrets["PROJECT_URL"]
-key = secrets["service_role_key"]
-
-supabase = create_client(url, key)
-
-def upload():
-    supabase.table("user_system_reports").insert(
-        build_payload()
-    ).execute()
+import threading
+from utils.constants import SECRETS_PATH, UPLOAD_SPOOL_DIR
+
+# The Supabase client (supabase, postgrest, httpx, ...) and the upload
+# pipeline are only imported and built when the first report is sent,
+# not when the app starts.
+
+REPORTS_TABLE = "user_system_reports"
+
+_secrets = None
+_supabase = None
+_client_lock = threading.Lock()
+
+
+def get_secrets():
+    """ (project url, service key) from SECRETS_PATH, read once. """
+    global _secrets
+    if _secrets is None:
+        try:
+            with open(SECRETS_PATH, 'r') as file:
+                secrets = json.load(file)
+        except FileNotFoundError:
+            print(f"Error: The file '{SECRETS_PATH}' was not found.")
+            raise
+        except json.JSONDecodeError:
+            print("Error: Could not decode JSON from the file. Check for invalid JSON syntax.")
+            raise
+        _secrets = (secrets["PROJECT_URL"], secrets["service_role_key"])
+    return _secrets
+
+
+def get_supabase():
+    global _supabase
+    with _client_lock:
+        if _supabase is None:
+            from supabase import create_client
+            url, key = get_secrets()
+            _supabase = create_client(url, key)
+        return _supabase
+
+
+def insert_reports(rows):
+    from postgrest.types import ReturnMethod
+    # One multi-row INSERT for the whole batch; don't echo the rows back
+    get_supabase().table(REPORTS_TABLE).insert(rows, returning=ReturnMethod.minimal).execute()
+
+
+def _report_lost(name, reason):
+    # Its delta is gone for good: make the next upload a full one
+    print(f"Spooled report {name} {reason}; next upload will be a full checkpoint")
+    invalidate_watermark()
+
+
+_flusher = None
+# Re-entrant: get_pipeline() holds it while calling get_flusher()
+_flusher_lock = threading.RLock()
+
+
+def get_flusher():
+    """ The background flusher, started on first use; it also picks up
+        reports spooled by an earlier session.
+    """
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = SpoolFlusher(UploadSpool(UPLOAD_SPOOL_DIR, on_lost=_report_lost), insert_reports).start()
+        return _flusher
+
+
+_pipeline = None
+
+
+def get_pipeline():
+    """ The async upload pipeline; inserts it can't make fall back to the
+        spool, and the flusher is woken to pick them up.
+    """
+    global _pipeline
+    with _flusher_lock:
+        if _pipeline is None:
+            from utils.upload_pipeline import UploadPipeline
+            flusher = get_flusher()
+            url, key = get_secrets()
+            _pipeline = UploadPipeline(url, key, spool=flusher.spool).start()
+
+            def wake_flusher(job_id, stage, detail):
+                if stage == "spooled":
+                    flusher.wake()
+            _pipeline.add_listener(wake_flusher)
+            if _pipeline.policy != "local_first":
+                _pipeline.add_listener(_keepwarm_listener())
+        return _pipeline
+
+
+def _keepwarm_listener():
+    """ Keeps the analysis server warm while any upload is queued or in
+        flight; the pings stop once the last one is done, spooled or failed.
+    """
+    from utils.analysis_client import get_client
+    pending = set()
+    lock = threading.Lock()
+
+    def on_event(job_id, stage, detail):
+        with lock:
+            if stage == "queued":
+                pending.add(job_id)
+            elif stage in ("done", "spooled", "failed"):
+                pending.discard(job_id)
+            else:
+                return
+            busy = bool(pending)
+        if busy:
+            get_client().start_keepwarm()
+        else:
+            get_client().stop_keepwarm()
+    return on_event
+
+
+def submit_upload():
+    """ Queue a report on the pipeline; returns (job_id, future). The
+        watermark moves on once the report is inserted or durably spooled;
+        if the spool loses it later, _report_lost forces a full upload.
+    """
+    return get_pipeline().submit(prepare_report, on_delivered=commit_watermark)